@@ -0,0 +1,155 @@
+"""
+Неблокирующее логирование: обработчик запроса только кладет запись в очередь,
+а форматирование и запись в файл/консоль выполняет фоновый QueueListener.
+Подключается в LOGGING (config/settings.py) при LOG_QUEUE=1.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler, WatchedFileHandler)
+
+# Стандартные атрибуты LogRecord; все остальные попали в запись через extra
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_exception_formatter = logging.Formatter()
+
+
+def parse_sample_rates(value):
+    """
+    Разбирает строку вида 'employees=0.1,django.db.backends=0' в словарь
+    {имя логгера: доля сохраняемых записей DEBUG/INFO}.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю записей DEBUG/INFO для указанных логгеров (с учетом
+    иерархии имен). WARNING и выше сохраняются всегда.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self._resolved = {}
+
+    def rate_for(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = self.default_rate
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, владеющий своим QueueListener; слушатель останавливается при выходе."""
+
+    def __init__(self, handlers, maxsize=0):
+        super().__init__(queue.Queue(maxsize))
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def prepare(self, record):
+        # В потоке запроса только подставляются аргументы сообщения (они могут
+        # измениться после возврата) и текст исключения; форматирование — в слушателе
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Переполненная очередь не должна тормозить запрос: запись отбрасывается
+            pass
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+
+def file_handler(filename, max_bytes=0, backup_count=5, when=None):
+    """
+    Ротация по времени (when='midnight', 'H' и т.п.) либо по размеру файла (max_bytes).
+    Встроенная ротация допустима только при одном процессе, пишущем в файл: несколько
+    рабочих процессов (gunicorn) переименовывают файл одновременно и теряют записи.
+    Без when и max_bytes файл ротируется внешней программой (logrotate), а
+    WatchedFileHandler заново открывает его после переименования.
+    """
+    if when:
+        return TimedRotatingFileHandler(filename, when=when, backupCount=backup_count, encoding='utf-8')
+    if max_bytes:
+        return RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    return WatchedFileHandler(filename, encoding='utf-8')
+
+
+def queue_handler(filename, max_bytes=0, backup_count=5, when=None, console=True,
+                  console_level=logging.DEBUG, file_level=logging.INFO, maxsize=10000, stream=None):
+    """
+    Фабрика для LOGGING: файл в формате JSON lines (ротация — см. file_handler) и,
+    при console=True, консольный вывод. Оба обработчика работают в потоке QueueListener.
+    """
+    target = file_handler(filename, max_bytes, backup_count, when)
+    target.setLevel(file_level)
+    target.setFormatter(JsonLinesFormatter())
+    handlers = [target]
+    if console:
+        stream = logging.StreamHandler(stream or sys.stderr)
+        stream.setLevel(console_level)
+        stream.setFormatter(logging.Formatter('{levelname} {asctime} {module} {message}', style='{'))
+        handlers.append(stream)
+    return NonBlockingQueueHandler(handlers, maxsize)
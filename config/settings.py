@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from config.logging_queue import parse_sample_rates
+
 load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,15 +48,20 @@ INSTALLED_APPS = [
     'employees.apps.EmployeesConfig',
     'reports.apps.ReportsConfig',
     'instructions.apps.InstructionsConfig',
+    'monitoring.apps.MonitoringConfig',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ViewMetricsMiddleware',
+    'monitoring.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'employees.middleware.RolesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'reports.middleware.ReportCacheGenerationMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -140,6 +147,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Отдача сканов документов (employees.documents): '' — средствами Django,
+# 'nginx' — заголовком X-Accel-Redirect, 'apache' — заголовком X-Sendfile
+DOCUMENT_SENDFILE = os.getenv('DOCUMENT_SENDFILE', '')
+# internal location nginx, указывающий на MEDIA_ROOT
+DOCUMENT_ACCEL_PREFIX = os.getenv('DOCUMENT_ACCEL_PREFIX', '/protected-media/')
+# Превью сканов (employees.previews): размер большей стороны в точках и число фоновых потоков
+DOCUMENT_PREVIEW_SIZE = int(os.getenv('DOCUMENT_PREVIEW_SIZE', 320))
+DOCUMENT_PREVIEW_WORKERS = int(os.getenv('DOCUMENT_PREVIEW_WORKERS', 2))
+
 # Создание директории для логов, если она не существует
 LOG_DIR = BASE_DIR / 'logs'
 LOG_DIR.mkdir(exist_ok=True)
@@ -193,18 +209,101 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'reports': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'monitoring': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Неблокирующий режим логирования: записи передаются через очередь фоновому
+# потоку, файл пишется в формате JSON lines. Встроенная ротация по размеру или
+# времени — только для одного процесса; при нескольких рабочих процессах она
+# не задается, а файл ротирует logrotate (см. config.logging_queue.file_handler)
+LOG_QUEUE = os.getenv('LOG_QUEUE', '0').lower() in ('1', 'true', 'yes')
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN') or None
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES') or 0)
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+# Доля сохраняемых записей DEBUG/INFO по логгерам, например 'employees=0.1,django=0.5'
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', ''))
+
+if LOG_QUEUE:
+    LOGGING['filters'] = {
+        'sampling': {
+            '()': 'config.logging_queue.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    }
+    LOGGING['handlers'] = {
+        'queue': {
+            '()': 'config.logging_queue.queue_handler',
+            'filename': LOG_DIR / 'training_tracker.jsonl',
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'when': LOG_ROTATE_WHEN,
+            'filters': ['sampling'],
+        },
+    }
+    for logger_config in LOGGING['loggers'].values():
+        logger_config['handlers'] = ['queue']
+
+# Метрики представлений: сброс накопленного в базу раз в PERF_FLUSH_INTERVAL секунд,
+# отчет по умолчанию за PERF_WINDOW_MINUTES минут, хранение PERF_RETENTION_HOURS часов
+PERF_METRICS_ENABLED = os.getenv('PERF_METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+PERF_FLUSH_INTERVAL = 10
+PERF_WINDOW_MINUTES = 60
+PERF_RETENTION_HOURS = 24
+
+# Бюджет SQL-запросов представлений (monitoring.budget): 'raise' — исключение,
+# 'log' — предупреждение в журнале, пустое значение — проверка отключена
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'log' if DEBUG else '')
+
+# Почта: локально письма выводятся в консоль (или в файлы — filebased.EmailBackend и EMAIL_FILE_PATH)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'logs' / 'emails'))
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', '0').lower() in ('1', 'true', 'yes')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'training-tracker@localhost')
+
+# Сводка по истекающему обучению (send_expiry_digest): получатели и окно предупреждения
+EXPIRY_DIGEST_RECIPIENTS = [email for email in os.getenv('EXPIRY_DIGEST_RECIPIENTS', '').split(',') if email]
+EXPIRY_DIGEST_WINDOW_DAYS = 30
+
+# Задача экспорта, от обработчика которой нет сигнала дольше EXPORT_JOB_STALE_MINUTES
+# минут (обработчик упал или был остановлен), помечается ошибочной
+EXPORT_JOB_STALE_MINUTES = 15
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'index'
 LOGOUT_REDIRECT_URL = 'index'
 
 MODERATOR_GROUP_NAME = 'Moderators'
+EDITOR_GROUP_NAME = 'Editors'
 
+# Общий кэш в базе данных виден всем процессам; локальный кэш процесса служит
+# первым уровнем для отчетов и очищается при смене поколения данных
 CACHES = {
     'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'training_tracker_cache',
+        # Версия тега хранится на каждого сотрудника и программу, поэтому записей
+        # намного больше 300 по умолчанию; при переполнении удаляется десятая часть
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    'local': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'training-tracker-cache',
-    }
+    },
 }
\ No newline at end of file
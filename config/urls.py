@@ -1,11 +1,10 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path, include, reverse_lazy
 
 from employees.errors import custom_403
 from employees.views import IndexView
+from monitoring.budget import query_budget
 
 handler403 = custom_403
 
@@ -19,7 +18,8 @@ urlpatterns = [
     path('trainings/', include('trainings.urls')),
     path('reports/', include('reports.urls')),
     path('instructions/', include('instructions.urls')),
-    path('login/', LoginView.as_view(template_name='auth/login.html'), name='login'),
-    path('logout/', LogoutView.as_view(next_page=reverse_lazy('login')), name='logout'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('monitoring/', include('monitoring.urls')),
+    path('login/', query_budget(16)(LoginView.as_view(template_name='auth/login.html')), name='login'),
+    path('logout/', query_budget(12)(LogoutView.as_view(next_page=reverse_lazy('login'))), name='logout'),
+]
 
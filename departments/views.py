@@ -1,23 +1,25 @@
 import logging
 
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView
 
+from employees.pagination import KeysetPaginationMixin
 from employees.views import log_view_action, EditorModeratedDeleteView
+from reports.conditional import ConditionalGetMixin
 from .forms import DepartmentForm
 from .models import Department
 
 logger = logging.getLogger('departments')
 
 
-class DepartmentListView(LoginRequiredMixin, ListView):
+class DepartmentListView(LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = Department
     template_name = 'departments/department_list.html'
     context_object_name = 'departments'
     paginate_by = 20
+    query_budget = 13
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -49,6 +51,7 @@ class DepartmentCreateView(
     template_name = 'departments/department_form.html'
     success_url = reverse_lazy('departments:department_list')
     permission_required = 'departments.add_department'
+    query_budget = 12
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -81,6 +84,7 @@ class DepartmentUpdateView(
     template_name = 'departments/department_form.html'
     success_url = reverse_lazy('departments:department_list')
     permission_required = 'departments.change_department'
+    query_budget = 13
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -125,7 +129,7 @@ class DepartmentDeleteConfirmView(EditorModeratedDeleteView):
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
         user = request.user.username
-        if request.user.groups.filter(name=settings.MODERATOR_GROUP_NAME).exists():
+        if request.roles.is_moderator:
             logger.info(
                 'Подтверждено удаление подразделения: %s пользователем из группы модераторов: %s',
                 obj,
@@ -139,7 +143,7 @@ class DepartmentDeleteConfirmView(EditorModeratedDeleteView):
                 **kwargs)
         messages.error(
             request,
-            'Только пользователь из группы MTO может подтвердить удаление.')
+            'Только пользователь из группы Moderators может подтвердить удаление.')
         logger.warning(
             'Отказано в подтверждении удаления подразделения: %s пользователем: %s',
             obj,
@@ -0,0 +1,188 @@
+"""
+Хранение и отдача сканов документов об обучении.
+
+Файлы хранятся под именем, производным от SHA-256 содержимого
+(training_documents/ab/ab12…ef.pdf): один и тот же скан, загруженный для многих
+сотрудников, лежит на диске один раз. Поэтому файл нельзя удалять вместе с
+записью — на него могут ссылаться другие записи.
+
+Отдача идет через TrainingRecordDocumentView (после проверки входа), а не через
+MEDIA_URL. В зависимости от DOCUMENT_SENDFILE файл передает веб-сервер
+(X-Accel-Redirect для nginx, X-Sendfile для Apache) или сам Django через
+FileResponse: WSGI-сервер с wsgi.file_wrapper (gunicorn) отправляет его
+os.sendfile без копирования в Python. Поддерживаются запросы Range.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header, parse_etags
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище с именами по SHA-256 содержимого; одинаковые файлы не дублируются."""
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя определяется содержимым в _save, проверять занятость здесь не нужно
+        return name
+
+    def _save(self, name, content):
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        digest = hashlib.sha256()
+        temporary_path = getattr(content, 'temporary_file_path', None)
+        if temporary_path:
+            # Крупная загрузка уже лежит во временном файле: хешируем его и переносим без копирования
+            temporary_path = temporary_path()
+            for chunk in content.chunks():
+                digest.update(chunk)
+        else:
+            os.makedirs(self.path(directory), exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.path(directory), delete=False) as output:
+                temporary_path = output.name
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+        hexdigest = digest.hexdigest()
+        name = '/'.join(part for part in (directory, hexdigest[:2], hexdigest + extension) if part)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            if not hasattr(content, 'temporary_file_path'):
+                os.remove(temporary_path)
+            return name
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Одновременная загрузка того же файла перезапишет его тем же содержимым
+        file_move_safe(temporary_path, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+document_storage_instance = ContentAddressedStorage()
+
+
+def document_storage():
+    """Хранилище поля TrainingRecord.document (вызываемый объект, чтобы не сериализовать его в миграции)."""
+    return document_storage_instance
+
+
+def document_etag(name, stat):
+    """Сильный ETag: хеш содержимого из имени файла или размер и время изменения для старых файлов."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if DIGEST_RE.match(stem):
+        return f'"{stem}"'
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def parse_range(header, size):
+    """
+    (начало, конец) включительно для заголовка Range с одним диапазоном байтов;
+    None, если заголовок не поддерживается (отдается весь файл); ValueError,
+    если диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Суффикс: последние N байт
+        length = int(end)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class FileRange:
+    """
+    Часть открытого файла для FileResponse. Позиция файла установлена на начало
+    диапазона: os.sendfile в WSGI-сервере начинает с нее и передает
+    Content-Length байт, а обычное чтение останавливается на конце диапазона.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def document_response(request, name, filename):
+    """
+    Ответ с файлом name из хранилища документов (скан или его превью): условный
+    GET, Range и передача файла веб-серверу.
+    """
+    path = document_storage().path(name)
+    stat = os.stat(path)
+    etag = document_etag(name, stat)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    elif settings.DOCUMENT_SENDFILE == 'nginx':
+        # nginx сам обрабатывает Range и отдает файл из internal location
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.DOCUMENT_ACCEL_PREFIX + quote(name)
+    elif settings.DOCUMENT_SENDFILE == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        response = file_response(request, path, stat.st_size, etag, content_type, filename)
+
+    response['ETag'] = etag
+    if response.status_code != 304:
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def file_response(request, path, size, etag, content_type, filename):
+    """Отдача файла средствами Django; Range учитывается, если If-Range совпадает с ETag."""
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if 'Range' in request.headers and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(file, start, end - start + 1), status=206, content_type=content_type, filename=filename)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
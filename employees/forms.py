@@ -1,4 +1,7 @@
 from django import forms
+
+from departments.models import Department
+from trainings.models import TrainingProgram
 from .models import Employee, DeletionRequest, TrainingRecord
 
 
@@ -56,6 +59,48 @@ class TrainingRecordForm(forms.ModelForm):
         }
 
 
+class BulkTrainingRecordForm(forms.Form):
+    """Одна программа и дата для многих сотрудников (например, после группового обучения)."""
+    training_program = forms.ModelChoiceField(
+        queryset=TrainingProgram.objects.all(),
+        label='Программа обучения',
+        widget=forms.Select(attrs={'class': 'form-input'}))
+    completion_date = forms.DateField(
+        label='Дата прохождения',
+        widget=forms.DateInput(attrs={'class': 'form-input', 'type': 'date'}))
+    # Сотрудники выбираются в поле с подсказками (employee_picker.js), которое создает скрытые поля
+    employees = forms.ModelMultipleChoiceField(
+        queryset=Employee.objects.all(),
+        required=False,
+        label='Сотрудники',
+        widget=forms.MultipleHiddenInput)
+    department = forms.ModelChoiceField(
+        queryset=Department.objects.all(),
+        required=False,
+        label='Все работающие сотрудники подразделения',
+        widget=forms.Select(attrs={'class': 'form-input'}))
+    details = forms.CharField(
+        required=False,
+        label='Детали',
+        widget=forms.Textarea(attrs={'class': 'form-textarea'}))
+    is_verified = forms.BooleanField(
+        required=False,
+        label='Документы проверены',
+        widget=forms.CheckboxInput(attrs={'class': 'form-checkbox'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        employee_ids = {employee.pk for employee in cleaned_data.get('employees') or ()}
+        department = cleaned_data.get('department')
+        if department:
+            employee_ids.update(Employee.objects.filter(
+                department=department, is_dismissed=False).values_list('pk', flat=True))
+        if not employee_ids and not self.has_error('employees'):
+            raise forms.ValidationError('Выберите сотрудников или подразделение.')
+        cleaned_data['employee_ids'] = employee_ids
+        return cleaned_data
+
+
 class DeletionRequestForm(forms.ModelForm):
     class Meta:
         model = DeletionRequest
@@ -0,0 +1,104 @@
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.views import View
+
+from config.logging_queue import SamplingFilter, queue_handler
+from employees.views import log_view_action
+
+
+class _BenchmarkView(View):
+    @log_view_action('Запрошен', 'замер логирования')
+    def get(self, request, *args, **kwargs):
+        return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает накладные расходы log_view_action на запрос при синхронном '
+            'логировании и при логировании через очередь')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5000,
+            help='Число запросов в каждом замере'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Пауза между запросами в миллисекундах (имитация ожидания базы данных)'
+        )
+
+    def handle(self, *args, **kwargs):
+        logger = logging.getLogger('employees')
+        saved = logger.handlers[:], logger.level, logger.propagate
+        view = _BenchmarkView.as_view()
+        factory = RequestFactory()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                directory = Path(directory)
+                for name, handlers in (('без логирования', [logging.NullHandler()]),
+                                       ('синхронно', self.sync_handlers(directory)),
+                                       ('через очередь', self.queue_handlers(directory)),
+                                       ('очередь, 10%', self.queue_handlers(directory, sample_rate=0.1))):
+                    logger.handlers = handlers
+                    logger.setLevel(logging.DEBUG)
+                    logger.propagate = False
+                    timings = self.measure(view, factory, kwargs['requests'], kwargs['pause'] / 1000)
+                    started = time.perf_counter()
+                    for handler in handlers:
+                        if hasattr(handler, 'stop'):
+                            handler.stop()
+                        handler.close()
+                    drained = time.perf_counter() - started
+                    self.report(name, timings, drained)
+        finally:
+            logger.handlers, logger.level, logger.propagate = saved
+
+    @staticmethod
+    def sync_handlers(directory):
+        # Те же обработчики, что в LOGGING по умолчанию; консоль направлена в файл
+        formatter = logging.Formatter('{levelname} {asctime} {module} {message}', style='{')
+        console = logging.StreamHandler(open(directory / 'console.log', 'w', encoding='utf-8'))
+        console.setFormatter(formatter)
+        file = logging.FileHandler(directory / 'sync.log', encoding='utf-8')
+        file.setLevel(logging.INFO)
+        file.setFormatter(formatter)
+        return [console, file]
+
+    @staticmethod
+    def queue_handlers(directory, sample_rate=None):
+        stream = open(directory / 'queue-console.log', 'a', encoding='utf-8')
+        handler = queue_handler(directory / 'queue.jsonl', stream=stream)
+        if sample_rate is not None:
+            handler.addFilter(SamplingFilter({'employees': sample_rate}))
+        return [handler]
+
+    @staticmethod
+    def measure(view, factory, count, pause):
+        timings = []
+        for index in range(count):
+            request = factory.get('/benchmark/', {'employees': ['1', '2', '3'], 'page': str(index)})
+            request.user = AnonymousUser()
+            started = time.perf_counter()
+            view(request)
+            timings.append(time.perf_counter() - started)
+            if pause:
+                time.sleep(pause)
+        return timings
+
+    def report(self, name, timings, drained):
+        quantiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f'{name:>16}: среднее {statistics.fmean(timings) * 1e6:7.1f} мкс, '
+            f'p50 {quantiles[49] * 1e6:7.1f} мкс, p99 {quantiles[98] * 1e6:7.1f} мкс '
+            f'(досылка очереди {drained * 1000:.1f} мс)')
@@ -0,0 +1,48 @@
+import logging
+import os
+
+from django.core.management.base import BaseCommand
+
+from employees.documents import DIGEST_RE
+from employees.models import TrainingRecord
+
+logger = logging.getLogger('employees')
+
+
+class Command(BaseCommand):
+    help = ('Переносит сканы документов, загруженные до хранения по SHA-256, '
+            'в хранилище по хешу содержимого и удаляет дубликаты')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать файлы, которые будут перенесены'
+        )
+
+    def handle(self, *args, **kwargs):
+        field = TrainingRecord._meta.get_field('document')
+        storage = field.storage
+        names = (TrainingRecord.objects.exclude(document='').exclude(document__isnull=True)
+                 .values_list('document', flat=True).distinct().order_by('document'))
+        moved = missing = 0
+        for name in names.iterator():
+            if DIGEST_RE.match(os.path.splitext(os.path.basename(name))[0]):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                logger.warning('Скан документа %s не найден в хранилище', name)
+                continue
+            moved += 1
+            if kwargs['dry_run']:
+                continue
+            with storage.open(name, 'rb') as file:
+                new_name = storage.save(field.generate_filename(None, os.path.basename(name)), file)
+            TrainingRecord.objects.filter(document=name).update(document=new_name)
+            storage.delete(name)
+            logger.info('Скан документа %s перенесен в %s', name, new_name)
+
+        message = f'Перенесено сканов: {moved}, не найдено: {missing}'
+        if kwargs['dry_run']:
+            message = f'Будет перенесено сканов: {moved}, не найдено: {missing}'
+        self.stdout.write(self.style.SUCCESS(message))
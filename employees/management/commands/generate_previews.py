@@ -0,0 +1,30 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from employees.models import TrainingRecord
+from employees.previews import can_preview, generate_preview
+
+logger = logging.getLogger('employees')
+
+
+class Command(BaseCommand):
+    help = 'Создает отсутствующие превью сканов документов (например, для загруженных до появления превью)'
+
+    def handle(self, *args, **kwargs):
+        names = (TrainingRecord.objects.exclude(document='').exclude(document__isnull=True)
+                 .values_list('document', flat=True).distinct().order_by('document'))
+        created = skipped = failed = 0
+        for name in names.iterator():
+            if not can_preview(name):
+                skipped += 1
+                continue
+            try:
+                generate_preview(name)
+                created += 1
+            except Exception:
+                failed += 1
+                logger.exception('Не удалось создать превью документа %s', name)
+        message = f'Превью готово: {created}, без превью: {skipped}, ошибок: {failed}'
+        logger.info(message)
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,217 @@
+import logging
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from departments.models import Department
+from employees.models import Employee, EmployeeProgramStatus, TrainingRecord, calculate_due_date
+from employees.search import full_name_key
+from positions.models import Position
+from reports.cache import ReportCache
+from trainings.models import TrainingProgram
+
+logger = logging.getLogger('employees')
+
+LAST_NAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+              'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров',
+              'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин']
+MALE_FIRST_NAMES = ['Александр', 'Сергей', 'Дмитрий', 'Андрей', 'Алексей', 'Иван', 'Михаил', 'Артём']
+FEMALE_FIRST_NAMES = ['Елена', 'Ольга', 'Наталья', 'Татьяна', 'Ирина', 'Анна', 'Мария', 'Светлана']
+MIDDLE_NAMES = ['Александров', 'Сергеев', 'Дмитриев', 'Андреев', 'Владимиров', 'Николаев', 'Петров']
+POSITION_TITLES = ['Учитель', 'Воспитатель', 'Методист', 'Бухгалтер', 'Инженер', 'Специалист',
+                   'Программист', 'Юрисконсульт', 'Заведующий хозяйством', 'Техник']
+DEPARTMENT_TITLES = ['Отдел кадров', 'Бухгалтерия', 'Учебная часть', 'Хозяйственный отдел',
+                     'Методический отдел', 'Отдел информационных технологий', 'Юридический отдел']
+PROGRAM_TITLES = ['Охрана труда', 'Пожарная безопасность', 'Первая помощь', 'Электробезопасность',
+                  'ГО и ЧС', 'Антитеррористическая защищенность', 'Профилактика коррупции']
+# Периодичности, лет; None — однократное обучение
+RECURRENCE_PERIODS = [1, 3, 3, 5, None]
+IMPORT_PROGRAMS = {'Охрана труда': 3, 'Пожарная безопасность': 3, 'Первая помощь': 3,
+                   'Электробезопасность': None, 'ГО и ЧС': None}
+
+
+def numbered(titles, count):
+    """Уникальные названия: после исчерпания списка к названию добавляется номер."""
+    return [titles[index % len(titles)] + (f' {index // len(titles) + 1}' if index >= len(titles) else '')
+            for index in range(count)]
+
+
+def person(rng):
+    female = rng.random() < 0.6
+    last_name = rng.choice(LAST_NAMES) + ('а' if female else '')
+    first_name = rng.choice(FEMALE_FIRST_NAMES if female else MALE_FIRST_NAMES)
+    middle_name = rng.choice(MIDDLE_NAMES) + ('на' if female else 'ич')
+    birth_date = date(1960, 1, 1) + timedelta(days=rng.randrange(365 * 42))
+    return last_name, first_name, middle_name, birth_date
+
+
+def completion_history(rng, recurrence_period, count, today):
+    """
+    Даты прохождений одной программы от новых к старым. Последнее прохождение
+    разбросано так, что часть сотрудников в сроке, часть в окне предупреждения,
+    часть просрочена; предыдущие отстоят примерно на период обучения.
+    """
+    period_days = (recurrence_period or 4) * 365
+    completion = today - timedelta(days=rng.randrange(int(period_days * 1.2)))
+    dates = [completion]
+    for _ in range(count - 1):
+        completion -= timedelta(days=period_days + rng.randrange(-60, 60))
+        dates.append(completion)
+    return dates
+
+
+def generate_dataset(departments, positions, employees, programs, records_per_employee, seed=0,
+                     batch_size=1000):
+    """
+    Создает подразделения, должности, программы и сотрудников с records_per_employee
+    записями об обучении на каждого. Возвращает число созданных объектов по моделям.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    with transaction.atomic():
+        department_names = numbered(DEPARTMENT_TITLES, departments)
+        Department.objects.bulk_create(
+            [Department(name=name, description='') for name in department_names], ignore_conflicts=True)
+        department_objects = list(Department.objects.filter(name__in=department_names))
+
+        position_names = numbered(POSITION_TITLES, positions)
+        Position.objects.bulk_create(
+            [Position(name=name, is_manager=rng.random() < 0.1, is_teacher=name.startswith('Учитель'))
+             for name in position_names], ignore_conflicts=True)
+        position_objects = list(Position.objects.filter(name__in=position_names))
+
+        program_names = numbered(PROGRAM_TITLES, programs)
+        TrainingProgram.objects.bulk_create(
+            [TrainingProgram(name=name, recurrence_period=rng.choice(RECURRENCE_PERIODS)) for name in program_names],
+            ignore_conflicts=True)
+        program_objects = list(TrainingProgram.objects.filter(name__in=program_names))
+
+        # Уникальность сотрудника — ФИО и дата рождения; совпадения с имеющимися пропускаются
+        existing = set(Employee.objects.filter(last_name__in=[name + suffix for name in LAST_NAMES
+                                                              for suffix in ('', 'а')])
+                       .values_list('last_name', 'first_name', 'middle_name', 'birth_date'))
+        people = set()
+        while len(people) < employees:
+            key = person(rng)
+            if key not in existing:
+                people.add(key)
+        created_employees = Employee.objects.bulk_create(
+            (Employee(
+                last_name=last_name,
+                first_name=first_name,
+                middle_name=middle_name,
+                search_key=full_name_key(last_name, first_name, middle_name),
+                birth_date=birth_date,
+                position=rng.choice(position_objects) if position_objects else None,
+                department=rng.choice(department_objects) if department_objects else None,
+                hire_date=today - timedelta(days=rng.randrange(30, 365 * 25)),
+                is_on_maternity_leave=rng.random() < 0.02,
+                is_external_part_time=rng.random() < 0.05,
+                is_safety_commission_member=rng.random() < 0.03,
+            ) for last_name, first_name, middle_name, birth_date in sorted(people)),
+            batch_size=batch_size)
+        employee_ids = [employee.pk for employee in created_employees]
+
+        def records():
+            if not program_objects:
+                return
+            for employee_id in employee_ids:
+                # Записи распределяются по нескольким программам, у части — история прохождений
+                chosen = rng.sample(program_objects, min(len(program_objects), records_per_employee))
+                counts = dict.fromkeys(chosen, 1)
+                for _ in range(records_per_employee - len(chosen)):
+                    counts[rng.choice(chosen)] += 1
+                for program, count in counts.items():
+                    for completion_date in completion_history(rng, program.recurrence_period, count, today):
+                        yield TrainingRecord(
+                            employee_id=employee_id,
+                            training_program=program,
+                            completion_date=completion_date,
+                            next_due_date=calculate_due_date(completion_date, program.recurrence_period),
+                            is_verified=rng.random() < 0.7,
+                        )
+
+        created_records = len(TrainingRecord.objects.bulk_create(records(), batch_size=batch_size))
+        EmployeeProgramStatus.rebuild(employee_ids=employee_ids, batch_size=batch_size)
+        transaction.on_commit(ReportCache.invalidate_all)
+
+    return {
+        'departments': len(department_objects),
+        'positions': len(position_objects),
+        'programs': len(program_objects),
+        'employees': len(employee_ids),
+        'training_records': created_records,
+    }
+
+
+def write_import_workbook(path, employees, seed=0):
+    """Записывает книгу в формате, который ожидает import_excel (три строки заголовков)."""
+    rng = random.Random(seed)
+    today = date.today()
+    columns = [(name, '', '') for name in
+               ('Фамилия', 'Имя', 'Отчество', 'ДОЛЖНОСТЬ', 'СТРУКТУРНОЕ ПОДРАЗДЕЛЕНИЕ', 'Примечание')]
+    columns += [(name, 'Дата прохождения обучения', '') for name in IMPORT_PROGRAMS]
+    rows = []
+    seen = set()
+    for index in range(employees):
+        last_name, first_name, middle_name, _ = person(rng)
+        while (last_name, first_name, middle_name) in seen:
+            last_name = f'{last_name}-{index}'
+        seen.add((last_name, first_name, middle_name))
+        note = None
+        if rng.random() < 0.02:
+            note = f'уволена с {today - timedelta(days=rng.randrange(1000)):%d.%m.%Y}'
+        elif rng.random() < 0.02:
+            note = 'декрет'
+        row = [last_name, first_name, middle_name,
+               rng.choice(POSITION_TITLES) + (' руководитель' if rng.random() < 0.05 else ''),
+               rng.choice(DEPARTMENT_TITLES), note]
+        for recurrence_period in IMPORT_PROGRAMS.values():
+            if rng.random() < 0.25:
+                row.append(None)
+                continue
+            dates = completion_history(rng, recurrence_period, 1 + (rng.random() < 0.3), today)
+            row.append('\n'.join(f'{completion:%d.%m.%Y}' for completion in dates))
+        rows.append(row)
+    pd.DataFrame(rows, columns=pd.MultiIndex.from_tuples(columns)).to_excel(path)
+
+
+class Command(BaseCommand):
+    help = 'Создает синтетические данные (подразделения, должности, сотрудники, обучение) для замеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=20, help='Число подразделений')
+        parser.add_argument('--positions', type=int, default=40, help='Число должностей')
+        parser.add_argument('--employees', type=int, default=1000, help='Число сотрудников')
+        parser.add_argument('--programs', type=int, default=10, help='Число программ обучения')
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=5,
+            help='Число записей об обучении на сотрудника'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+        parser.add_argument(
+            '--xlsx',
+            type=str,
+            help='Вместо записи в базу сохранить Excel-файл в формате import_excel'
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['employees'] < 1 or kwargs['records'] < 0:
+            raise CommandError('Число сотрудников должно быть положительным, записей — неотрицательным')
+        if kwargs['xlsx']:
+            write_import_workbook(kwargs['xlsx'], kwargs['employees'], kwargs['seed'])
+            self.stdout.write(self.style.SUCCESS(f"Файл для импорта сохранен: {kwargs['xlsx']}"))
+            return
+
+        counts = generate_dataset(
+            kwargs['departments'], kwargs['positions'], kwargs['employees'], kwargs['programs'],
+            kwargs['records'], kwargs['seed'])
+        logger.info('Созданы синтетические данные: %s', counts)
+        for model, count in counts.items():
+            self.stdout.write(f'{model}: {count}')
+        self.stdout.write(self.style.SUCCESS('Синтетические данные созданы.'))
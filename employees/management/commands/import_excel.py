@@ -1,5 +1,6 @@
 import logging
 import os
+from functools import lru_cache
 
 import pandas as pd
 from dateutil.parser import parse as parse_date
@@ -7,11 +8,21 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from employees.models import Employee, Department, Position, TrainingProgram, TrainingRecord
+from employees.models import (
+    Employee, Department, Position, TrainingProgram, TrainingRecord, EmployeeProgramStatus, calculate_due_date,
+)
+from employees.search import full_name_key
+from reports.cache import ReportCache
 
 logger = logging.getLogger('employees')
 
 
+@lru_cache(maxsize=4096)
+def parse_day_first_date(date_str):
+    # Одни и те же даты групповых обучений повторяются во многих строках
+    return parse_date(date_str, dayfirst=True).date()
+
+
 class Command(BaseCommand):
     help = 'Импортирует данные из Excel файла в базу данных'
 
@@ -25,6 +36,17 @@ class Command(BaseCommand):
                 'обучение.xlsx'),
             help='Путь к Excel-файлу для импорта'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Пакетный импорт: одна транзакция и bulk_create вместо обработки по строкам'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета для bulk_create в пакетном режиме'
+        )
 
     def handle(self, *args, **kwargs):
         data_upload_dir = os.path.join(settings.BASE_DIR, 'data_upload')
@@ -72,59 +94,20 @@ class Command(BaseCommand):
             logger.error(f"Отсутствуют обязательные столбцы: {missing_cols}")
             return
 
+        if kwargs['bulk']:
+            self.import_bulk(df, column_mapping, programs, program_objects, kwargs['batch_size'])
+            logger.info('Импорт данных успешно завершён!')
+            return
+
         for index, row in df.iterrows():
             with transaction.atomic():
                 logger.debug(f"Обрабатывается строка {index}")
-                last_name = row.get(column_mapping['Фамилия'], None)
-                first_name = row.get(column_mapping['Имя'], None)
-                middle_name = row.get(
-                    column_mapping['Отчество'],
-                    '') if pd.notna(
-                    row.get(
-                        column_mapping['Отчество'],
-                        None)) else ''
-                position_name = row.get(
-                    column_mapping['ДОЛЖНОСТЬ'],
-                    '') if pd.notna(
-                    row.get(
-                        column_mapping['ДОЛЖНОСТЬ'],
-                        None)) else ''
-                department_name = row.get(
-                    column_mapping['СТРУКТУРНОЕ ПОДРАЗДЕЛЕНИЕ'],
-                    '') if pd.notna(
-                    row.get(
-                        column_mapping['СТРУКТУРНОЕ ПОДРАЗДЕЛЕНИЕ'],
-                        None)) else ''
-                note = row.get(
-                    column_mapping['Примечание'],
-                    '') if pd.notna(
-                    row.get(
-                        column_mapping['Примечание'],
-                        None)) else ''
-
-                if pd.isna(last_name) or pd.isna(first_name):
-                    logger.warning(
-                        f"Пропущена строка {index}: отсутствует Фамилия или Имя ({last_name}, {first_name})")
+                employee_data = self.parse_employee(index, row, column_mapping)
+                if employee_data is None:
                     continue
 
-                logger.info(f"Обработка сотрудника: {last_name} {first_name}")
-                is_dismissed = 'уволена' in note.lower()
-                is_on_maternity_leave = 'декрет' in note.lower()
-                is_safety_commission_member = 'член комиссии по охране труда' in note.lower()
-                dismissal_date = None
-                if is_dismissed and 'с ' in note.lower():
-                    try:
-                        dismissal_date_str = note.lower().split('с ')[
-                            1].strip()
-                        dismissal_date = parse_date(
-                            dismissal_date_str, dayfirst=True).date()
-                        logger.debug(
-                            f"Обработана дата увольнения: {dismissal_date}")
-                    except ValueError:
-                        logger.warning(
-                            f"Не удалось разобрать дату увольнения для {last_name}: {note}")
-
                 department = None
+                department_name = employee_data['department_name']
                 if department_name.strip():
                     department, _ = Department.objects.get_or_create(
                         name=department_name,
@@ -134,28 +117,23 @@ class Command(BaseCommand):
                         f"Создана/получена должность: {department_name}")
 
                 position = None
+                position_name = employee_data['position_name']
                 if position_name.strip():
                     position, _ = Position.objects.get_or_create(
                         name=position_name,
-                        defaults={
-                            'is_manager': 'руководитель' in position_name.lower(),
-                            'is_teacher': 'преподаватель' in position_name.lower() or 'учитель' in position_name.lower()
-                        }
+                        defaults=self.position_defaults(position_name)
                     )
                     logger.debug(
                         f"Создана/получена должность: {position_name}")
 
                 employee, _ = Employee.objects.get_or_create(
-                    last_name=last_name,
-                    first_name=first_name,
-                    middle_name=middle_name,
+                    last_name=employee_data['last_name'],
+                    first_name=employee_data['first_name'],
+                    middle_name=employee_data['middle_name'],
                     defaults={
                         'position': position,
                         'department': department,
-                        'is_dismissed': is_dismissed,
-                        'is_on_maternity_leave': is_on_maternity_leave,
-                        'is_safety_commission_member': is_safety_commission_member,
-                        'dismissal_date': dismissal_date
+                        **employee_data['defaults']
                     }
                 )
                 logger.info(f"Сотрудник добавлен/обновлен: {employee}")
@@ -168,42 +146,203 @@ class Command(BaseCommand):
                             if pd.notna(cell_value):
                                 logger.debug(
                                     f"Найдена дата для {program_name} в столбце {column}: {cell_value}")
-                                cell_value = str(cell_value).strip()
-                                entries = cell_value.split('\n')
-                                for entry in entries:
-                                    entry = entry.strip()
-                                    if not entry:
-                                        continue
-                                    details = ''
-                                    date_str = entry
-                                    has_question_mark = '?' in entry
-                                    if program_name == 'Электробезопасность' and ', ' in entry:
-                                        try:
-                                            details, date_str = entry.split(
-                                                ', ', 1)
-                                            date_str = date_str.strip()
-                                        except ValueError:
-                                            logger.warning(
-                                                f"Ошибка обработки группы для {employee} ({program_name}): {entry}")
-                                            continue
-                                    try:
-                                        training_date = parse_date(
-                                            date_str, dayfirst=True).date()
-                                        logger.debug(
-                                            f"Обработана дата: {training_date} для {employee} ({program_name})")
-                                        if has_question_mark:
-                                            details = f"{details} Отсутствует скан документа".strip(
-                                            )
-                                        TrainingRecord.objects.get_or_create(
-                                            employee=employee,
-                                            training_program=program_obj,
-                                            completion_date=training_date,
-                                            defaults={'details': details}
-                                        )
-                                        logger.info(
-                                            f"Создана запись для {program_name}: {training_date} (Детали: {details})")
-                                    except ValueError:
-                                        logger.warning(
-                                            f"Неподдерживаемый формат даты: {date_str} для {employee} ({program_name})")
-                                        continue
+                                for training_date, details in self.parse_training_entries(
+                                        employee, program_name, cell_value):
+                                    TrainingRecord.objects.get_or_create(
+                                        employee=employee,
+                                        training_program=program_obj,
+                                        completion_date=training_date,
+                                        defaults={'details': details}
+                                    )
+                                    logger.info(
+                                        f"Создана запись для {program_name}: {training_date} (Детали: {details})")
         logger.info('Импорт данных успешно завершён!')
+
+    @staticmethod
+    def position_defaults(position_name):
+        return {
+            'is_manager': 'руководитель' in position_name.lower(),
+            'is_teacher': 'преподаватель' in position_name.lower() or 'учитель' in position_name.lower()
+        }
+
+    @staticmethod
+    def parse_employee(index, row, column_mapping):
+        """Разбирает строку таблицы; возвращает None, если строку нужно пропустить."""
+        def optional_text(key):
+            value = row.get(column_mapping[key], None)
+            return value if pd.notna(value) else ''
+
+        last_name = row.get(column_mapping['Фамилия'], None)
+        first_name = row.get(column_mapping['Имя'], None)
+        middle_name = optional_text('Отчество')
+        position_name = optional_text('ДОЛЖНОСТЬ')
+        department_name = optional_text('СТРУКТУРНОЕ ПОДРАЗДЕЛЕНИЕ')
+        note = optional_text('Примечание')
+
+        if pd.isna(last_name) or pd.isna(first_name):
+            logger.warning(
+                f"Пропущена строка {index}: отсутствует Фамилия или Имя ({last_name}, {first_name})")
+            return None
+
+        logger.info(f"Обработка сотрудника: {last_name} {first_name}")
+        is_dismissed = 'уволена' in note.lower()
+        is_on_maternity_leave = 'декрет' in note.lower()
+        is_safety_commission_member = 'член комиссии по охране труда' in note.lower()
+        dismissal_date = None
+        if is_dismissed and 'с ' in note.lower():
+            try:
+                dismissal_date_str = note.lower().split('с ')[
+                    1].strip()
+                dismissal_date = parse_date(
+                    dismissal_date_str, dayfirst=True).date()
+                logger.debug(
+                    f"Обработана дата увольнения: {dismissal_date}")
+            except ValueError:
+                logger.warning(
+                    f"Не удалось разобрать дату увольнения для {last_name}: {note}")
+
+        return {
+            'last_name': last_name,
+            'first_name': first_name,
+            'middle_name': middle_name,
+            'position_name': position_name,
+            'department_name': department_name,
+            'defaults': {
+                'is_dismissed': is_dismissed,
+                'is_on_maternity_leave': is_on_maternity_leave,
+                'is_safety_commission_member': is_safety_commission_member,
+                'dismissal_date': dismissal_date
+            },
+        }
+
+    @staticmethod
+    def parse_training_entries(employee, program_name, cell_value):
+        """Разбирает ячейку с датами прохождения; возвращает пары (дата, детали)."""
+        cell_value = str(cell_value).strip()
+        entries = cell_value.split('\n')
+        for entry in entries:
+            entry = entry.strip()
+            if not entry:
+                continue
+            details = ''
+            date_str = entry
+            has_question_mark = '?' in entry
+            if program_name == 'Электробезопасность' and ', ' in entry:
+                try:
+                    details, date_str = entry.split(
+                        ', ', 1)
+                    date_str = date_str.strip()
+                except ValueError:
+                    logger.warning(
+                        f"Ошибка обработки группы для {employee} ({program_name}): {entry}")
+                    continue
+            try:
+                training_date = parse_day_first_date(date_str)
+                logger.debug(
+                    f"Обработана дата: {training_date} для {employee} ({program_name})")
+                if has_question_mark:
+                    details = f"{details} Отсутствует скан документа".strip(
+                    )
+                yield training_date, details
+            except ValueError:
+                logger.warning(
+                    f"Неподдерживаемый формат даты: {date_str} для {employee} ({program_name})")
+                continue
+
+    def import_bulk(self, df, column_mapping, programs, program_objects, batch_size):
+        """
+        Пакетный импорт: справочники и существующие сотрудники загружаются один раз,
+        соответствие программ столбцам определяется один раз, записи пишутся
+        пакетными bulk_create. Как и построчный режим (get_or_create), существующие
+        записи не изменяются, а из повторов внутри файла сохраняется первый.
+        """
+        program_columns = [
+            (program_objects[column[0]], column)
+            for column in df.columns
+            if column[0] in programs and column[1] == 'Дата прохождения обучения'
+        ]
+        departments = {department.name: department for department in Department.objects.all()}
+        positions = {position.name: position for position in Position.objects.all()}
+        employees = {
+            (employee.last_name, employee.first_name, employee.middle_name): employee
+            for employee in Employee.objects.only('pk', 'last_name', 'first_name', 'middle_name')
+        }
+
+        parsed_rows = []
+        columns = list(df.columns)
+        for index, values in zip(df.index, df.itertuples(index=False, name=None)):
+            # Словарь вместо pandas.Series: row.get(column) в десятки раз быстрее
+            row = dict(zip(columns, values))
+            employee_data = self.parse_employee(index, row, column_mapping)
+            if employee_data is None:
+                continue
+            employee_key = (employee_data['last_name'], employee_data['first_name'], employee_data['middle_name'])
+            trainings = [
+                (program_obj, training_date, details)
+                for program_obj, column in program_columns
+                if pd.notna(row.get(column, None))
+                for training_date, details in self.parse_training_entries(
+                    ' '.join(map(str, employee_key)), program_obj.name, row.get(column))
+            ]
+            parsed_rows.append((employee_key, employee_data, trainings))
+
+        with transaction.atomic():
+            new_departments = {
+                data['department_name'] for _, data, _ in parsed_rows
+                if data['department_name'].strip() and data['department_name'] not in departments}
+            Department.objects.bulk_create(
+                [Department(name=name, description='') for name in new_departments],
+                ignore_conflicts=True, batch_size=batch_size)
+            new_positions = {
+                data['position_name'] for _, data, _ in parsed_rows
+                if data['position_name'].strip() and data['position_name'] not in positions}
+            Position.objects.bulk_create(
+                [Position(name=name, **self.position_defaults(name)) for name in new_positions],
+                ignore_conflicts=True, batch_size=batch_size)
+            if new_departments:
+                departments.update(
+                    (department.name, department) for department in Department.objects.filter(name__in=new_departments))
+            if new_positions:
+                positions.update(
+                    (position.name, position) for position in Position.objects.filter(name__in=new_positions))
+            logger.info('Добавлено подразделений: %d, должностей: %d', len(new_departments), len(new_positions))
+
+            new_employees = {}
+            for employee_key, data, _ in parsed_rows:
+                if employee_key in employees or employee_key in new_employees:
+                    continue
+                new_employees[employee_key] = Employee(
+                    last_name=data['last_name'],
+                    first_name=data['first_name'],
+                    middle_name=data['middle_name'],
+                    # bulk_create не вызывает save(), ключ поиска заполняется явно
+                    search_key=full_name_key(data['last_name'], data['first_name'], data['middle_name']),
+                    department=departments.get(data['department_name']),
+                    position=positions.get(data['position_name']),
+                    **data['defaults'])
+            Employee.objects.bulk_create(new_employees.values(), batch_size=batch_size)
+            employees.update(new_employees)
+            logger.info('Добавлено сотрудников: %d', len(new_employees))
+
+            # Из повторов внутри файла остается первый, как при построчном get_or_create
+            records = {}
+            for employee_key, _, trainings in parsed_rows:
+                employee = employees[employee_key]
+                for program_obj, training_date, details in trainings:
+                    record_key = (employee.pk, program_obj.pk, training_date)
+                    if record_key in records:
+                        continue
+                    records[record_key] = TrainingRecord(
+                        employee=employee,
+                        training_program=program_obj,
+                        completion_date=training_date,
+                        # bulk_create не вызывает save(), дата следующего прохождения заполняется явно
+                        next_due_date=calculate_due_date(training_date, program_obj.recurrence_period),
+                        details=details)
+            # Уже существующие записи пропускаются по unique_together и не перезаписываются
+            TrainingRecord.objects.bulk_create(records.values(), batch_size=batch_size, ignore_conflicts=True)
+            logger.info('Обработано записей об обучении: %d', len(records))
+
+            # bulk_create не отправляет сигналы, поэтому статусы обучения пересчитываются отдельно
+            EmployeeProgramStatus.rebuild(employee_ids={employee_pk for employee_pk, _, _ in records})
+            transaction.on_commit(ReportCache.invalidate_all)
@@ -0,0 +1,32 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from employees.models import EmployeeProgramStatus
+
+logger = logging.getLogger('employees')
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает таблицу текущих статусов обучения по истории записей об обучении'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--employees',
+            type=int,
+            nargs='+',
+            help='ID сотрудников, для которых нужно перестроить статусы (по умолчанию все)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета при записи статусов'
+        )
+
+    def handle(self, *args, **kwargs):
+        created = EmployeeProgramStatus.rebuild(
+            employee_ids=kwargs['employees'],
+            batch_size=kwargs['batch_size'])
+        logger.info('Перестроено статусов обучения: %d', created)
+        self.stdout.write(self.style.SUCCESS(f'Перестроено статусов обучения: {created}'))
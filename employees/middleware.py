@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from employees.roles import get_roles
+
+
+class RolesMiddleware:
+    """
+    Добавляет request.roles — группы и права пользователя. Роли вычисляются
+    лениво, при первом обращении, и не более одного раза за запрос.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.roles = SimpleLazyObject(lambda: get_roles(request.user))
+        return self.get_response(request)
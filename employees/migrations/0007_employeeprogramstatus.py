@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:44
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_statuses(apps, schema_editor):
+    TrainingRecord = apps.get_model('employees', 'TrainingRecord')
+    EmployeeProgramStatus = apps.get_model('employees', 'EmployeeProgramStatus')
+    statuses = {}
+    records = TrainingRecord.objects.order_by(
+        'employee_id', 'training_program_id', '-completion_date', '-pk'
+    ).values_list(
+        'employee_id', 'training_program_id', 'completion_date', 'is_verified',
+        'training_program__recurrence_period')
+    for employee_id, program_id, completion_date, is_verified, recurrence_period in records.iterator():
+        if (employee_id, program_id) in statuses:
+            continue
+        statuses[(employee_id, program_id)] = EmployeeProgramStatus(
+            employee_id=employee_id,
+            training_program_id=program_id,
+            completion_date=completion_date,
+            is_verified=is_verified,
+            due_date=completion_date + timedelta(days=recurrence_period * 365)
+            if recurrence_period is not None else None,
+        )
+    EmployeeProgramStatus.objects.bulk_create(statuses.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_trainingrecord_document_trainingrecord_is_verified'),
+        ('trainings', '0002_alter_trainingprogram_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeProgramStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completion_date', models.DateField(verbose_name='Дата последнего прохождения')),
+                ('is_verified', models.BooleanField(default=False, verbose_name='Подтверждено')),
+                ('due_date', models.DateField(blank=True, null=True, verbose_name='Дата следующего прохождения')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_statuses', to='employees.employee', verbose_name='Сотрудник')),
+                ('training_program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='employee_statuses', to='trainings.trainingprogram', verbose_name='Программа обучения')),
+            ],
+            options={
+                'verbose_name': 'Текущий статус обучения',
+                'verbose_name_plural': 'Текущие статусы обучения',
+                'indexes': [models.Index(fields=['training_program', 'due_date'], name='employees_e_trainin_542526_idx')],
+                'unique_together': {('employee', 'training_program')},
+            },
+        ),
+        migrations.RunPython(populate_statuses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:17
+
+import re
+
+from django.db import migrations, models
+
+TRIGRAM_INDEX = 'employees_employee_search_key_trgm'
+
+
+def full_name_key(last_name, first_name, middle_name):
+    # Копия employees.search.full_name_key на момент миграции: миграция не должна меняться вместе с кодом
+    full_name = ' '.join(part for part in (last_name, first_name, middle_name) if part)
+    return re.sub(r'\s+', ' ', full_name.lower().replace('ё', 'е')).strip()
+
+
+def populate_search_keys(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    employees = list(Employee.objects.only('last_name', 'first_name', 'middle_name'))
+    for employee in employees:
+        employee.search_key = full_name_key(employee.last_name, employee.first_name, employee.middle_name)
+    Employee.objects.bulk_update(employees, ['search_key'], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm и GIN-индекс есть только в PostgreSQL; в SQLite поиск работает без индекса
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON employees_employee USING gin (search_key gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_employeeprogramstatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_key',
+            field=models.CharField(blank=True, editable=False, max_length=800, verbose_name='Ключ поиска по ФИО'),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
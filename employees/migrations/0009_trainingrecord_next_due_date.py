@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:34
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast
+
+
+def populate_next_due_dates(apps, schema_editor):
+    # Один UPDATE на программу с периодичностью; у остальных дата остается пустой.
+    # Выражение повторяет employees.models.due_date_expression на момент миграции
+    TrainingProgram = apps.get_model('trainings', 'TrainingProgram')
+    TrainingRecord = apps.get_model('employees', 'TrainingRecord')
+    for program_id, recurrence_period in TrainingProgram.objects.exclude(
+            recurrence_period=None).values_list('pk', 'recurrence_period'):
+        TrainingRecord.objects.filter(training_program_id=program_id).update(
+            next_due_date=Cast(F('completion_date') + timedelta(days=recurrence_period * 365), models.DateField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_employee_search_key'),
+        ('trainings', '0002_alter_trainingprogram_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrecord',
+            name='next_due_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Дата следующего прохождения'),
+        ),
+        migrations.RunPython(populate_next_due_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='trainingrecord',
+            index=models.Index(fields=['next_due_date', 'employee', 'training_program'], name='employees_t_next_du_43e5df_idx'),
+        ),
+    ]
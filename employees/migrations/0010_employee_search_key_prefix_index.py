@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_alter_department_name'),
+        ('employees', '0009_trainingrecord_next_due_date'),
+        ('positions', '0003_alter_position_is_manager_alter_position_is_teacher_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['search_key'], name='employees_search_key_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
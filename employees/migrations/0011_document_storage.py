@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:52
+
+import employees.documents
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0010_employee_search_key_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trainingrecord',
+            name='document',
+            field=models.FileField(blank=True, null=True, storage=employees.documents.document_storage, upload_to='training_documents/', verbose_name='Скан документа'),
+        ),
+    ]
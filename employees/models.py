@@ -1,11 +1,16 @@
 from datetime import timedelta
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Window
+from django.db.models.functions import Cast, RowNumber
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.dispatch import Signal
 from django.utils import timezone
 
 from departments.models import Department
+from employees.documents import document_storage
+from employees.search import full_name_key
 from positions.models import Position
 from trainings.models import TrainingProgram
 
@@ -58,6 +63,11 @@ class Employee(models.Model):
     is_safety_commission_member = models.BooleanField(
         default=False,
         verbose_name='Член комиссии по охране труда')
+    search_key = models.CharField(
+        max_length=800,
+        blank=True,
+        editable=False,
+        verbose_name='Ключ поиска по ФИО')
 
     def clean(self):
         if self.dismissal_date and not self.is_dismissed:
@@ -68,6 +78,13 @@ class Employee(models.Model):
                 'Сотрудник помечен как уволенный, но дата увольнения не указана.')
         super().clean()
 
+    def save(self, *args, **kwargs):
+        self.search_key = full_name_key(self.last_name, self.first_name, self.middle_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'last_name', 'first_name', 'middle_name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         middle_name = f' {self.middle_name}' if self.middle_name else ''
         return f'{self.last_name} {self.first_name}{middle_name}'
@@ -80,6 +97,11 @@ class Employee(models.Model):
             'first_name',
             'middle_name',
             'birth_date')
+        indexes = [
+            # Поиск по началу ФИО (LIKE 'префикс%') в PostgreSQL обслуживает только индекс
+            # с varchar_pattern_ops; в других СУБД opclasses не применяются
+            models.Index(fields=['search_key'], name='employees_search_key_prefix', opclasses=['varchar_pattern_ops']),
+        ]
 
 
 class DeletionRequest(models.Model):
@@ -132,6 +154,25 @@ class DeletionRequest(models.Model):
         verbose_name_plural = 'Запросы на удаление'
 
 
+# bulk_create и update не отправляют post_save: массовые операции с записями об
+# обучении отправляют этот сигнал один раз на пакет (аргументы employee_ids, program_ids)
+training_records_bulk_changed = Signal()
+
+
+def calculate_due_date(completion_date, recurrence_period):
+    """Дата следующего прохождения; None для программ без периодичности."""
+    if recurrence_period is None:
+        return None
+    return completion_date + timedelta(days=recurrence_period * 365)
+
+
+def due_date_expression(recurrence_period, field='completion_date'):
+    """То же вычисление в SQL для массового UPDATE по программе."""
+    if recurrence_period is None:
+        return None
+    return Cast(F(field) + timedelta(days=recurrence_period * 365), models.DateField())
+
+
 class TrainingRecord(models.Model):
     employee = models.ForeignKey(
         Employee,
@@ -153,6 +194,7 @@ class TrainingRecord(models.Model):
     )
     document = models.FileField(
         upload_to='training_documents/',
+        storage=document_storage,
         blank=True,
         null=True,
         verbose_name='Скан документа'
@@ -161,11 +203,211 @@ class TrainingRecord(models.Model):
         default=False,
         verbose_name='Подтверждено'
     )
+    # Хранится, чтобы выборки «срок истекает в период» шли по индексу, а не
+    # вычислялись в Python для всех записей; bulk_create должен заполнять поле явно
+    next_due_date = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Дата следующего прохождения'
+    )
+
+    def save(self, *args, **kwargs):
+        self.next_due_date = calculate_due_date(self.completion_date, self.training_program.recurrence_period)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'completion_date', 'training_program'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'next_due_date'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee} - {self.training_program} ({self.completion_date})"
 
+    @classmethod
+    def refresh_due_dates(cls, training_program):
+        """Пересчитывает даты следующего прохождения всех записей программы одним UPDATE."""
+        return cls.objects.filter(training_program=training_program).update(
+            next_due_date=due_date_expression(training_program.recurrence_period))
+
+    @classmethod
+    def bulk_add(cls, employee_ids, training_program, completion_date, details=None, is_verified=False):
+        """
+        Создает записи одной программы с одной датой для многих сотрудников одним
+        bulk_create. Записи, которые уже есть (unique_together), пропускаются.
+        Возвращает ID сотрудников, которым записи добавлены.
+        """
+        employee_ids = set(employee_ids)
+        existing = set(cls.objects.filter(
+            employee_id__in=employee_ids,
+            training_program=training_program,
+            completion_date=completion_date).values_list('employee_id', flat=True))
+        added = sorted(employee_ids - existing)
+        next_due_date = calculate_due_date(completion_date, training_program.recurrence_period)
+        with transaction.atomic():
+            # ignore_conflicts страхует от записей, созданных параллельно после проверки выше
+            cls.objects.bulk_create([
+                cls(employee_id=employee_id,
+                    training_program=training_program,
+                    completion_date=completion_date,
+                    details=details,
+                    is_verified=is_verified,
+                    next_due_date=next_due_date)
+                for employee_id in added
+            ], ignore_conflicts=True)
+            if added:
+                training_records_bulk_changed.send(
+                    sender=cls, employee_ids=added, program_ids=[training_program.pk])
+        return added
+
+    @classmethod
+    def bulk_verify(cls, queryset):
+        """Подтверждает неподтвержденные записи выборки одним UPDATE; возвращает их число."""
+        queryset = queryset.filter(is_verified=False)
+        with transaction.atomic():
+            cells = set(queryset.values_list('employee_id', 'training_program_id'))
+            updated = queryset.update(is_verified=True)
+            if updated:
+                training_records_bulk_changed.send(
+                    sender=cls,
+                    employee_ids=sorted({employee_id for employee_id, _ in cells}),
+                    program_ids=sorted({program_id for _, program_id in cells}))
+        return updated
+
+    @classmethod
+    def due_between(cls, start, end):
+        """
+        Последние записи в парах (сотрудник, программа), срок повторного обучения
+        по которым наступает в период [start, end]. Выборка идет по индексу
+        next_due_date; записи, после которых обучение пройдено повторно, исключаются.
+        """
+        newer = cls.objects.filter(
+            employee_id=models.OuterRef('employee_id'),
+            training_program_id=models.OuterRef('training_program_id'),
+            completion_date__gt=models.OuterRef('completion_date'))
+        return cls.objects.filter(next_due_date__range=(start, end)).exclude(models.Exists(newer))
+
     class Meta:
         verbose_name = 'Запись об обучении'
         verbose_name_plural = 'Записи об обучении'
-        unique_together = ('employee', 'training_program', 'completion_date')
\ No newline at end of file
+        unique_together = ('employee', 'training_program', 'completion_date')
+        indexes = [
+            models.Index(fields=['next_due_date', 'employee', 'training_program']),
+        ]
+
+class EmployeeProgramStatus(models.Model):
+    """
+    Денормализованный текущий статус обучения: последняя запись об обучении
+    для каждой пары (сотрудник, программа). Поддерживается сигналами
+    TrainingRecord и TrainingProgram, восстанавливается командой rebuild_training_status.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='training_statuses',
+        verbose_name='Сотрудник'
+    )
+    training_program = models.ForeignKey(
+        TrainingProgram,
+        on_delete=models.CASCADE,
+        related_name='employee_statuses',
+        verbose_name='Программа обучения'
+    )
+    completion_date = models.DateField(
+        verbose_name='Дата последнего прохождения'
+    )
+    is_verified = models.BooleanField(
+        default=False,
+        verbose_name='Подтверждено'
+    )
+    due_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Дата следующего прохождения'
+    )
+
+    def __str__(self):
+        return f"{self.employee} - {self.training_program} ({self.completion_date})"
+
+    @classmethod
+    def refresh(cls, employee_id, training_program_id):
+        """Пересчитывает одну ячейку (сотрудник, программа) по истории записей."""
+        latest_record = TrainingRecord.objects.filter(
+            employee_id=employee_id,
+            training_program_id=training_program_id
+        ).order_by('-completion_date', '-pk').first()
+        if latest_record is None:
+            cls.objects.filter(
+                employee_id=employee_id,
+                training_program_id=training_program_id).delete()
+            return None
+        status, _ = cls.objects.update_or_create(
+            employee_id=employee_id,
+            training_program_id=training_program_id,
+            defaults={
+                'completion_date': latest_record.completion_date,
+                'is_verified': latest_record.is_verified,
+                'due_date': latest_record.next_due_date,
+            }
+        )
+        return status
+
+    @classmethod
+    def refresh_due_dates(cls, training_program):
+        """Пересчитывает даты следующего прохождения после изменения периодичности программы."""
+        return cls.objects.filter(training_program=training_program).update(
+            due_date=due_date_expression(training_program.recurrence_period))
+
+    @classmethod
+    def rebuild(cls, employee_ids=None, program_ids=None, batch_size=1000):
+        """
+        Полностью перестраивает таблицу (или строки указанных сотрудников и
+        программ) одним запросом к истории: последняя запись в каждой паре
+        выбирается оконной функцией.
+        """
+        records = TrainingRecord.objects.all()
+        statuses = cls.objects.all()
+        if employee_ids is not None:
+            records = records.filter(employee_id__in=employee_ids)
+            statuses = statuses.filter(employee_id__in=employee_ids)
+        if program_ids is not None:
+            records = records.filter(training_program_id__in=program_ids)
+            statuses = statuses.filter(training_program_id__in=program_ids)
+        latest_records = records.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('employee_id'), F('training_program_id')],
+                order_by=[F('completion_date').desc(), F('pk').desc()],
+            )
+        ).filter(row_number=1).values(
+            'employee_id',
+            'training_program_id',
+            'completion_date',
+            'is_verified',
+            'next_due_date')
+
+        created = 0
+        with transaction.atomic():
+            statuses.delete()
+            batch = []
+            for record in latest_records.iterator(chunk_size=batch_size):
+                batch.append(cls(
+                    employee_id=record['employee_id'],
+                    training_program_id=record['training_program_id'],
+                    completion_date=record['completion_date'],
+                    is_verified=record['is_verified'],
+                    due_date=record['next_due_date'],
+                ))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            cls.objects.bulk_create(batch)
+            created += len(batch)
+        return created
+
+    class Meta:
+        verbose_name = 'Текущий статус обучения'
+        verbose_name_plural = 'Текущие статусы обучения'
+        unique_together = ('employee', 'training_program')
+        indexes = [
+            models.Index(fields=['training_program', 'due_date']),
+        ]
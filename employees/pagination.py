@@ -0,0 +1,194 @@
+import json
+import logging
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+logger = logging.getLogger('employees')
+
+CURSOR_SALT = 'keyset-pagination'
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorSerializer(signing.JSONSerializer):
+    """Значения ключа могут быть датами и Decimal, поэтому используется DjangoJSONEncoder."""
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), cls=DjangoJSONEncoder).encode('latin-1')
+
+
+class KeysetPage:
+    """Страница, выбранная по ключу сортировки; совместима с page_obj в шаблонах для навигации."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return ''
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по ключу (seek): вместо OFFSET следующая страница выбирается
+    условием «ключ сортировки больше последнего показанного», поэтому стоимость
+    запроса не зависит от глубины страницы. Ключ — поля сортировки queryset,
+    дополненные первичным ключом для однозначности. Курсор подписан, изменить его
+    значения в адресной строке нельзя.
+
+    count_mode: None — общее число не считается; 'exact' — COUNT(*);
+    'estimated' — оценка из статистики PostgreSQL (pg_class.reltuples) для
+    запросов без фильтров, в остальных случаях COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page, count_mode=None):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering) or ['pk']
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.per_page = per_page
+        self.count_mode = count_mode
+        self.model = queryset.model
+
+    @cached_property
+    def count(self):
+        if self.count_mode is None:
+            return None
+        if self.count_mode == 'estimated':
+            estimate = self.estimated_count()
+            if estimate is not None:
+                return estimate
+        return self.queryset.count()
+
+    def estimated_count(self):
+        if self.queryset.query.where or self.queryset.query.distinct:
+            return None
+        connection = connections[self.queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [self.model._meta.db_table])
+            row = cursor.fetchone()
+        # Для таблицы без ANALYZE reltuples равно -1 (PostgreSQL 14+) или 0
+        if not row or row[0] <= 0:
+            return None
+        return row[0]
+
+    def field(self, name):
+        name = name.lstrip('-')
+        if name == 'pk':
+            return self.model._meta.pk
+        # Сортировка по аннотации (например, дате из подзапроса): тип берется из выражения
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def key(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        return signing.dumps({'k': self.key(obj), 'd': direction}, salt=CURSOR_SALT, serializer=CursorSerializer,
+                             compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT, serializer=CursorSerializer)
+            values = payload['k']
+            direction = payload['d']
+            if len(values) != len(self.ordering) or direction not in (NEXT, PREVIOUS):
+                raise ValueError
+            values = [
+                self.field(name).to_python(value) if value is not None and self.field(name) else value
+                for name, value in zip(self.ordering, values)
+            ]
+        except (signing.BadSignature, KeyError, TypeError, ValueError) as e:
+            logger.warning('Отклонен неверный курсор постраничного вывода: %s', e)
+            return None, NEXT
+        return values, direction
+
+    def seek(self, values, forward):
+        """Условие «строка после (или до) ключа values» для смешанных направлений сортировки."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        # Избыточное условие по первому полю позволяет использовать его индекс: без него
+        # дизъюнкция выше не ограничивает диапазон и база просматривает таблицу целиком
+        first, value = self.ordering[0], values[0]
+        if value is not None:
+            lookup = 'lte' if first.startswith('-') == forward else 'gte'
+            condition &= Q(**{f"{first.lstrip('-')}__{lookup}": value})
+        return condition
+
+    def page(self, cursor=None):
+        values, direction = self.decode_cursor(cursor) if cursor else (None, NEXT)
+        forward = direction == NEXT
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        # Одна лишняя строка показывает, есть ли страница дальше в направлении перехода
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            return KeysetPage(rows, self, has_next=has_more, has_previous=values is not None)
+        rows.reverse()
+        return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+
+
+class KeysetPaginationMixin:
+    """
+    Подмешивается к ListView перед ListView: заменяет постраничный вывод с OFFSET
+    и COUNT(*) на постраничный вывод по ключу. Номер страницы заменяется
+    параметром cursor; в шаблоне доступны page_obj.next_cursor и previous_cursor.
+    """
+    cursor_kwarg = 'cursor'
+    count_mode = None
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.count_mode)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
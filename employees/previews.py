@@ -0,0 +1,130 @@
+"""
+Превью сканов документов об обучении.
+
+После сохранения записи с документом сигнал (после фиксации транзакции) ставит
+создание превью в локальный пул потоков, поэтому запрос с загрузкой файла не
+ждет обработки изображения. Превью — JPEG не больше DOCUMENT_PREVIEW_SIZE точек
+по большей стороне; оно лежит в хранилище документов под хешем содержимого
+исходного файла (document_previews/ab/<sha256>.jpg) и создается один раз для
+всех записей с тем же сканом.
+
+Pillow (изображения) и pypdfium2 (первая страница PDF) указаны в requirements.txt;
+если их нет в окружении, превью не создаются, а на странице остается ссылка на документ.
+"""
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from employees.documents import DIGEST_RE, document_storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+logger = logging.getLogger('employees')
+
+PREVIEW_DIRECTORY = 'document_previews'
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.webp'})
+
+_executor = None
+# Документы, превью которых сейчас создается: повторная загрузка того же скана не ставит задачу дважды
+_pending = {}
+_lock = threading.Lock()
+
+
+def preview_name(document_name):
+    """Имя превью в хранилище; None для документов, сохраненных не под хешем содержимого."""
+    stem = os.path.splitext(os.path.basename(document_name))[0]
+    if not DIGEST_RE.match(stem):
+        return None
+    return f'{PREVIEW_DIRECTORY}/{stem[:2]}/{stem}.jpg'
+
+
+def can_preview(document_name):
+    if Image is None or preview_name(document_name) is None:
+        return False
+    extension = os.path.splitext(document_name)[1].lower()
+    return extension in IMAGE_EXTENSIONS or (extension == '.pdf' and pypdfium2 is not None)
+
+
+def render_preview(path, size):
+    """Уменьшенное изображение файла (для PDF — первой страницы) в RGB."""
+    if path.lower().endswith('.pdf'):
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            page = pdf[0]
+            # Страница сразу рендерится в размере превью, а не в полном разрешении
+            image = page.render(scale=size / max(page.get_size())).to_pil()
+        finally:
+            pdf.close()
+    else:
+        with Image.open(path) as source:
+            # JPEG декодируется сразу с уменьшением, без распаковки полного снимка
+            source.draft('RGB', (size, size))
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((size, size))
+    return image.convert('RGB')
+
+
+def generate_preview(document_name):
+    """Создает превью документа, если его еще нет; возвращает имя превью или None."""
+    if not can_preview(document_name):
+        return None
+    name = preview_name(document_name)
+    storage = document_storage()
+    if storage.exists(name):
+        return name
+    image = render_preview(storage.path(document_name), settings.DOCUMENT_PREVIEW_SIZE)
+    full_path = storage.path(name)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    # Превью появляется целиком: его не прочитают, пока файл дописывается
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(full_path), suffix='.jpg', delete=False) as output:
+        try:
+            image.save(output, 'JPEG', quality=80, optimize=True)
+        except Exception:
+            os.remove(output.name)
+            raise
+    if storage.file_permissions_mode is not None:
+        os.chmod(output.name, storage.file_permissions_mode)
+    os.replace(output.name, full_path)
+    return name
+
+
+def _run(document_name):
+    try:
+        name = generate_preview(document_name)
+        if name:
+            logger.info('Создано превью %s для документа %s', name, document_name)
+    except Exception:
+        logger.exception('Не удалось создать превью документа %s', document_name)
+    finally:
+        with _lock:
+            _pending.pop(document_name, None)
+
+
+def schedule_preview(document_name):
+    """
+    Ставит создание превью в фоновый пул и сразу возвращается. Возвращает Future
+    задачи или None, если превью уже есть или для этого файла не создается.
+    """
+    global _executor
+    if not can_preview(document_name) or document_storage().exists(preview_name(document_name)):
+        return None
+    with _lock:
+        future = _pending.get(document_name)
+        if future is None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DOCUMENT_PREVIEW_WORKERS, thread_name_prefix='document-preview')
+            future = _pending[document_name] = _executor.submit(_run, document_name)
+    return future
@@ -0,0 +1,91 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from monitoring.metrics import cache_event
+
+logger = logging.getLogger('employees')
+
+ROLES_CACHE_TIMEOUT = 60 * 60
+ROLES_KEY_PREFIX = 'user_roles'
+# Общая версия сбрасывает роли всех пользователей (изменение прав или названий групп)
+ROLES_VERSION_KEY = f'{ROLES_KEY_PREFIX}:version'
+
+
+class Roles:
+    """
+    Группы и права пользователя, вычисленные один раз за запрос.
+    Доступны в представлениях и шаблонах как request.roles.
+    """
+
+    def __init__(self, groups=(), permissions=(), is_superuser=False):
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+        self.is_superuser = is_superuser
+
+    @property
+    def is_moderator(self):
+        return settings.MODERATOR_GROUP_NAME in self.groups
+
+    @property
+    def is_editor(self):
+        return settings.EDITOR_GROUP_NAME in self.groups
+
+    def has_group(self, group_name):
+        return group_name in self.groups
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.permissions
+
+    def has_perms(self, perms):
+        return all(self.has_perm(perm) for perm in perms)
+
+
+ANONYMOUS_ROLES = Roles()
+
+
+def roles_key(user_id):
+    return f'{ROLES_KEY_PREFIX}:{user_id}'
+
+
+def get_roles(user):
+    """
+    Возвращает роли пользователя. Результат запоминается на объекте пользователя
+    (на время запроса) и в общем кэше (до изменения групп или прав).
+    """
+    if not user.is_authenticated:
+        return ANONYMOUS_ROLES
+    roles = getattr(user, '_roles_cache', None)
+    if roles is not None:
+        return roles
+
+    key = roles_key(user.pk)
+    cached = cache.get_many([key, ROLES_VERSION_KEY])
+    version = cached.get(ROLES_VERSION_KEY, 0)
+    entry = cached.get(key)
+    cache_event(hit=entry is not None and entry[0] == version)
+    if entry is not None and entry[0] == version:
+        roles = entry[1]
+    else:
+        roles = Roles(
+            groups=user.groups.values_list('name', flat=True),
+            permissions=user.get_all_permissions(),
+            is_superuser=user.is_superuser,
+        )
+        cache.set(key, (version, roles), ROLES_CACHE_TIMEOUT)
+        logger.debug('Роли пользователя %s вычислены: %s', user.username, sorted(roles.groups))
+    user._roles_cache = roles
+    return roles
+
+
+def invalidate_roles(user_ids):
+    cache.delete_many([roles_key(pk) for pk in user_ids])
+
+
+def invalidate_all_roles():
+    try:
+        cache.incr(ROLES_VERSION_KEY)
+    except ValueError:
+        cache.set(ROLES_VERSION_KEY, time.time_ns(), timeout=None)
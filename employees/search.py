@@ -0,0 +1,90 @@
+"""
+Нечеткий поиск сотрудников по ФИО.
+
+Поиск идет по Employee.search_key — ФИО в нижнем регистре с заменой «ё» на «е».
+В PostgreSQL используется расширение pg_trgm и GIN-индекс по search_key:
+сходство по триграммам находит опечатки и части слов, результаты ранжируются
+по сходству. В остальных СУБД (SQLite для локальной проверки) выбираются строки,
+содержащие все слова запроса, и ранжируются по доле совпавшей длины.
+
+Сходство (поле similarity) — Decimal с шестью знаками: по нему постраничный вывод
+(KeysetPaginator) выбирает следующую страницу, и значение в курсоре должно точно
+совпадать со значением в базе. Для float4 из word_similarity это не так: драйвер
+читает округленную текстовую форму, и строка курсора попадает на следующую страницу.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Case, DecimalField, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Length, Round
+
+# Порог сходства pg_trgm для поиска по словам (по умолчанию в PostgreSQL 0.6)
+WORD_SIMILARITY_THRESHOLD = 0.4
+
+SIMILARITY_FIELD = DecimalField(max_digits=7, decimal_places=6)
+
+_spaces = re.compile(r'\s+')
+
+
+def normalize(text):
+    return _spaces.sub(' ', (text or '').lower().replace('ё', 'е')).strip()
+
+
+def full_name_key(last_name, first_name, middle_name=''):
+    return normalize(' '.join(part for part in (last_name, first_name, middle_name) if part))
+
+
+def search_employees(queryset, query):
+    """Возвращает queryset, отфильтрованный по запросу и упорядоченный по убыванию сходства (поле similarity)."""
+    query = normalize(query)
+    if not query:
+        return queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_trigram(queryset, query)
+    return _search_fallback(queryset, query)
+
+
+def set_word_similarity_threshold(connection):
+    """
+    Задает порог pg_trgm для сессии PostgreSQL. Вызывается для каждого нового
+    соединения (сигнал connection_created): настройка живет столько же, сколько
+    соединение, и не меняет настроек сервера.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT set_config(%s, %s, false)',
+                       ['pg_trgm.word_similarity_threshold', str(WORD_SIMILARITY_THRESHOLD)])
+
+
+def _search_trigram(queryset, query):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # Оператор %> (trigram_word_similar) и LIKE по подстроке обслуживаются GIN-индексом
+    # gin_trgm_ops; порог задан для соединения в set_word_similarity_threshold
+    return (
+        queryset
+        .filter(Q(search_key__trigram_word_similar=query) | Q(search_key__contains=query))
+        .annotate(similarity=Cast(TrigramWordSimilarity(query, 'search_key'), SIMILARITY_FIELD))
+        .order_by('-similarity', 'pk')
+    )
+
+
+def _search_fallback(queryset, query):
+    # Без pg_trgm опечатки не учитываются: строка должна содержать все слова запроса.
+    # Сходство — доля длины ключа, покрытая запросом, с приоритетом строк, которые
+    # начинаются с первого слова запроса (обычно это фамилия)
+    words = query.split(' ')
+    condition = Q()
+    for word in words:
+        condition &= Q(search_key__contains=word)
+    coverage = Value(float(len(query))) / Cast(Length('search_key'), FloatField())
+    starts_with = Case(When(search_key__startswith=words[0], then=Value(1.0)), default=Value(0.0),
+                       output_field=FloatField())
+    return (
+        queryset
+        .filter(condition)
+        # SQLite не округляет при приведении к NUMERIC, поэтому значение округляется явно
+        .annotate(similarity=Cast(Round((starts_with + coverage) / Value(2.0), 6), SIMILARITY_FIELD))
+        .order_by('-similarity', 'pk')
+    )
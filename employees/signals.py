@@ -1,21 +1,50 @@
 import logging
+from functools import partial
 
+from django.contrib.auth.models import Group, User
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from django.core.cache import cache
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from employees.models import TrainingRecord, Employee, TrainingProgram
+from departments.models import Department
+from employees.models import (
+    TrainingRecord, Employee, TrainingProgram, EmployeeProgramStatus, training_records_bulk_changed)
+from employees.previews import schedule_preview
+from employees.roles import invalidate_all_roles, invalidate_roles
+from employees.search import set_word_similarity_threshold
+from positions.models import Position
+from reports.cache import ReportCache
 
 logger = logging.getLogger('employees')
 
+# С какого числа тегов сотрудников и программ в пакете кэш отчета сбрасывается целиком.
+# Версия каждого тега — отдельная запись в кэше в базе (около пяти запросов),
+# а полный сброс — одна запись
+BULK_INVALIDATE_ALL_THRESHOLD = 3
+
 
 @receiver([post_save, post_delete], sender=TrainingRecord)
 @receiver([post_save, post_delete], sender=Employee)
 @receiver([post_save, post_delete], sender=TrainingProgram)
 def invalidate_training_report_cache(sender, instance, **kwargs):
     try:
-        cache.delete('training_report')
+        if sender is TrainingRecord:
+            employee_ids = {instance.employee_id}
+            program_ids = {instance.training_program_id}
+            previous_cell = getattr(instance, '_previous_status_cell', None)
+            if previous_cell:
+                employee_ids.add(previous_cell[0])
+                program_ids.add(previous_cell[1])
+            invalidate = partial(ReportCache.invalidate, employee_ids=employee_ids, program_ids=program_ids)
+        elif sender is Employee:
+            invalidate = partial(ReportCache.invalidate, employee_ids=[instance.pk], roster=True)
+        else:
+            invalidate = partial(ReportCache.invalidate, program_ids=[instance.pk], programs=True)
+        # Версии увеличиваются после фиксации транзакции, чтобы кэш не заполнился старыми данными
+        transaction.on_commit(invalidate)
         logger.debug(
             'Кэш отчета по обучению очищен из-за изменения данных, модель: %s, экземпляр: %s',
             sender.__name__,
@@ -28,6 +57,123 @@ def invalidate_training_report_cache(sender, instance, **kwargs):
             exc_info=True)
 
 
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif pk_set is not None:
+        user_ids = pk_set
+    else:
+        # post_clear со стороны группы или права: состав затронутых пользователей неизвестен
+        invalidate_all_roles()
+        return
+    invalidate_roles(user_ids)
+    logger.debug('Сброшены роли пользователей: %s', sorted(user_ids))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_all_user_roles(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_all_roles()
+        logger.debug('Сброшены роли всех пользователей из-за изменения групп')
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_roles_on_save(sender, instance, created, **kwargs):
+    # Флаг is_superuser влияет на права пользователя
+    if not created:
+        invalidate_roles([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=Position)
+def invalidate_training_report_cache_for_reference(sender, instance, **kwargs):
+    # Названия подразделений и должностей выводятся в каждой строке отчета
+    try:
+        transaction.on_commit(ReportCache.invalidate_all)
+        logger.debug(
+            'Кэш отчета по обучению полностью очищен из-за изменения справочника, модель: %s, экземпляр: %s',
+            sender.__name__,
+            instance)
+    except Exception as e:
+        logger.error(
+            'Ошибка при очистке кэша отчета по обучению, модель: %s, ошибка: %s',
+            sender.__name__,
+            str(e),
+            exc_info=True)
+
+
+@receiver(pre_save, sender=TrainingRecord)
+def remember_training_status_cell(sender, instance, **kwargs):
+    # При редактировании запись может переехать в другую ячейку (сотрудник, программа)
+    instance._previous_status_cell = None
+    if instance.pk:
+        instance._previous_status_cell = TrainingRecord.objects.filter(
+            pk=instance.pk).values_list('employee_id', 'training_program_id').first()
+
+
+@receiver([post_save, post_delete], sender=TrainingRecord)
+def refresh_training_status(sender, instance, **kwargs):
+    # При каскадном удалении сотрудника или программы статусы удаляются каскадом
+    origin = kwargs.get('origin')
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (Employee, TrainingProgram):
+        return
+    cells = {(instance.employee_id, instance.training_program_id)}
+    previous_cell = getattr(instance, '_previous_status_cell', None)
+    if previous_cell:
+        cells.add(previous_cell)
+    for employee_id, training_program_id in cells:
+        EmployeeProgramStatus.refresh(employee_id, training_program_id)
+    logger.debug(
+        'Обновлен статус обучения для ячеек %s, экземпляр: %s', cells, instance)
+
+
+@receiver(training_records_bulk_changed, sender=TrainingRecord)
+def refresh_after_bulk_change(sender, employee_ids, program_ids, **kwargs):
+    # Статусы пересчитываются одним запросом, а кэш отчета очищается один раз на весь пакет
+    EmployeeProgramStatus.rebuild(employee_ids=employee_ids, program_ids=program_ids)
+    if len(employee_ids) + len(program_ids) > BULK_INVALIDATE_ALL_THRESHOLD:
+        invalidate = ReportCache.invalidate_all
+    else:
+        invalidate = partial(ReportCache.invalidate, employee_ids=employee_ids, program_ids=program_ids)
+    transaction.on_commit(invalidate)
+    logger.debug(
+        'Обновлены статусы обучения после массового изменения записей, сотрудников: %d, программ: %d',
+        len(employee_ids), len(program_ids))
+
+
+@receiver(post_save, sender=TrainingRecord)
+def schedule_document_preview(sender, instance, **kwargs):
+    # Превью создается в фоновом потоке после фиксации транзакции: сохранение записи его не ждет
+    if instance.document:
+        transaction.on_commit(partial(schedule_preview, instance.document.name))
+
+
+@receiver(pre_save, sender=TrainingProgram)
+def remember_recurrence_period(sender, instance, **kwargs):
+    instance._previous_recurrence_period = None
+    if instance.pk:
+        instance._previous_recurrence_period = TrainingProgram.objects.filter(
+            pk=instance.pk).values_list('recurrence_period', flat=True).first()
+
+
+@receiver(post_save, sender=TrainingProgram)
+def refresh_training_status_due_dates(sender, instance, created, **kwargs):
+    # Даты пересчитываются только при изменении периодичности, одним UPDATE на таблицу
+    if created or instance.recurrence_period == getattr(instance, '_previous_recurrence_period', None):
+        return
+    records = TrainingRecord.refresh_due_dates(instance)
+    statuses = EmployeeProgramStatus.refresh_due_dates(instance)
+    logger.debug(
+        'Пересчитаны даты следующего прохождения (записей: %d, статусов: %d) для программы: %s',
+        records, statuses, instance)
+
+
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     try:
@@ -78,3 +224,9 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
             username,
             str(e),
             exc_info=True)
+
+
+@receiver(connection_created)
+def configure_trigram_search(sender, connection, **kwargs):
+    # Порог сходства pg_trgm хранится в сессии PostgreSQL и задается при каждом подключении
+    set_word_similarity_threshold(connection)
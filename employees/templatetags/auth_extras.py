@@ -1,5 +1,7 @@
 from django import template
 
+from employees.roles import get_roles
+
 register = template.Library()
 
 @register.filter(name='has_group')
@@ -7,7 +9,6 @@ def has_group(user, group_name):
     """
     Проверяет, входит ли пользователь в указанную группу.
     Использование: {% if user|has_group:"Editors" %} ... {% endif %}
+    Группы берутся из ролей пользователя, вычисленных один раз за запрос.
     """
-    if user.is_authenticated:
-        return user.groups.filter(name=group_name).exists()
-    return False
+    return get_roles(user).has_group(group_name)
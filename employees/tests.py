@@ -1,3 +1,493 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from employees import previews
+from employees.documents import document_storage, parse_range
+from employees.pagination import CURSOR_SALT, CursorSerializer, KeysetPaginator
+from employees.search import WORD_SIMILARITY_THRESHOLD, full_name_key, search_employees
+from employees.views import EmployeeSearchView
+from departments.models import Department
+from employees.models import Employee, EmployeeProgramStatus, TrainingRecord, calculate_due_date
+from reports.cache import ReportCache
+from trainings.models import TrainingProgram
+
+
+class TemporaryMediaMixin:
+    @classmethod
+    def setUpClass(cls):
+        # Файлы создаются уже в setUpTestData, поэтому MEDIA_ROOT подменяется раньше
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+
+class DocumentStorageTest(TemporaryMediaMixin, TestCase):
+    CONTENT = bytes(range(256)) * 40
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('documents', password='password')
+        program = TrainingProgram.objects.create(name='Охрана труда')
+        cls.records = [
+            TrainingRecord.objects.create(
+                employee=Employee.objects.create(last_name=f'Сотрудник{index}', first_name='Иван'),
+                training_program=program,
+                completion_date=date(2024, 1, 10),
+                document=SimpleUploadedFile(f'Скан {index}.PDF', cls.CONTENT))
+            for index in range(2)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('employees:training_record_document', kwargs={'pk': self.records[0].pk})
+
+    def test_identical_uploads_share_one_file(self):
+        digest = hashlib.sha256(self.CONTENT).hexdigest()
+        first, second = (record.document for record in self.records)
+        self.assertEqual(first.name, f'training_documents/{digest[:2]}/{digest}.pdf')
+        self.assertEqual(first.name, second.name)
+        storage = first.storage
+        self.assertEqual(storage.listdir(f'training_documents/{digest[:2]}'), ([], [f'{digest}.pdf']))
+        self.assertNotEqual(storage.save('training_documents/other.pdf', ContentFile(b'other')), first.name)
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(response['Content-Length']), len(self.CONTENT))
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertIn('filename', response['Content-Disposition'])
+
+        not_modified = self.client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_range_download(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=100-299'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[100:300])
+
+        suffix = self.client.get(self.url, headers={'Range': 'bytes=-10'})
+        self.assertEqual(b''.join(suffix.streaming_content), self.CONTENT[-10:])
+
+        stale = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+
+        outside = self.client.get(self.url, headers={'Range': f'bytes={len(self.CONTENT)}-'})
+        self.assertEqual(outside.status_code, 416)
+        self.assertEqual(outside['Content-Range'], f'bytes */{len(self.CONTENT)}')
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertEqual(parse_range('bytes=-20', 10), (0, 9))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 10))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=7-3', 10)
+
+    @override_settings(DOCUMENT_SENDFILE='nginx', DOCUMENT_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.records[0].document.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+class DocumentPreviewTest(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('previews', password='password')
+        cls.employee = Employee.objects.create(last_name='Сотрудник', first_name='Иван')
+        cls.program = TrainingProgram.objects.create(name='Охрана труда')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_record(self, filename, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return TrainingRecord.objects.create(
+                employee=self.employee, training_program=self.program, completion_date=date(2024, 1, 10),
+                document=SimpleUploadedFile(filename, content))
+
+    def preview_url(self, record):
+        return reverse('employees:training_record_preview', kwargs={'pk': record.pk})
+
+    def test_unsupported_document_has_no_preview(self):
+        record = self.create_record('Скан.docx', b'not an image')
+        self.assertIsNone(previews.schedule_preview(record.document.name))
+        self.assertEqual(self.client.get(self.preview_url(record)).status_code, 404)
+
+    @unittest.skipUnless(previews.Image, 'Pillow не установлен')
+    def test_preview_generated_in_background(self):
+        image = BytesIO()
+        previews.Image.new('RGB', (1200, 900), 'white').save(image, 'PNG')
+        record = self.create_record('Скан.png', image.getvalue())
+        # Задача уже поставлена сигналом; повторный вызов возвращает ее же или None, если превью готово
+        future = previews.schedule_preview(record.document.name)
+        if future is not None:
+            future.result(timeout=10)
+
+        name = previews.preview_name(record.document.name)
+        self.assertTrue(document_storage().exists(name))
+        response = self.client.get(self.preview_url(record))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        with previews.Image.open(BytesIO(b''.join(response.streaming_content))) as preview:
+            self.assertEqual(max(preview.size), 320)
+
+
+class BulkTrainingRecordTest(TestCase):
+    GROUP_SIZE = 80
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('bulk', password='password')
+        cls.department = Department.objects.create(name='Учебный отдел')
+        cls.program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+        cls.employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index}', first_name='Иван', department=cls.department,
+                     search_key=f'сотрудник{index} иван')
+            for index in range(cls.GROUP_SIZE))
+        cls.completion_date = date(2024, 3, 1)
+        TrainingRecord.objects.create(
+            employee=cls.employees[0], training_program=cls.program, completion_date=cls.completion_date)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def statements(queries, verb, table='"employees_trainingrecord"'):
+        return [query['sql'] for query in queries if query['sql'].startswith(verb) and table in query['sql']]
+
+    def test_bulk_create_single_insert_and_invalidation(self):
+        with mock.patch.object(ReportCache, 'invalidate_all') as invalidate_all, \
+                mock.patch.object(ReportCache, 'invalidate') as invalidate, \
+                CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('employees:training_record_bulk_create'), {
+                'training_program': self.program.pk,
+                'completion_date': self.completion_date.isoformat(),
+                'department': self.department.pk,
+            })
+        inserts = self.statements(queries.captured_queries, 'INSERT')
+        self.assertEqual(len(inserts), 1)
+        self.assertRedirects(response, reverse('employees:training_record_bulk_create'))
+        self.assertEqual(invalidate_all.call_count + invalidate.call_count, 1)
+
+        records = TrainingRecord.objects.filter(training_program=self.program, completion_date=self.completion_date)
+        self.assertEqual(records.count(), self.GROUP_SIZE)
+        self.assertEqual(set(records.values_list('next_due_date', flat=True)), {date(2027, 3, 1)})
+        self.assertEqual(EmployeeProgramStatus.objects.filter(training_program=self.program).count(), self.GROUP_SIZE)
+
+    def test_bulk_create_small_batch_invalidates_selected_employees(self):
+        selected = [employee.pk for employee in self.employees[:3]]
+        with mock.patch.object(ReportCache, 'invalidate') as invalidate, self.captureOnCommitCallbacks(execute=True):
+            added = TrainingRecord.bulk_add(selected, self.program, self.completion_date)
+        self.assertEqual(added, selected[1:])
+        invalidate.assert_called_once_with(employee_ids=selected[1:], program_ids=[self.program.pk])
+
+    def test_bulk_create_requires_employees(self):
+        response = self.client.post(reverse('employees:training_record_bulk_create'), {
+            'training_program': self.program.pk,
+            'completion_date': self.completion_date.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+
+    def test_bulk_verify_single_update(self):
+        TrainingRecord.bulk_add([employee.pk for employee in self.employees], self.program, date(2024, 4, 1))
+        records = TrainingRecord.objects.filter(employee=self.employees[0])
+        with mock.patch.object(ReportCache, 'invalidate') as invalidate, \
+                CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('employees:training_record_bulk_verify'), {
+                'records': [record.pk for record in records],
+                'employee_pk': self.employees[0].pk,
+            })
+        updates = self.statements(queries.captured_queries, 'UPDATE')
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, reverse('employees:employee_trainings', kwargs={'pk': self.employees[0].pk}))
+        invalidate.assert_called_once_with(employee_ids=[self.employees[0].pk], program_ids=[self.program.pk])
+        self.assertFalse(records.filter(is_verified=False).exists())
+        status = EmployeeProgramStatus.objects.get(employee=self.employees[0], training_program=self.program)
+        self.assertTrue(status.is_verified)
+
+
+class ImportExcelTest(TestCase):
+    COLUMNS = pd.MultiIndex.from_tuples([
+        ('Фамилия', '', ''), ('Имя', '', ''), ('Отчество', '', ''), ('ДОЛЖНОСТЬ', '', ''),
+        ('СТРУКТУРНОЕ ПОДРАЗДЕЛЕНИЕ', '', ''), ('Примечание', '', ''),
+        ('Охрана труда', 'Дата прохождения обучения', ''),
+        ('Электробезопасность', 'Дата прохождения обучения', ''),
+    ])
+    ROWS = [
+        ('Иванов', 'Иван', 'Иванович', 'Преподаватель', 'Учебная часть', '', '10.01.2024', 'II группа, 15.02.2023'),
+        ('Петров', 'Петр', None, 'Руководитель', 'Учебная часть', '', '01.03.2024', None),
+        # Повтор строки: остается запись из первой
+        ('Иванов', 'Иван', 'Иванович', 'Преподаватель', 'Учебная часть', '', None, 'III группа, 15.02.2023'),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+        employee = Employee.objects.create(last_name='Иванов', first_name='Иван', middle_name='Иванович')
+        TrainingRecord.objects.create(
+            employee=employee, training_program=program, completion_date=date(2024, 1, 10), details='Из базы')
+
+    def import_rows(self, *args):
+        """Данные после импорта; изменения откатываются, чтобы режимы начинали с одной базы."""
+        frame = pd.DataFrame(self.ROWS, columns=self.COLUMNS)
+        with transaction.atomic():
+            with mock.patch('employees.management.commands.import_excel.pd.read_excel', return_value=frame):
+                call_command('import_excel', '--file', __file__, *args)
+            records = sorted(TrainingRecord.objects.values_list(
+                'employee__last_name', 'training_program__name', 'completion_date', 'next_due_date', 'details'))
+            employees = sorted(Employee.objects.values_list(
+                'last_name', 'middle_name', 'department__name', 'position__name', 'search_key'))
+            transaction.set_rollback(True)
+        return records, employees
+
+    def test_bulk_mode_matches_per_row_mode(self):
+        per_row = self.import_rows()
+        self.assertEqual(per_row, self.import_rows('--bulk'))
+        records, _ = per_row
+        # Существующая запись не перезаписана
+        self.assertEqual(records, [
+            ('Иванов', 'Охрана труда', date(2024, 1, 10), calculate_due_date(date(2024, 1, 10), 3), 'Из базы'),
+            ('Иванов', 'Электробезопасность', date(2023, 2, 15), None, 'II группа'),
+            ('Петров', 'Охрана труда', date(2024, 3, 1), calculate_due_date(date(2024, 3, 1), 3), ''),
+        ])
+
+
+class KeysetPaginatorTest(TestCase):
+    PER_PAGE = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pages', password='password')
+        # Повторяющиеся фамилии и имена: порядок внутри них определяет только первичный ключ
+        Employee.objects.bulk_create(
+            Employee(last_name=f'Фамилия{index % 4}', first_name=f'Имя{index % 3}', middle_name='Петрович',
+                     search_key=f'фамилия{index % 4} имя{index % 3} петрович')
+            for index in range(30))
+
+    def traverse(self, queryset):
+        """Строки при переходе вперед до конца и затем назад до начала."""
+        paginator = KeysetPaginator(queryset, self.PER_PAGE)
+        page = paginator.page()
+        self.assertFalse(page.has_previous())
+        forward = [page.object_list]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            forward.append(page.object_list)
+        backward = [page.object_list]
+        while page.has_previous():
+            page = paginator.page(page.previous_cursor)
+            backward.append(page.object_list)
+        backward.reverse()
+        return [[row.pk for row in rows] for rows in forward], [[row.pk for row in rows] for rows in backward]
+
+    def test_traversal_without_duplicates(self):
+        for ordering in (['last_name', 'first_name'], ['-last_name', '-first_name'], ['last_name', '-first_name']):
+            with self.subTest(ordering=ordering):
+                queryset = Employee.objects.order_by(*ordering)
+                expected = list(queryset.order_by(*ordering, '-pk' if ordering[-1].startswith('-') else 'pk')
+                                .values_list('pk', flat=True))
+                forward, backward = self.traverse(queryset)
+                self.assertEqual(sum(forward, []), expected)
+                self.assertEqual(backward, forward)
+                self.assertTrue(all(len(rows) == self.PER_PAGE for rows in forward[:-1]))
+
+    def test_search_traversal_without_duplicates(self):
+        # Совпадающее неточное сходство (2/3) у целых страниц: курсор должен хранить точное значение
+        Employee.objects.bulk_create(
+            Employee(last_name='Тестова', first_name='Анна', middle_name=middle_name,
+                     search_key=f'тестова анна {middle_name.lower()}')
+            for middle_name in ['Петровна'] * 16 + ['Ивановна', 'Ильинична'])
+        queryset = search_employees(Employee.objects.all(), 'Тестова')
+        expected = list(queryset.values_list('pk', flat=True))
+        self.assertEqual(len(expected), 18)
+        self.assertIsInstance(queryset[0].similarity, Decimal)
+        forward, backward = self.traverse(queryset)
+        self.assertEqual(sum(forward, []), expected)
+        self.assertEqual(backward, forward)
+
+    def test_tampered_cursor_rejected(self):
+        paginator = KeysetPaginator(Employee.objects.order_by('last_name'), self.PER_PAGE)
+        first_page = [row.pk for row in paginator.page()]
+        cursor = paginator.page().next_cursor
+        forged = signing.dumps({'k': ['Фамилия3', 0], 'd': 'n'}, salt='другая соль')
+        # Подпись верна, но ключ не соответствует сортировке
+        wrong_key = signing.dumps({'k': ['Фамилия3'], 'd': 'n'}, salt=CURSOR_SALT, serializer=CursorSerializer)
+        for bad_cursor in (cursor[:-2] + 'xx', forged, wrong_key, 'мусор'):
+            with self.subTest(cursor=bad_cursor), self.assertLogs('employees', 'WARNING'):
+                self.assertEqual([row.pk for row in paginator.page(bad_cursor)], first_page)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('employees:employee_list'), {'cursor': cursor[:-2] + 'xx'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+
+class EmployeeSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = [
+            Employee.objects.create(last_name=last_name, first_name=first_name, middle_name='Петрович')
+            for last_name, first_name in (('Иванов', 'Иван'), ('Иванова', 'Анна'), ('Сидоров', 'Семен'))
+        ]
+
+    def test_search_ranks_best_match_first(self):
+        results = list(search_employees(Employee.objects.all(), 'Иванов  Иван'))
+        self.assertEqual(results[0], self.employees[0])
+        self.assertNotIn(self.employees[2], results)
+
+    def test_migration_matches_model(self):
+        employee = Employee.objects.create(last_name=' Ёлкин ', first_name='Фёдор', middle_name='')
+        Employee.objects.update(search_key='')
+        migration = importlib.import_module('employees.migrations.0008_employee_search_key')
+        migration.populate_search_keys(apps, None)
+        employee.refresh_from_db()
+        self.assertEqual(employee.search_key, 'елкин федор')
+        self.assertEqual(employee.search_key, full_name_key(employee.last_name, employee.first_name))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'pg_trgm есть только в PostgreSQL')
+    def test_trigram_search_on_postgresql(self):
+        # Порог задан сигналом connection_created для соединения тестов
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW pg_trgm.word_similarity_threshold')
+            self.assertEqual(float(cursor.fetchone()[0]), WORD_SIMILARITY_THRESHOLD)
+        # Опечатка находится только сходством по триграммам
+        results = list(search_employees(Employee.objects.all(), 'иваноф иван'))
+        self.assertEqual(results[0], self.employees[0])
+        self.assertGreater(results[0].similarity, results[-1].similarity)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = search_employees(Employee.objects.all(), 'иваноф').explain()
+        self.assertIn('employees_employee_search_key_trgm', plan)
+
+
+class NextDueDateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+        cls.employee = Employee.objects.create(last_name='Сотрудник', first_name='Иван')
+        cls.record = TrainingRecord.objects.create(
+            employee=cls.employee, training_program=cls.program, completion_date=date(2024, 1, 10))
+        EmployeeProgramStatus.rebuild()
+
+    def due_dates(self):
+        self.record.refresh_from_db()
+        status = EmployeeProgramStatus.objects.get(employee=self.employee, training_program=self.program)
+        return self.record.next_due_date, status.due_date
+
+    def test_save_sets_next_due_date(self):
+        due_date = calculate_due_date(date(2024, 1, 10), 3)
+        self.assertEqual(self.due_dates(), (due_date, due_date))
+        self.record.completion_date = date(2024, 6, 1)
+        self.record.save(update_fields=['completion_date'])
+        self.record.refresh_from_db()
+        self.assertEqual(self.record.next_due_date, calculate_due_date(date(2024, 6, 1), 3))
+
+    def test_recurrence_change_refreshes_due_dates(self):
+        self.program.recurrence_period = 1
+        with self.assertNumQueries(4):
+            # pre_save читает прежнюю периодичность, затем UPDATE программы, записей и статусов
+            self.program.save()
+        due_date = calculate_due_date(date(2024, 1, 10), 1)
+        self.assertEqual(self.due_dates(), (due_date, due_date))
+
+        self.program.recurrence_period = None
+        self.program.save()
+        self.assertEqual(self.due_dates(), (None, None))
+
+    def test_migration_matches_model(self):
+        TrainingRecord.objects.update(next_due_date=None)
+        migration = importlib.import_module('employees.migrations.0009_trainingrecord_next_due_date')
+        migration.populate_next_due_dates(apps, None)
+        self.record.refresh_from_db()
+        self.assertEqual(self.record.next_due_date, calculate_due_date(self.record.completion_date, 3))
+
+
+class EmployeeSearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('picker', password='password')
+        department = Department.objects.create(name='Учебная часть')
+        # Сотрудников с фамилией на «сидоров» больше limit, на «иванов» — меньше
+        for index in range(EmployeeSearchView.limit + 5):
+            Employee.objects.create(last_name=f'Сидоров{index:02}', first_name='Иван', department=department)
+        for first_name in ('Анна', 'Борис', 'Вера'):
+            Employee.objects.create(last_name='Иванов', first_name=first_name)
+
+    def setUp(self):
+        caches[EmployeeSearchView.cache_alias].clear()
+        self.view = EmployeeSearchView()
+
+    def names(self, results):
+        return [item['name'] for item in results]
+
+    def test_truncated_results_not_reused_for_longer_prefix(self):
+        with self.assertNumQueries(1):
+            results = self.view.search('сидоров', generation=0)
+        self.assertEqual(len(results), EmployeeSearchView.limit)
+        self.assertNotIn('Сидоров24 Иван', self.names(results))
+        # Обрезанный список не содержит всех совпадений, поэтому нужен запрос к базе
+        with self.assertNumQueries(1):
+            results = self.view.search('сидоров2', generation=0)
+        self.assertEqual(self.names(results), [f'Сидоров2{index} Иван' for index in range(5)])
+
+    def test_longer_prefix_served_from_complete_shorter_prefix(self):
+        with self.assertNumQueries(1):
+            self.view.search('иван', generation=0)
+        with self.assertNumQueries(0):
+            results = self.view.search('иванов б', generation=0)
+        self.assertEqual(self.names(results), ['Иванов Борис'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.view.search('иванов б', generation=0), results)
+        # Новое поколение данных — новые ключи кэша
+        with self.assertNumQueries(1):
+            self.view.search('иванов б', generation=1)
+
+    def test_json_response(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('employees:employee_search'), {'q': ' Сидоров01 '})
+        self.assertEqual(response.json()['results'], [{
+            'id': Employee.objects.get(last_name='Сидоров01').pk,
+            'name': 'Сидоров01 Иван',
+            'department': 'Учебная часть',
+        }])
+        self.assertEqual(self.client.get(reverse('employees:employee_search')).json(), {'results': []})
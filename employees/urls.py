@@ -6,14 +6,19 @@ app_name = 'employees'
 
 urlpatterns = [
     path('', views.EmployeeListView.as_view(), name='employee_list'),
+    path('search/', views.EmployeeSearchView.as_view(), name='employee_search'),
     path('create/', views.EmployeeCreateView.as_view(), name='employee_create'),
     path('<int:pk>/edit/', views.EmployeeUpdateView.as_view(), name='employee_edit'),
     path('<int:pk>/delete/', views.EmployeeDeleteView.as_view(), name='employee_delete'),
     path('<int:pk>/trainings/', views.EmployeeTrainingsView.as_view(), name='employee_trainings'),
 
     path('training-records/create/<int:employee_pk>/', views.TrainingRecordCreateView.as_view(), name='training_record_create'),
+    path('training-records/bulk/', views.TrainingRecordBulkCreateView.as_view(), name='training_record_bulk_create'),
+    path('training-records/verify/', views.TrainingRecordBulkVerifyView.as_view(), name='training_record_bulk_verify'),
     path('training-records/<int:pk>/edit/', views.TrainingRecordUpdateView.as_view(), name='training_record_edit'),
     path('training-records/<int:pk>/delete/', views.TrainingRecordDeleteView.as_view(), name='training_record_delete'),
+    path('training-records/<int:pk>/document/', views.TrainingRecordDocumentView.as_view(), name='training_record_document'),
+    path('training-records/<int:pk>/preview/', views.TrainingRecordPreviewView.as_view(), name='training_record_preview'),
 
     path('password-change/', views.PasswordChangeCustomView.as_view(), name='password_change'),
     path('password-change/done/', views.PasswordChangeDoneCustomView.as_view(), name='password_change_done'),
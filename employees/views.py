@@ -1,19 +1,29 @@
+import hashlib
 import logging
+import os
 from datetime import datetime
 from functools import wraps
 
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.views import PasswordChangeDoneView, PasswordChangeView
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView
+from django.views import View
+from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView, FormView
 
 from employees.models import DeletionRequest
-from .forms import EmployeeForm, TrainingRecordForm
+from monitoring.metrics import set_action
+from reports.conditional import ConditionalGetMixin, data_version
+from .documents import document_response, document_storage
+from .forms import BulkTrainingRecordForm, EmployeeForm, TrainingRecordForm
+from .pagination import KeysetPaginationMixin
+from .previews import preview_name, schedule_preview
+from .search import normalize, search_employees
 from .models import Employee, TrainingRecord
 
 # Настройка логгера
@@ -26,6 +36,8 @@ def log_view_action(action, model_name):
         @wraps(view_func)
         def wrapper(view, request, *args, **kwargs):
             user = request.user.username if request.user.is_authenticated else 'Anonymous'
+            # Метрики запроса группируются по тем же названиям действий, что и в журнале
+            set_action(f'{action} {model_name}')
             logger.info(
                 '%s %s пользователем: %s, метод: %s, путь: %s, параметры: %s',
                 action,
@@ -53,6 +65,8 @@ def log_view_action(action, model_name):
 
 
 class EditorModeratedDeleteView(PermissionRequiredMixin, DeleteView):
+    query_budget = 16
+
     def get(self, request, *args, **kwargs):
         obj = self.get_object()
         user = request.user
@@ -75,11 +89,11 @@ class EditorModeratedDeleteView(PermissionRequiredMixin, DeleteView):
             return redirect(self.success_url)
 
         # Если пользователь в группе Moderators, он может удалять напрямую
-        if user.groups.filter(name='Moderators').exists():
+        if request.roles.is_moderator:
             return super().get(request, *args, **kwargs)
 
         # Если пользователь в группе Editors, создаем запрос на удаление
-        if user.groups.filter(name='Editors').exists():
+        if request.roles.is_editor:
             DeletionRequest.objects.create(
                 content_type=content_type,
                 object_id=obj.pk,
@@ -105,7 +119,7 @@ class EditorModeratedDeleteView(PermissionRequiredMixin, DeleteView):
         user = request.user
 
         # Только Moderators могут подтверждать удаление
-        if user.groups.filter(name='Moderators').exists():
+        if request.roles.is_moderator:
             content_type = ContentType.objects.get_for_model(self.model)
             deletion_request = DeletionRequest.objects.filter(
                 content_type=content_type,
@@ -141,19 +155,22 @@ class EditorModeratedDeleteView(PermissionRequiredMixin, DeleteView):
         return redirect(self.success_url)
 
 
-class DeletionRequestListView(LoginRequiredMixin, ListView):
+class DeletionRequestListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = DeletionRequest
     template_name = 'deletion_requests.html'
     context_object_name = 'deletion_requests'
     paginate_by = 20
+    query_budget = 14
 
     def get_queryset(self):
+        # Удаляемые объекты загружаются одним запросом на каждый тип, а не по одному на строку
         return DeletionRequest.objects.filter(
-            status=DeletionRequest.STATUS_PENDING).select_related('created_by', 'reviewed_by')
+            status=DeletionRequest.STATUS_PENDING).select_related(
+            'created_by', 'reviewed_by').prefetch_related('content_object').order_by('-created_at')
 
     @log_view_action('Запрошен список', 'запросов на удаление')
     def get(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name='Moderators').exists():
+        if not request.roles.is_moderator:
             messages.error(
                 request,
                 'Только пользователи группы Moderators могут просматривать запросы на удаление.')
@@ -167,10 +184,11 @@ class DeletionRequestListView(LoginRequiredMixin, ListView):
 class DeletionRequestConfirmView(LoginRequiredMixin, TemplateView):
     template_name = 'deletion_request_confirm.html'
     success_url = reverse_lazy('employees:deletion_request_list')
+    query_budget = 14
 
     def get_object(self):
         try:
-            return DeletionRequest.objects.get(pk=self.kwargs['pk'])
+            return DeletionRequest.objects.select_related('created_by').get(pk=self.kwargs['pk'])
         except DeletionRequest.DoesNotExist:
             messages.error(self.request, 'Запрос на удаление не найден.')
             logger.warning('Запрос на удаление #%s не найден.', self.kwargs['pk'])
@@ -186,7 +204,7 @@ class DeletionRequestConfirmView(LoginRequiredMixin, TemplateView):
         if not deletion_request:
             return self.redirect_to_success()
 
-        if not request.user.groups.filter(name='Moderators').exists():
+        if not request.roles.is_moderator:
             messages.error(request, 'Только модераторы могут обрабатывать запросы на удаление.')
             logger.warning('Отказано в обработке запроса на удаление #%s пользователю: %s',
                            deletion_request.pk, request.user.username)
@@ -229,24 +247,33 @@ class DeletionRequestConfirmView(LoginRequiredMixin, TemplateView):
 
 class IndexView(TemplateView):
     template_name = 'index.html'
+    query_budget = 12
 
     @log_view_action('Открыта', 'главная страница')
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
 
-class EmployeeListView(LoginRequiredMixin, ListView):
+class EmployeeListView(LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = Employee
     template_name = 'employees/employee_list.html'
     context_object_name = 'employees'
     paginate_by = 20
+    count_mode = 'estimated'
+    query_budget = 14
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        # Поиск по фамилии
+        # Должность и подразделение выводятся в каждой строке списка
+        queryset = super().get_queryset().select_related('position', 'department')
+        # Поиск по фамилии: ключ поиска начинается с фамилии в нижнем регистре
         search_last_name = self.request.GET.get('search_last_name', '').strip()
         if search_last_name:
-            queryset = queryset.filter(last_name__istartswith=search_last_name)
+            queryset = queryset.filter(search_key__startswith=normalize(search_last_name))
+
+        # Нечеткий поиск по ФИО: результаты упорядочены по сходству, сортировка не применяется
+        search = self.request.GET.get('search', '').strip()
+        if search:
+            return search_employees(queryset, search)
 
         # Сортировка
         sort_by = self.request.GET.get('sort_by', 'last_name')
@@ -262,6 +289,7 @@ class EmployeeListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_last_name'] = self.request.GET.get('search_last_name', '')
+        context['search'] = self.request.GET.get('search', '')
         context['sort_by'] = self.request.GET.get('sort_by', 'last_name')
         context['sort_order'] = self.request.GET.get('sort_order', 'asc')
         return context
@@ -271,6 +299,65 @@ class EmployeeListView(LoginRequiredMixin, ListView):
         return super().get(request, *args, **kwargs)
 
 
+class EmployeeSearchView(LoginRequiredMixin, View):
+    """
+    Подсказки для выбора сотрудников в фильтре отчетов: не более limit сотрудников,
+    ФИО которых начинается с введенного текста, в JSON. Поиск идет по префиксу
+    индексированного ключа search_key. Результаты кэшируются по префиксу в локальном
+    кэше процесса; ключ включает поколение данных, поэтому изменения сотрудников
+    сразу видны. Если для более короткого префикса в кэше уже полный список,
+    результат получается из него без запроса к базе.
+    """
+    limit = 20
+    cache_alias = 'local'
+    cache_timeout = 60 * 15
+    query_budget = 12
+
+    def get(self, request, *args, **kwargs):
+        set_action('Поиск сотрудников для фильтра')
+        prefix = normalize(request.GET.get('q', ''))
+        results = self.search(prefix, data_version(request)[0]) if prefix else []
+        return JsonResponse({'results': [
+            {'id': item['id'], 'name': item['name'], 'department': item['department']} for item in results
+        ]})
+
+    def cache_key(self, generation, prefix):
+        return f'employee_search:{generation}:{hashlib.sha1(prefix.encode()).hexdigest()}'
+
+    def search(self, prefix, generation):
+        cache = caches[self.cache_alias]
+        keys = [self.cache_key(generation, prefix[:length]) for length in range(len(prefix), 0, -1)]
+        cached = cache.get_many(keys)
+        for key in keys:
+            if key not in cached:
+                continue
+            results, complete = cached[key]
+            if key == keys[0]:
+                return results
+            if complete:
+                results = [item for item in results if item['key'].startswith(prefix)]
+                cache.set(keys[0], (results, True), self.cache_timeout)
+                return results
+
+        rows = list(
+            Employee.objects.filter(search_key__startswith=prefix)
+            .order_by('search_key', 'pk')
+            .values('pk', 'search_key', 'last_name', 'first_name', 'middle_name', 'department__name')
+            [:self.limit + 1])
+        results = [
+            {
+                'id': row['pk'],
+                'key': row['search_key'],
+                'name': ' '.join(filter(None, (row['last_name'], row['first_name'], row['middle_name']))),
+                'department': row['department__name'],
+            }
+            for row in rows[:self.limit]
+        ]
+        # Полный список (не обрезанный limit) годится и для всех более длинных префиксов
+        cache.set(keys[0], (results, len(rows) <= self.limit), self.cache_timeout)
+        return results
+
+
 class EmployeeCreateView(
     LoginRequiredMixin,
     PermissionRequiredMixin,
@@ -280,6 +367,7 @@ class EmployeeCreateView(
     template_name = 'employees/employee_form.html'
     success_url = reverse_lazy('employees:employee_list')
     permission_required = 'employees.add_employee'
+    query_budget = 14
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -313,6 +401,7 @@ class EmployeeUpdateView(
     template_name = 'employees/employee_form.html'
     success_url = reverse_lazy('employees:employee_list')
     permission_required = 'employees.change_employee'
+    query_budget = 15
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -341,9 +430,10 @@ class EmployeeDeleteView(LoginRequiredMixin, DeleteView):
     model = Employee
     template_name = 'employees/employee_confirm_delete.html'
     success_url = reverse_lazy('employees:employee_list')
+    query_budget = 15
 
     def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name='Editors').exists():
+        if not request.roles.is_editor:
             logger.warning(f"Попытка удаления сотрудника {self.get_object()} пользователем {request.user} без прав Editors")
             messages.error(request, 'У вас нет прав для инициирования удаления.')
             return redirect('employees:employee_list')
@@ -394,9 +484,9 @@ class EmployeeDeleteConfirmView(EditorModeratedDeleteView):
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
         user = request.user.username
-        if request.user.groups.filter(name=settings.MODERATOR_GROUP_NAME).exists():
+        if request.roles.is_moderator:
             logger.info(
-                'Подтверждено удаление сотрудника: %s пользователем из группы MTO: %s',
+                'Подтверждено удаление сотрудника: %s пользователем из группы Moderators: %s',
                 obj,
                 user)
             return super(
@@ -408,7 +498,7 @@ class EmployeeDeleteConfirmView(EditorModeratedDeleteView):
                 **kwargs)
         messages.error(
             request,
-            'Только пользователь из группы MTO может подтвердить удаление.')
+            'Только пользователь из группы Moderators может подтвердить удаление.')
         logger.warning(
             'Отказано в подтверждении удаления сотрудника: %s пользователем: %s',
             obj,
@@ -420,6 +510,7 @@ class EmployeeTrainingsView(LoginRequiredMixin, TemplateView):
     template_name = 'employees/employee_trainings.html'
     context_object_name = 'training_records'
     permission_required = 'employees.view_employee'
+    query_budget = 15
 
     def get_context_data(self, **kwargs):
         logger.debug(
@@ -429,7 +520,7 @@ class EmployeeTrainingsView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         employee = get_object_or_404(Employee, pk=self.kwargs['pk'])
         context['employee'] = employee
-        trainings = employee.trainingrecord_set.all()
+        trainings = employee.trainingrecord_set.select_related('training_program')
         context['training_records'] = trainings
         logger.debug(
             "Найдено %d записей об обучении для сотрудника %s",
@@ -450,6 +541,7 @@ class TrainingRecordCreateView(
     form_class = TrainingRecordForm
     template_name = 'trainings/training_record_form.html'
     permission_required = 'employees.add_trainingrecord'
+    query_budget = 14
 
     def get_employee(self):
         employee_pk = self.kwargs.get(
@@ -502,6 +594,7 @@ class TrainingRecordUpdateView(LoginRequiredMixin, PermissionRequiredMixin, Upda
     form_class = TrainingRecordForm
     template_name = 'trainings/training_record_form.html'
     permission_required = 'employees.change_trainingrecord'
+    query_budget = 16
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -532,11 +625,78 @@ class TrainingRecordUpdateView(LoginRequiredMixin, PermissionRequiredMixin, Upda
         return super().form_invalid(form)
 
 
+class TrainingRecordBulkCreateView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """Записи об обучении одной программы с одной датой для многих сотрудников сразу."""
+    form_class = BulkTrainingRecordForm
+    template_name = 'trainings/training_record_bulk_form.html'
+    permission_required = 'employees.add_trainingrecord'
+    success_url = reverse_lazy('employees:training_record_bulk_create')
+    # Включая очистку кэша отчета после фиксации транзакции (см. BULK_INVALIDATE_ALL_THRESHOLD)
+    query_budget = 36
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # После ошибки в форме выбранные сотрудники снова показываются в поле с подсказками
+        selected = [str(pk) for pk in context['form']['employees'].value() or []]
+        context['selected_employee_list'] = Employee.objects.filter(
+            pk__in=[pk for pk in selected if pk.isdigit()]).order_by('last_name', 'first_name')
+        return context
+
+    @log_view_action('Открыта форма массового добавления записей об', 'обучении')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        data = form.cleaned_data
+        added = TrainingRecord.bulk_add(
+            data['employee_ids'], data['training_program'], data['completion_date'],
+            details=data['details'] or None, is_verified=data['is_verified'])
+        skipped = len(data['employee_ids']) - len(added)
+        message = f'Добавлено записей об обучении: {len(added)}'
+        if skipped:
+            message += f', уже были внесены ранее: {skipped}'
+        messages.success(self.request, message)
+        logger.info(
+            'Массово добавлены записи об обучении по программе %s от %s: %d (пропущено %d) пользователем: %s',
+            data['training_program'], data['completion_date'], len(added), skipped, self.request.user.username)
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        logger.warning(
+            'Ошибка валидации формы массового добавления записей об обучении: %s пользователем: %s',
+            form.errors, self.request.user.username)
+        return super().form_invalid(form)
+
+
+class TrainingRecordBulkVerifyView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Подтверждает выбранные записи об обучении одним UPDATE."""
+    permission_required = 'employees.change_trainingrecord'
+    # Очистка кэша отчета по тегам сотрудников и программ — несколько запросов на тег при кэше в базе
+    query_budget = 40
+
+    @log_view_action('Массово подтверждены', 'записи об обучении')
+    def post(self, request, *args, **kwargs):
+        record_ids = [pk for pk in request.POST.getlist('records') if pk.isdigit()]
+        employee_pk = request.POST.get('employee_pk', '')
+        records = TrainingRecord.objects.filter(pk__in=record_ids)
+        if employee_pk.isdigit():
+            records = records.filter(employee_id=employee_pk)
+        verified = TrainingRecord.bulk_verify(records)
+        if verified:
+            messages.success(request, f'Подтверждено записей об обучении: {verified}')
+        else:
+            messages.warning(request, 'Не выбраны неподтвержденные записи об обучении.')
+        if employee_pk.isdigit():
+            return redirect('employees:employee_trainings', pk=employee_pk)
+        return redirect('employees:employee_list')
+
+
 class TrainingRecordDeleteView(EditorModeratedDeleteView):
     model = TrainingRecord
     template_name = 'trainings/training_record_confirm_delete.html'
     confirm_url_name = 'employees:training_record_delete_confirm'
     permission_required = 'employees.delete_trainingrecord'
+    query_budget = 19
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -573,9 +733,9 @@ class TrainingRecordDeleteConfirmView(EditorModeratedDeleteView):
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
         user = request.user.username
-        if request.user.groups.filter(name=settings.MTO_GROUP_NAME).exists():
+        if request.roles.is_moderator:
             logger.info(
-                'Подтверждено удаление записи об обучении: %s пользователем из группы MTO: %s',
+                'Подтверждено удаление записи об обучении: %s пользователем из группы Moderators: %s',
                 obj,
                 user)
             return super(
@@ -587,7 +747,7 @@ class TrainingRecordDeleteConfirmView(EditorModeratedDeleteView):
                 **kwargs)
         messages.error(
             request,
-            'Только пользователь из группы MTO может подтвердить удаление.')
+            'Только пользователь из группы Moderators может подтвердить удаление.')
         logger.warning(
             'Отказано в подтверждении удаления записи об обучении: %s пользователем: %s',
             obj,
@@ -595,9 +755,43 @@ class TrainingRecordDeleteConfirmView(EditorModeratedDeleteView):
         return self.render_to_response(self.get_context_data())
 
 
+class TrainingRecordDocumentView(LoginRequiredMixin, View):
+    """Скан документа записи об обучении (с поддержкой Range и передачей файла веб-серверу)."""
+    query_budget = 12
+
+    @log_view_action('Открыт скан документа', 'записи об обучении')
+    def get(self, request, *args, **kwargs):
+        record = get_object_or_404(
+            TrainingRecord.objects.select_related('employee', 'training_program'), pk=kwargs['pk'])
+        if not record.document or not record.document.storage.exists(record.document.name):
+            raise Http404('Скан документа не найден.')
+        # Имя файла в хранилище — хеш содержимого, пользователю отдается понятное имя
+        extension = os.path.splitext(record.document.name)[1]
+        filename = f'{record.employee} - {record.training_program} {record.completion_date:%d.%m.%Y}{extension}'
+        return document_response(request, record.document.name, filename)
+
+
+class TrainingRecordPreviewView(LoginRequiredMixin, View):
+    """Превью скана документа; пока оно не создано, отвечает 404, и страница показывает значок."""
+    query_budget = 12
+
+    def get(self, request, *args, **kwargs):
+        # Превью загружаются по одному на строку таблицы, поэтому не пишутся в журнал действий
+        set_action('Открыто превью скана документа')
+        record = get_object_or_404(TrainingRecord, pk=kwargs['pk'])
+        name = preview_name(record.document.name) if record.document else None
+        if name is None or not document_storage().exists(name):
+            if record.document:
+                # Документ загружен до появления превью или задача не успела выполниться
+                schedule_preview(record.document.name)
+            raise Http404('Превью документа еще не создано.')
+        return document_response(request, name, os.path.basename(name))
+
+
 class PasswordChangeCustomView(LoginRequiredMixin, PasswordChangeView):
     template_name = 'auth/password_change_form.html'
     success_url = reverse_lazy('employees:password_change_done')
+    query_budget = 12
 
     @log_view_action('Открыта форма смены пароля', 'пользователя')
     def get(self, request, *args, **kwargs):
@@ -620,6 +814,7 @@ class PasswordChangeCustomView(LoginRequiredMixin, PasswordChangeView):
 
 class PasswordChangeDoneCustomView(LoginRequiredMixin, PasswordChangeDoneView):
     template_name = 'auth/password_change_done.html'
+    query_budget = 12
 
     @log_view_action('Открыта страница подтверждения смены пароля',
                      'пользователя')
@@ -3,16 +3,18 @@ import logging
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView
 from .models import Instruction
+from employees.pagination import KeysetPaginationMixin
 from employees.views import log_view_action
 
 logger = logging.getLogger('instructions')
 
 
-class InstructionListView(LoginRequiredMixin, ListView):
+class InstructionListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Instruction
     template_name = 'instructions/instruction_list.html'
     context_object_name = 'instructions'
     paginate_by = 20
+    query_budget = 13
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -45,6 +47,7 @@ class InstructionDetailView(LoginRequiredMixin, DetailView):
     model = Instruction
     template_name = 'instructions/instruction_detail.html'
     context_object_name = 'instruction'
+    query_budget = 13
 
     @log_view_action('Открыта', 'инструкция')
     def get(self, request, *args, **kwargs):
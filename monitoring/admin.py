@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import ViewMetrics
+
+
+@admin.register(ViewMetrics)
+class ViewMetricsAdmin(admin.ModelAdmin):
+    list_display = ('url_name', 'action', 'window_start', 'requests', 'worker')
+    list_filter = ('url_name',)
@@ -0,0 +1,70 @@
+"""
+Бюджет SQL-запросов на представление.
+
+Бюджет задается атрибутом класса представления query_budget или декоратором
+query_budget(n) (для функций и результатов as_view() в urls.py).
+QueryBudgetMiddleware считает все запросы к базе за время обработки запроса и
+при превышении, в зависимости от QUERY_BUDGET_MODE, пишет предупреждение в
+журнал ('log') или выбрасывает QueryBudgetExceeded ('raise'). В сообщении
+повторяющиеся запросы сгруппированы — так видны N+1.
+
+Если число запросов растет с объемом данных (обработка пакетами), представление
+увеличивает бюджет текущего запроса через extend_budget(request, n) на каждый пакет.
+
+Бюджет включает запросы промежуточных слоев: сессию, пользователя и около
+восьми запросов вычисления ролей, когда их еще нет в кэше.
+"""
+import logging
+from collections import Counter
+
+logger = logging.getLogger('monitoring')
+
+# Сколько групп повторяющихся запросов выводить в сообщении
+DUPLICATES_SHOWN = 5
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Задает бюджет SQL-запросов классу представления или функции представления."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def extend_budget(request, queries):
+    """Добавляет queries запросов к бюджету текущего запроса, если бюджет задан."""
+    if getattr(request, 'query_budget', None) is not None:
+        request.query_budget += queries
+
+
+def view_budget(view_func):
+    """Бюджет представления по функции из URLconf; None, если не задан."""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+def budget_report(view_name, budget, queries):
+    """Текст о превышении бюджета с повторяющимися запросами, сгруппированными по тексту SQL."""
+    lines = [f'{view_name}: {len(queries)} SQL-запросов при бюджете {budget}']
+    duplicates = [(sql, count) for sql, count in Counter(queries).most_common(DUPLICATES_SHOWN) if count > 1]
+    if duplicates:
+        lines.append('Повторяющиеся запросы:')
+        lines.extend(f'  {count} x {sql}' for sql, count in duplicates)
+    return '\n'.join(lines)
+
+
+class QueryCollector:
+    """Обертка execute_wrapper: запоминает текст каждого запроса (без параметров)."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from monitoring.metrics import summarize
+
+
+class Command(BaseCommand):
+    help = 'Выводит перцентили времени ответа, SQL-запросов и отрисовки шаблонов по представлениям'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes',
+            type=int,
+            default=settings.PERF_WINDOW_MINUTES,
+            help='За сколько последних минут объединять метрики'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Сколько представлений вывести (по убыванию суммарного времени)'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести отчет в формате JSON'
+        )
+
+    def handle(self, *args, **kwargs):
+        summary = summarize(kwargs['minutes'])[:kwargs['limit']]
+        if kwargs['json']:
+            self.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2))
+            return
+        if not summary:
+            self.stdout.write(f"Нет метрик за последние {kwargs['minutes']} мин.")
+            return
+
+        self.stdout.write(
+            f"{'Маршрут / действие':<60} {'Запр.':>6} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} "
+            f"{'SQL p95':>8} {'SQL мс':>8} {'Шабл. мс':>9} {'Кэш':>6}")
+        for item in summary:
+            label = item['url_name'] + (f" ({item['action']})" if item['action'] else '')
+            wall = item['wall_ms']
+            hit_ratio = item['cache_hit_ratio']
+            self.stdout.write(
+                f"{label[:60]:<60} {item['requests']:>6} {wall['p50']:>8.1f} {wall['p95']:>8.1f} {wall['p99']:>8.1f} "
+                f"{item['sql_count']['p95']:>8g} {item['sql_ms']['avg']:>8.1f} {item['template_ms']['avg']:>9.1f} "
+                f"{'—' if hit_ratio is None else f'{hit_ratio:.0%}':>6}")
@@ -0,0 +1,234 @@
+"""
+Сбор метрик представлений: время ответа, число и время SQL-запросов,
+попадания и промахи кэша, время отрисовки шаблона.
+
+Метрики накапливаются в памяти процесса по минутным интервалам и
+периодически сохраняются в ViewMetrics. Гистограммы хранят значения,
+округленные до двух значащих цифр, поэтому перцентили вычисляются с
+погрешностью не более 5% и без хранения отдельных замеров.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('monitoring')
+
+HISTOGRAM_METRICS = ('wall_ms', 'sql_count', 'sql_ms', 'template_ms')
+COUNTER_METRICS = ('cache_hits', 'cache_misses')
+PERCENTILES = (50, 95, 99)
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Метрики одного запроса; доступны через контекстную переменную на время его обработки."""
+
+    def __init__(self):
+        self.action = ''
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def sample(self, wall_ms):
+        return {
+            'wall_ms': wall_ms,
+            'sql_count': self.sql_count,
+            'sql_ms': self.sql_ms,
+            'template_ms': self.template_ms,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def set_action(action):
+    """Название действия из log_view_action, под которым запрос попадет в отчет."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.action = action
+
+
+def cache_event(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_count += 1
+        metrics.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def bucket(value):
+    """Значение, округленное до двух значащих цифр, — ключ корзины гистограммы."""
+    if value <= 0:
+        return '0'
+    return f'{float(f"{value:.2g}"):g}'
+
+
+def percentile(histogram, q):
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = total * q / 100
+    seen = 0
+    for key, count in sorted(histogram.items(), key=lambda item: float(item[0])):
+        seen += count
+        if seen >= threshold:
+            return float(key)
+    return None
+
+
+def window_start(now=None):
+    return (now or timezone.now()).replace(second=0, microsecond=0)
+
+
+class MetricsCollector:
+    """Накопитель метрик процесса со сбросом в базу раз в PERF_FLUSH_INTERVAL секунд."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.last_flush = time.monotonic()
+        self.last_prune = 0.0
+
+    @staticmethod
+    def empty_window():
+        return {
+            'requests': 0,
+            'histograms': {metric: Counter() for metric in HISTOGRAM_METRICS},
+            'sums': defaultdict(float),
+        }
+
+    def record(self, url_name, action, sample):
+        key = (url_name, action, window_start())
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = self.empty_window()
+            window['requests'] += 1
+            for metric, value in sample.items():
+                window['sums'][metric] += value
+                if metric in window['histograms']:
+                    window['histograms'][metric][bucket(value)] += 1
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= settings.PERF_FLUSH_INTERVAL
+
+    def flush(self):
+        from monitoring.models import ViewMetrics
+
+        current = window_start()
+        with self.lock:
+            windows = self.windows
+            # Текущая минута остается в памяти и будет перезаписана следующим сбросом
+            self.windows = {key: window for key, window in windows.items() if key[2] >= current}
+            self.last_flush = time.monotonic()
+        if not windows:
+            return
+        rows = [
+            ViewMetrics(
+                worker=WORKER_ID,
+                url_name=url_name,
+                action=action,
+                window_start=start,
+                requests=window['requests'],
+                data={
+                    'histograms': {metric: dict(histogram) for metric, histogram in window['histograms'].items()},
+                    'sums': dict(window['sums']),
+                })
+            for (url_name, action, start), window in windows.items()
+        ]
+        try:
+            ViewMetrics.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['worker', 'url_name', 'action', 'window_start'],
+                update_fields=['requests', 'data'])
+            if time.monotonic() - self.last_prune >= 600:
+                self.last_prune = time.monotonic()
+                ViewMetrics.objects.filter(
+                    window_start__lt=timezone.now() - timedelta(hours=settings.PERF_RETENTION_HOURS)).delete()
+        except Exception as e:
+            logger.error('Ошибка при сохранении метрик представлений: %s', str(e), exc_info=True)
+
+
+collector = MetricsCollector()
+
+
+def summarize(minutes=None):
+    """
+    Объединяет метрики всех процессов за последние minutes минут по паре
+    (имя маршрута, действие). Возвращает список, отсортированный по суммарному времени ответа.
+    """
+    from monitoring.models import ViewMetrics
+
+    minutes = minutes or settings.PERF_WINDOW_MINUTES
+    since = window_start() - timedelta(minutes=minutes - 1)
+    merged = {}
+    rows = ViewMetrics.objects.filter(window_start__gte=since).values_list('url_name', 'action', 'requests', 'data')
+    for url_name, action, requests, data in rows.iterator():
+        entry = merged.get((url_name, action))
+        if entry is None:
+            entry = merged[(url_name, action)] = {
+                'requests': 0,
+                'histograms': {metric: Counter() for metric in HISTOGRAM_METRICS},
+                'sums': Counter(),
+            }
+        entry['requests'] += requests
+        for metric, histogram in data.get('histograms', {}).items():
+            entry['histograms'].setdefault(metric, Counter()).update(histogram)
+        entry['sums'].update(data.get('sums', {}))
+
+    summary = []
+    for (url_name, action), entry in merged.items():
+        requests = entry['requests']
+        sums = entry['sums']
+        cache_total = sums['cache_hits'] + sums['cache_misses']
+        item = {
+            'url_name': url_name,
+            'action': action,
+            'requests': requests,
+            'total_wall_ms': sums['wall_ms'],
+            'cache_hits': int(sums['cache_hits']),
+            'cache_misses': int(sums['cache_misses']),
+            'cache_hit_ratio': sums['cache_hits'] / cache_total if cache_total else None,
+        }
+        for metric in HISTOGRAM_METRICS:
+            item[metric] = {'avg': sums[metric] / requests if requests else None}
+            for q in PERCENTILES:
+                item[metric][f'p{q}'] = percentile(entry['histograms'][metric], q)
+        summary.append(item)
+    summary.sort(key=lambda item: item['total_wall_ms'], reverse=True)
+    return summary
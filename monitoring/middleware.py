@@ -0,0 +1,89 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from monitoring import budget, metrics
+
+
+class ViewMetricsMiddleware:
+    """
+    Замеряет время ответа, SQL-запросы, обращения к кэшу и отрисовку шаблона
+    для каждого запроса и передает их накопителю под именем маршрута.
+    Должна стоять первой в MIDDLEWARE, чтобы учитывать остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            wall_ms = (time.perf_counter() - started) * 1000
+            metrics.finish_request(token)
+        match = request.resolver_match
+        url_name = match.view_name if match else '<unresolved>'
+        metrics.collector.record(url_name, request_metrics.action, request_metrics.sample(wall_ms))
+        if metrics.collector.flush_due():
+            metrics.collector.flush()
+        return response
+
+    def process_template_response(self, request, response):
+        # Отрисовка TemplateResponse выполняется обработчиком после middleware,
+        # поэтому замеряется обертка над render()
+        request_metrics = metrics._current.get()
+        if request_metrics is None:
+            return response
+        render = response.render
+
+        def timed_render():
+            started = time.perf_counter()
+            try:
+                return render()
+            finally:
+                request_metrics.template_ms += (time.perf_counter() - started) * 1000
+
+        response.render = timed_render
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверяет бюджет SQL-запросов представления (monitoring.budget). Режим берется
+    из QUERY_BUDGET_MODE при каждом запросе, чтобы тесты могли включать его
+    через override_settings. Запросы при чтении потокового ответа не учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if not mode:
+            return self.get_response(request)
+        collector = budget.QueryCollector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        limit = getattr(request, 'query_budget', None)
+        if limit is not None and len(collector.queries) > limit:
+            match = request.resolver_match
+            message = budget.budget_report(match.view_name if match else request.path, limit, collector.queries)
+            if mode == 'raise':
+                raise budget.QueryBudgetExceeded(message)
+            budget.logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = budget.view_budget(view_func)
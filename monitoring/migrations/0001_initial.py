@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker', models.CharField(max_length=100, verbose_name='Процесс')),
+                ('url_name', models.CharField(max_length=200, verbose_name='Имя маршрута')),
+                ('action', models.CharField(blank=True, max_length=200, verbose_name='Действие')),
+                ('window_start', models.DateTimeField(db_index=True, verbose_name='Начало интервала')),
+                ('requests', models.PositiveIntegerField(default=0, verbose_name='Запросов')),
+                ('data', models.JSONField(default=dict, verbose_name='Гистограммы и счетчики')),
+            ],
+            options={
+                'verbose_name': 'Метрики представления',
+                'verbose_name_plural': 'Метрики представлений',
+                'unique_together': {('worker', 'url_name', 'action', 'window_start')},
+            },
+        ),
+    ]
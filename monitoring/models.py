@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class ViewMetrics(models.Model):
+    """
+    Гистограммы метрик представления за одну минуту от одного процесса.
+    Каждый процесс перезаписывает только свои строки, поэтому запись не
+    конфликтует между процессами; при чтении строки всех процессов объединяются.
+    """
+    worker = models.CharField(
+        max_length=100,
+        verbose_name='Процесс')
+    url_name = models.CharField(
+        max_length=200,
+        verbose_name='Имя маршрута')
+    action = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Действие')
+    window_start = models.DateTimeField(
+        db_index=True,
+        verbose_name='Начало интервала')
+    requests = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Запросов')
+    data = models.JSONField(
+        default=dict,
+        verbose_name='Гистограммы и счетчики')
+
+    def __str__(self):
+        return f'{self.url_name} {self.window_start:%d.%m.%Y %H:%M} ({self.worker})'
+
+    class Meta:
+        verbose_name = 'Метрики представления'
+        verbose_name_plural = 'Метрики представлений'
+        unique_together = ('worker', 'url_name', 'action', 'window_start')
@@ -0,0 +1,213 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from departments.models import Department
+from employees.models import DeletionRequest, Employee, EmployeeProgramStatus, TrainingRecord
+from instructions.models import Instruction
+from monitoring.budget import QueryBudgetExceeded, budget_report, view_budget
+from positions.models import Position
+from reports.models import ExportJob
+from trainings.models import TrainingProgram
+
+
+def iter_patterns(patterns, namespace=''):
+    """(имя с пространством имен, callback) всех маршрутов URLconf, кроме админки."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from iter_patterns(pattern.url_patterns, prefix)
+        elif isinstance(pattern, URLPattern):
+            yield f'{namespace}{pattern.name}', pattern.callback
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class QueryBudgetTest(TestCase):
+    # Строк больше размера страницы списков, чтобы N+1 превышал бюджет
+    ROWS = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('budget', password='password')
+        cls.user.groups.add(
+            Group.objects.create(name=settings.MODERATOR_GROUP_NAME),
+            Group.objects.create(name=settings.EDITOR_GROUP_NAME))
+        departments = Department.objects.bulk_create(
+            Department(name=f'Подразделение {index}') for index in range(cls.ROWS))
+        positions = Position.objects.bulk_create(
+            Position(name=f'Должность {index}') for index in range(cls.ROWS))
+        programs = TrainingProgram.objects.bulk_create(
+            TrainingProgram(name=f'Программа {index}', recurrence_period=index % 3 or None)
+            for index in range(cls.ROWS))
+        employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index}', first_name='Иван', middle_name='Петрович',
+                     search_key=f'сотрудник{index} иван петрович',
+                     department=departments[index], position=positions[index])
+            for index in range(cls.ROWS))
+        cls.employee = employees[0]
+        records = TrainingRecord.objects.bulk_create(
+            TrainingRecord(employee=cls.employee, training_program=program,
+                           completion_date=date.today() - timedelta(days=index * 30))
+            for index, program in enumerate(programs))
+        cls.record = records[0]
+        EmployeeProgramStatus.rebuild()
+        content_type = ContentType.objects.get_for_model(Employee)
+        cls.deletion_request = DeletionRequest.objects.bulk_create(
+            DeletionRequest(content_type=content_type, object_id=employee.pk, created_by=cls.user)
+            for employee in employees)[0]
+        cls.instruction = Instruction.objects.create(title='Инструкция', content='Текст')
+        cls.export_job = ExportJob.objects.create(created_by=cls.user)
+        cls.department, cls.position, cls.program = departments[0], positions[0], programs[0]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_every_view_has_budget(self):
+        missing = [name for name, callback in iter_patterns(get_resolver().url_patterns)
+                   if view_budget(callback) is None]
+        self.assertEqual(missing, [])
+
+    def test_views_within_budget(self):
+        employee_pk = {'pk': self.employee.pk}
+        report_filters = f'?program={self.program.pk}&exclude_not_completed=on'
+        urls = [
+            reverse('index'),
+            reverse('login'),
+            reverse('employees:employee_list'),
+            reverse('employees:employee_list') + '?search=сотрудник',
+            reverse('employees:employee_search') + '?q=сотр',
+            reverse('employees:employee_create'),
+            reverse('employees:employee_edit', kwargs=employee_pk),
+            reverse('employees:employee_delete', kwargs=employee_pk),
+            reverse('employees:employee_trainings', kwargs=employee_pk),
+            reverse('employees:training_record_create', kwargs={'employee_pk': self.employee.pk}),
+            reverse('employees:training_record_edit', kwargs={'pk': self.record.pk}),
+            reverse('employees:training_record_delete', kwargs={'pk': self.record.pk}),
+            reverse('employees:training_record_document', kwargs={'pk': self.record.pk}),
+            reverse('employees:training_record_preview', kwargs={'pk': self.record.pk}),
+            reverse('employees:training_record_bulk_create'),
+            reverse('employees:password_change'),
+            reverse('employees:password_change_done'),
+            reverse('employees:deletion_request_list'),
+            reverse('employees:deletion_request_confirm', kwargs={'pk': self.deletion_request.pk}),
+            reverse('departments:department_list'),
+            reverse('departments:department_create'),
+            reverse('departments:department_edit', kwargs={'pk': self.department.pk}),
+            reverse('departments:department_delete', kwargs={'pk': self.department.pk}),
+            reverse('departments:department_delete_confirm', kwargs={'pk': self.department.pk}),
+            reverse('positions:position_list'),
+            reverse('positions:position_create'),
+            reverse('positions:position_edit', kwargs={'pk': self.position.pk}),
+            reverse('positions:position_delete', kwargs={'pk': self.position.pk}),
+            reverse('trainings:training_list'),
+            reverse('trainings:training_create'),
+            reverse('trainings:training_edit', kwargs={'pk': self.program.pk}),
+            reverse('trainings:training_delete', kwargs={'pk': self.program.pk}),
+            reverse('instructions:instruction_list'),
+            reverse('instructions:instruction_detail', kwargs={'pk': self.instruction.pk}),
+            reverse('reports:report_list'),
+            reverse('reports:report_list') + report_filters,
+            reverse('reports:report_rows'),
+            reverse('reports:report_rows') + report_filters,
+            reverse('reports:report_rows') + f'?program={self.program.pk}&sort_by={self.program.pk}',
+            reverse('reports:report_matrix'),
+            reverse('reports:report_matrix') + report_filters,
+            reverse('reports:report_matrix') + f'?employees={self.employee.pk}&exclude_not_completed=on',
+            reverse('reports:export_report'),
+            reverse('reports:export_report') + report_filters,
+            reverse('reports:export_report') + '?mode=stream',
+            reverse('reports:export_report') + report_filters + '&mode=stream',
+            reverse('reports:export_job_status', kwargs={'pk': self.export_job.pk}),
+            reverse('reports:export_job_download', kwargs={'pk': self.export_job.pk}),
+            reverse('monitoring:perf_report'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertLess(response.status_code, 500)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+
+    def test_report_views_within_budget_without_cache(self):
+        # Первый запрос после сброса кэша: роли и данные отчета вычисляются заново
+        filters = [
+            '',
+            f'?program={self.program.pk}',
+            f'?program={self.program.pk}&exclude_not_completed=on',
+            f'?employees={self.employee.pk}&program={self.program.pk}&sort_by={self.program.pk}',
+        ]
+        urls = [
+            reverse(f'reports:{name}') + query
+            for name in ('report_list', 'report_rows', 'report_matrix', 'export_report')
+            for query in filters
+        ]
+        urls += [reverse('reports:export_report') + (query or '?') + '&mode=stream' for query in filters]
+        for url in urls:
+            with self.subTest(url=url):
+                caches['default'].clear()
+                caches['local'].clear()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_budget_exceeded_raises(self):
+        url = reverse('employees:employee_list')
+        view_class = get_resolver().resolve(url).func.view_class
+        budget = view_class.query_budget
+        view_class.query_budget = 1
+        try:
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
+        finally:
+            view_class.query_budget = budget
+
+    def test_budget_report_groups_duplicates(self):
+        queries = ['SELECT 1'] + ['SELECT "position" WHERE id = %s'] * 3
+        report = budget_report('employees:employee_list', 2, queries)
+        self.assertIn('4 SQL-запросов при бюджете 2', report)
+        self.assertIn('3 x SELECT "position" WHERE id = %s', report)
+        self.assertNotIn('1 x SELECT 1', report)
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class BulkChangeBudgetTest(TransactionTestCase):
+    """Массовые изменения: очистка кэша отчета выполняется после фиксации и входит в бюджет."""
+
+    def setUp(self):
+        user = User.objects.create_superuser('bulk', password='password')
+        self.program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+        self.department = Department.objects.create(name='Учебная часть')
+        self.employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index}', first_name='Иван', department=self.department)
+            for index in range(30))
+        self.client.force_login(user)
+        self.client.get(reverse('index'))
+
+    def test_bulk_create_within_budget(self):
+        url = reverse('employees:training_record_bulk_create')
+        for data in ({'employees': [employee.pk for employee in self.employees[:2]]},
+                     {'department': self.department.pk}):
+            with self.subTest(data=data):
+                response = self.client.post(url, {
+                    'training_program': self.program.pk, 'completion_date': '2024-03-01', **data})
+                self.assertEqual(response.status_code, 302)
+
+    def test_bulk_verify_within_budget(self):
+        employee = self.employees[0]
+        programs = TrainingProgram.objects.bulk_create(
+            TrainingProgram(name=f'Программа {index}') for index in range(20))
+        records = TrainingRecord.objects.bulk_create(
+            TrainingRecord(employee=employee, training_program=program, completion_date=date(2024, 1, 1))
+            for program in [self.program, *programs])
+        url = reverse('employees:training_record_bulk_verify')
+        for selected in (records[:2], records[2:]):
+            with self.subTest(records=len(selected)):
+                response = self.client.post(url, {
+                    'records': [record.pk for record in selected], 'employee_pk': employee.pk})
+                self.assertEqual(response.status_code, 302)
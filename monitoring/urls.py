@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import PerfReportView
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('perf/', PerfReportView.as_view(), name='perf_report'),
+]
@@ -0,0 +1,27 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import JsonResponse
+from django.views import View
+
+from employees.views import log_view_action
+from monitoring.metrics import collector, summarize
+
+logger = logging.getLogger('monitoring')
+
+
+class PerfReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Перцентили метрик представлений за последние minutes минут (только для персонала)."""
+    query_budget = 14
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    @log_view_action('Запрошен отчет', 'о производительности представлений')
+    def get(self, request, *args, **kwargs):
+        minutes = request.GET.get('minutes', '')
+        minutes = int(minutes) if minutes.isdigit() and int(minutes) else settings.PERF_WINDOW_MINUTES
+        # Накопленные, но еще не сохраненные метрики текущего процесса тоже попадают в отчет
+        collector.flush()
+        return JsonResponse({'minutes': minutes, 'views': summarize(minutes)})
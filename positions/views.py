@@ -1,23 +1,25 @@
 import logging
 
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView
 
+from employees.pagination import KeysetPaginationMixin
 from employees.views import log_view_action, EditorModeratedDeleteView
+from reports.conditional import ConditionalGetMixin
 from .forms import PositionForm
 from .models import Position
 
 logger = logging.getLogger('positions')
 
 
-class PositionListView(LoginRequiredMixin, ListView):
+class PositionListView(LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = Position
     template_name = 'positions/position_list.html'
     context_object_name = 'positions'
     paginate_by = 20
+    query_budget = 13
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -59,6 +61,7 @@ class PositionCreateView(
     template_name = 'positions/position_form.html'
     success_url = reverse_lazy('positions:position_list')
     permission_required = 'positions.add_position'
+    query_budget = 12
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -91,6 +94,7 @@ class PositionUpdateView(
     template_name = 'positions/position_form.html'
     success_url = reverse_lazy('positions:position_list')
     permission_required = 'positions.change_position'
+    query_budget = 13
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -133,9 +137,9 @@ class PositionDeleteConfirmView(EditorModeratedDeleteView):
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
         user = request.user.username
-        if request.user.groups.filter(name=settings.MTO_GROUP_NAME).exists():
+        if request.roles.is_moderator:
             logger.info(
-                'Подтверждено удаление должности: %s пользователем из группы MTO: %s',
+                'Подтверждено удаление должности: %s пользователем из группы Moderators: %s',
                 obj,
                 user)
             return super(
@@ -147,7 +151,7 @@ class PositionDeleteConfirmView(EditorModeratedDeleteView):
                 **kwargs)
         messages.error(
             request,
-            'Только пользователь из группы MTO может подтвердить удаление.')
+            'Только пользователь из группы Moderators может подтвердить удаление.')
         logger.warning(
             'Отказано в подтверждении удаления должности: %s пользователем: %s',
             obj,
@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'created_by', 'status', 'rows_done', 'rows_total', 'created_at', 'finished_at')
+    list_filter = ('status',)
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache, caches
+from django.core.exceptions import BadRequest
+
+from monitoring.metrics import cache_event
+from reports.models import CacheGeneration
+
+logger = logging.getLogger('reports')
+
+REPORT_CACHE_TIMEOUT = 60 * 15
+KEY_PREFIX = 'training_report'
+STATS_KEYS = {
+    'l1_hits': f'{KEY_PREFIX}:stats:l1_hits',
+    'l2_hits': f'{KEY_PREFIX}:stats:hits',
+    'misses': f'{KEY_PREFIX}:stats:misses',
+}
+# Счетчики копятся в процессе и сбрасываются в общий кэш пачками,
+# чтобы попадание в локальный кэш не стоило записи в базу
+STATS_FLUSH_EVERY = 50
+
+# Теги версий. Запись кэша зависит от версий тегов, попавших в ее фильтры;
+# изменение данных увеличивает версии только затронутых тегов.
+TAG_ALL = '*'
+TAG_ROSTER = 'roster'
+TAG_PROGRAMS = 'programs'
+TAG_NAMESPACE = 'namespace'
+# Сколько выбранных сотрудников отслеживается по отдельным тегам. Первая версия
+# каждого тега — отдельная запись в общий кэш, поэтому большая выборка зависит от тега *
+MAX_EMPLOYEE_TAGS = 10
+
+
+def employee_tag(employee_id):
+    return f'employee:{employee_id}'
+
+
+def program_tag(program_id):
+    return f'program:{program_id}'
+
+
+class LocalReportCache:
+    """
+    Локальный кэш процесса (первый уровень) перед общим кэшем в базе данных.
+    Записи хранятся по ключу фильтров без версий тегов, поэтому попадание не
+    требует обращений к базе. Согласованность между процессами обеспечивает
+    счетчик CacheGeneration: sync() вызывается в начале каждого запроса и
+    очищает локальный кэш, если другой процесс изменил данные.
+    """
+
+    def __init__(self, alias='local'):
+        self.alias = alias
+        self.generation = None
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def sync(self):
+        """Возвращает (поколение, время изменения данных) для условных запросов (reports.conditional)."""
+        generation, updated_at = CacheGeneration.state()
+        if generation != self.generation:
+            if self.generation is not None:
+                logger.debug('Поколение данных изменилось (%s -> %s), локальный кэш очищен',
+                             self.generation, generation)
+            self.cache.clear()
+            self.generation = generation
+        return generation, updated_at
+
+    def clear(self):
+        self.cache.clear()
+        self.generation = None
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+            if name != 'misses' and sum(self.stats.values()) < STATS_FLUSH_EVERY:
+                return
+            pending, self.stats = self.stats, Counter()
+        for stat, value in pending.items():
+            key = STATS_KEYS[stat]
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, value)
+
+
+report_cache = LocalReportCache()
+
+
+class ReportCache:
+    """
+    Кэш готовых данных отчета, ключ которого строится из нормализованных фильтров
+    (сотрудники, программа, exclude_not_completed) и версий тегов:
+
+    * выбраны сотрудники — версии employee:<id> и programs (изменения самих программ),
+      а если их больше MAX_EMPLOYEE_TAGS — общий тег *;
+    * выбрана только программа — program:<id> и roster (состав сотрудников);
+    * без фильтров — общий тег *.
+
+    Изменение записи об обучении (e, p) увеличивает employee:e, program:p и *,
+    поэтому удаляются только записи кэша, которые могут содержать эту ячейку.
+
+    Версии и данные хранятся в общем кэше (второй уровень), перед ним стоит
+    локальный кэш процесса report_cache; любое изменение версий увеличивает
+    CacheGeneration, и остальные процессы очищают локальный кэш на следующем запросе.
+    """
+
+    @staticmethod
+    def normalize_filters(selected_employees=None, selected_program=None, exclude_not_completed=False):
+        """
+        Фильтры в виде ключа кэша. Нечисловой идентификатор отклоняется (BadRequest):
+        если его отбросить, фильтр молча расширится до всех сотрудников или программ.
+        """
+        selected_employees = [str(pk) for pk in selected_employees or []]
+        if not all(pk.isdigit() for pk in selected_employees):
+            raise BadRequest(f'Неверный идентификатор сотрудника: {selected_employees}')
+        if selected_program and not str(selected_program).isdigit():
+            raise BadRequest(f'Неверный идентификатор программы: {selected_program}')
+        employees = sorted({int(pk) for pk in selected_employees})
+        program = int(selected_program) if selected_program else None
+        return {
+            'employees': employees,
+            'program': program,
+            'exclude_not_completed': bool(exclude_not_completed),
+        }
+
+    @staticmethod
+    def dependencies(filters):
+        program = filters['program']
+        if len(filters['employees']) > MAX_EMPLOYEE_TAGS:
+            tags = [TAG_ALL]
+        elif filters['employees']:
+            tags = [employee_tag(pk) for pk in filters['employees']] + [TAG_PROGRAMS]
+        elif program is not None:
+            tags = [program_tag(program), TAG_ROSTER]
+        else:
+            tags = [TAG_ALL]
+        return [TAG_NAMESPACE] + tags
+
+    @staticmethod
+    def version_key(tag):
+        return f'{KEY_PREFIX}:version:{tag}'
+
+    @classmethod
+    def versions(cls, tags):
+        keys = [cls.version_key(tag) for tag in tags]
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # Начальная версия уникальна: вытеснение счетчика не вернет к жизни старые записи
+                cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = cache.get(key)
+        return [versions[key] for key in keys]
+
+    @staticmethod
+    def local_key(filters):
+        payload = json.dumps(filters, sort_keys=True)
+        return f'{KEY_PREFIX}:local:{hashlib.sha1(payload.encode()).hexdigest()}'
+
+    @classmethod
+    def key(cls, filters):
+        tags = cls.dependencies(filters)
+        payload = json.dumps([filters, cls.versions(tags)], sort_keys=True)
+        return f'{KEY_PREFIX}:data:{hashlib.sha1(payload.encode()).hexdigest()}'
+
+    @classmethod
+    def get_or_build(cls, filters, builder):
+        local_key = cls.local_key(filters)
+        data = report_cache.cache.get(local_key)
+        if data is not None:
+            report_cache.count('l1_hits')
+            cache_event(hit=True)
+            logger.debug('Отчет получен из локального кэша, фильтры: %s', filters)
+            return data
+        key = cls.key(filters)
+        data = cache.get(key)
+        if data is not None:
+            report_cache.count('l2_hits')
+            cache_event(hit=True)
+            logger.debug('Отчет получен из общего кэша, фильтры: %s', filters)
+        else:
+            report_cache.count('misses')
+            cache_event(hit=False)
+            data = builder()
+            cache.set(key, data, REPORT_CACHE_TIMEOUT)
+            logger.debug('Отчет сохранен в кэш, фильтры: %s', filters)
+        report_cache.cache.set(local_key, data, REPORT_CACHE_TIMEOUT)
+        return data
+
+    @classmethod
+    def bump(cls, tags):
+        # Версии достаточно отличаться от прежних: новое уникальное значение записывается
+        # без чтения, а incr в DatabaseCache — это отдельные get и set на каждый тег
+        version = time.time_ns()
+        cache.set_many({cls.version_key(tag): version for tag in tags}, timeout=None)
+        CacheGeneration.bump()
+        report_cache.clear()
+
+    @classmethod
+    def invalidate(cls, employee_ids=(), program_ids=(), roster=False, programs=False):
+        tags = [TAG_ALL]
+        tags.extend(employee_tag(pk) for pk in employee_ids)
+        tags.extend(program_tag(pk) for pk in program_ids)
+        if roster:
+            tags.append(TAG_ROSTER)
+        if programs:
+            tags.append(TAG_PROGRAMS)
+        cls.bump(tags)
+
+    @classmethod
+    def invalidate_all(cls):
+        cls.bump([TAG_NAMESPACE])
+
+    @staticmethod
+    def stats():
+        counters = cache.get_many(list(STATS_KEYS.values()))
+        stats = {name: counters.get(key, 0) for name, key in STATS_KEYS.items()}
+        stats['hits'] = stats['l1_hits'] + stats['l2_hits']
+        total = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / total if total else 0.0
+        return stats
+
+    @staticmethod
+    def reset_stats():
+        cache.delete_many(list(STATS_KEYS.values()))
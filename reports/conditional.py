@@ -0,0 +1,90 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для отчетов и списков.
+
+Версия данных — счетчик CacheGeneration, который увеличивают сигналы при
+изменении сотрудников, записей об обучении, программ, подразделений и
+должностей. Пока версия не изменилась, повторный запрос с If-None-Match
+получает 304 до построения отчета и рендеринга шаблона.
+
+Статусы отчетов (просрочено, истекает) считаются от текущей даты, поэтому для
+представлений с daily_data в ETag входит дата, а Last-Modified не раньше начала
+дня: после полуночи отчет строится заново, даже если данные не менялись.
+"""
+import hashlib
+from datetime import date, datetime, time
+from functools import partial
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from reports.models import CacheGeneration
+
+
+def data_version(request):
+    """(поколение, время изменения) данных; обычно уже прочитано ReportCacheGenerationMiddleware."""
+    version = getattr(request, 'data_version', None)
+    if version is None:
+        version = request.data_version = CacheGeneration.state()
+    return version
+
+
+def has_pending_messages(request):
+    # Сообщения выводятся на странице один раз, ответ 304 потерял бы их
+    return bool(len(messages.get_messages(request)))
+
+
+def data_etag(request, *args, daily=False, **kwargs):
+    """
+    ETag страницы: версия данных, пользователь с его ролями (от них зависят кнопки
+    в шаблонах), CSRF-cookie (токен встраивается в формы страницы) и для daily —
+    текущая дата.
+    """
+    if has_pending_messages(request):
+        return None
+    generation, _ = data_version(request)
+    roles = request.roles
+    parts = [
+        str(generation),
+        str(request.user.pk),
+        ','.join(sorted(roles.groups)),
+        str(roles.is_superuser),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    if daily:
+        parts.append(date.today().isoformat())
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def data_last_modified(request, *args, daily=False, **kwargs):
+    if has_pending_messages(request):
+        return None
+    updated_at = data_version(request)[1]
+    if daily:
+        start_of_day = datetime.combine(date.today(), time.min)
+        if settings.USE_TZ:
+            start_of_day = timezone.make_aware(start_of_day)
+        updated_at = max(updated_at, start_of_day) if updated_at else start_of_day
+    return updated_at
+
+
+class ConditionalGetMixin:
+    """
+    Подмешивается к представлению после LoginRequiredMixin: добавляет ETag и
+    Last-Modified к ответам на GET и отвечает 304, если данные не изменились.
+    daily_data — ответ зависит от текущей даты (сроки обучения).
+    """
+    daily_data = False
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        handler = condition(
+            etag_func=partial(data_etag, daily=self.daily_data),
+            last_modified_func=partial(data_last_modified, daily=self.daily_data))(super().dispatch)
+        response = handler(request, *args, **kwargs)
+        # Браузер должен сверяться с сервером каждый раз, а не показывать сохраненную копию
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,153 @@
+import tempfile
+
+from django.db.models import Max
+from django.db.models.functions import Length
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+
+from employees.models import Employee
+from reports.services import NOT_COMPLETED, ReportService
+from trainings.models import TrainingProgram
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+BASE_HEADERS = ["Сотрудник", "Должность", "Руководитель", "Педагогический работник",
+                "Член комиссии по ОТ", "Подразделение"]
+
+FILL_COLORS = {
+    'not-completed': 'FF9999',
+    'overdue': 'FF3333',
+    'warning': 'FFFF66',
+    'completed': '99FF99'
+}
+
+VERIFIED = "Подтверждено"
+NOT_VERIFIED = "Не подтверждено"
+
+
+class TrainingReportExport:
+    """
+    Формирует XLSX-отчет по обучению. Стили ячеек создаются один раз и
+    назначаются при добавлении строки, поэтому строки не нужно обходить повторно.
+    """
+
+    def __init__(self, training_programs, selected_program=None):
+        if selected_program and selected_program.isdigit():
+            self.programs = [program for program in training_programs if program.id == int(selected_program)]
+        else:
+            self.programs = list(training_programs)
+        self.headers = list(BASE_HEADERS)
+        for program in self.programs:
+            self.headers.extend([program.name, "Статус подтверждения"])
+        self.header_font = Font(bold=True)
+        self.header_alignment = Alignment(horizontal="center")
+        self.fills = {
+            status_class: PatternFill(start_color=color, end_color=color, fill_type="solid")
+            for status_class, color in FILL_COLORS.items()
+        }
+        self.default_fill = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type="solid")
+
+    def header_cells(self, ws):
+        cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = self.header_font
+            cell.alignment = self.header_alignment
+            cells.append(cell)
+        return cells
+
+    def row_cells(self, ws, data):
+        employee = data['employee']
+        first_initial = employee.first_name[0] if employee.first_name else ""
+        middle_initial = employee.middle_name[0] if employee.middle_name else ""
+        cells = [
+            f"{employee.last_name} {first_initial}. {middle_initial}.".strip(),
+            str(employee.position or "—"),
+            "Да" if employee.position and employee.position.is_manager else "Нет",
+            "Да" if employee.position and employee.position.is_teacher else "Нет",
+            "Да" if employee.is_safety_commission_member else "Нет",
+            str(employee.department or "—")
+        ]
+        for program in self.programs:
+            training = data['trainings'].get(program.id, {})
+            date = training.get('date', NOT_COMPLETED)
+            date_cell = WriteOnlyCell(ws, value=date if date == NOT_COMPLETED else date.strftime("%d.%m.%y"))
+            date_cell.fill = self.fills.get(training.get('class', 'not-completed'), self.default_fill)
+            cells.append(date_cell)
+            cells.append(VERIFIED if training.get('is_verified', False) else NOT_VERIFIED)
+        return cells
+
+    def column_widths(self, employees):
+        """
+        Ширины столбцов без обхода строк: переменные по длине столбцы
+        оцениваются одним агрегирующим запросом по выбранным сотрудникам.
+        """
+        lengths = employees.aggregate(
+            last_name=Max(Length('last_name')),
+            position=Max(Length('position__name')),
+            department=Max(Length('department__name')),
+        )
+        values = [
+            (lengths['last_name'] or 0) + len(" И. О."),
+            lengths['position'] or len("—"),
+            len("Нет"),
+            len("Нет"),
+            len("Нет"),
+            lengths['department'] or len("—"),
+        ]
+        for _ in self.programs:
+            values.extend([len(NOT_COMPLETED), len(NOT_VERIFIED)])
+        return [max(value, len(header)) + 2 for value, header in zip(values, self.headers)]
+
+    def build_workbook(self, report_data):
+        """Строит книгу в памяти; ширины столбцов подбираются по фактическим значениям."""
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Отчет по обучению"
+        ws.append(self.header_cells(ws))
+        for data in report_data:
+            ws.append(self.row_cells(ws, data))
+        for col in ws.columns:
+            max_length = max(len(str(cell.value)) for cell in col if cell.value)
+            ws.column_dimensions[col[0].column_letter].width = max_length + 2
+        return wb
+
+    def save_streaming(self, rows, employees, progress=None):
+        """
+        Записывает книгу в режиме write-only во временный файл: строки сбрасываются
+        на диск по мере формирования, поэтому потребление памяти не зависит от
+        числа сотрудников. progress(rows_done) вызывается после каждой строки.
+        Возвращает открытый файл, установленный на начало.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="Отчет по обучению")
+        for index, width in enumerate(self.column_widths(employees), start=1):
+            ws.column_dimensions[get_column_letter(index)].width = width
+        ws.append(self.header_cells(ws))
+        for rows_done, data in enumerate(rows, start=1):
+            ws.append(self.row_cells(ws, data))
+            if progress:
+                progress(rows_done)
+        output = tempfile.TemporaryFile()
+        wb.save(output)
+        output.seek(0)
+        return output
+
+
+def export_training_report(selected_employees=None, selected_program=None, exclude_not_completed=False,
+                           progress=None, on_chunk=None):
+    """
+    Потоковый экспорт: строки формируются пакетами сотрудников и сразу
+    записываются в write-only книгу. Возвращает временный файл с готовой книгой.
+    on_chunk — см. ReportService.iter_training_report.
+    """
+    employees = Employee.objects.all()
+    if selected_employees:
+        employees = employees.filter(pk__in=selected_employees)
+    export = TrainingReportExport(TrainingProgram.objects.all(), selected_program)
+    rows = ReportService.iter_training_report(selected_employees, selected_program, on_chunk=on_chunk)
+    if exclude_not_completed:
+        rows = (data for data in rows if ReportService.is_completed(data, selected_program))
+    return export.save_streaming(rows, employees, progress)
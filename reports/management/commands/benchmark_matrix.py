@@ -0,0 +1,105 @@
+import json
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import compress_string
+
+from employees.management.commands.generate_synthetic_data import generate_dataset
+from reports.services import NOT_COMPLETED, ReportService
+
+logger = logging.getLogger('reports')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def naive_payload(report_data):
+    """Построчный формат с отдельным словарем на каждую ячейку, как в report_data."""
+    return [
+        {
+            'employee': {
+                'id': data['employee'].pk,
+                'name': str(data['employee']),
+                'position': str(data['employee'].position) if data['employee'].position else None,
+                'department': str(data['employee'].department) if data['employee'].department else None,
+            },
+            'trainings': {
+                str(program_id): {
+                    'date': None if training['date'] == NOT_COMPLETED else training['date'].isoformat(),
+                    'class': training['class'],
+                    'is_verified': training['is_verified'],
+                }
+                for program_id, training in data['trainings'].items()
+            },
+        }
+        for data in report_data
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер ответа и время кодирования колоночной матрицы отчета '
+            '(/reports/api/matrix/) с JSON, где каждая ячейка — отдельный словарь')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cells', type=int, default=50_000, help='Число ячеек матрицы')
+        parser.add_argument('--programs', type=int, default=10, help='Число программ обучения')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов каждого замера')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора данных')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['cells'] < kwargs['programs'] or kwargs['programs'] < 1:
+            raise CommandError('Число ячеек должно быть не меньше числа программ, программ — хотя бы одна')
+        employees = kwargs['cells'] // kwargs['programs']
+        try:
+            # Данные создаются внутри транзакции и откатываются после замеров
+            with transaction.atomic():
+                generate_dataset(
+                    departments=max(employees // 50, 1), positions=max(employees // 25, 1), employees=employees,
+                    programs=kwargs['programs'], records_per_employee=kwargs['programs'] // 2 or 1,
+                    seed=kwargs['seed'])
+                employee_ids = list(
+                    ReportService._report_scope()[0].order_by('-pk').values_list('pk', flat=True)[:employees])
+                selected = [str(pk) for pk in employee_ids]
+                results = {
+                    'построчный JSON': self.measure(
+                        lambda: naive_payload(ReportService.generate_training_report(selected)[0]),
+                        kwargs['repeat']),
+                    'колоночный JSON': self.measure(
+                        lambda: ReportService.report_matrix(selected), kwargs['repeat']),
+                }
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        cells = employees * kwargs['programs']
+        self.stdout.write(f"Ячеек: {cells} ({employees} сотрудников x {kwargs['programs']} программ)")
+        self.stdout.write(f"{'формат':<18}{'JSON, КБ':>10}{'gzip, КБ':>10}"
+                          f"{'сборка, мс':>12}{'JSON, мс':>10}{'gzip, мс':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<18}{result['size'] / 1024:>10.1f}{result['gzip_size'] / 1024:>10.1f}"
+                f"{result['build'] * 1000:>12.1f}{result['encode'] * 1000:>10.1f}{result['compress'] * 1000:>10.1f}")
+        logger.info('Замер матрицы отчета (%s ячеек): %s', cells, results)
+
+    @staticmethod
+    def measure(build, repeat):
+        """Медианы времени сборки данных, кодирования JSON и сжатия gzip; размеры ответа."""
+        timings = {'build': [], 'encode': [], 'compress': []}
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payload = build()
+            built = time.perf_counter()
+            content = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode()
+            encoded = time.perf_counter()
+            compressed = compress_string(content)
+            finished = time.perf_counter()
+            timings['build'].append(built - started)
+            timings['encode'].append(encoded - built)
+            timings['compress'].append(finished - encoded)
+        result = {name: statistics.median(values) for name, values in timings.items()}
+        result.update(size=len(content), gzip_size=len(compressed))
+        return result
@@ -0,0 +1,90 @@
+import logging
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from employees.models import Employee, EmployeeProgramStatus, TrainingRecord, calculate_due_date
+from reports.services import ReportService
+from trainings.models import TrainingProgram
+
+logger = logging.getLogger('reports')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Замеряет число SQL-запросов и время построения отчета по обучению на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='100x5,500x10,2000x15',
+            help='Размеры матрицы через запятую в формате <сотрудники>x<программы>'
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            sizes = [tuple(int(part) for part in size.split('x')) for size in kwargs['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('Неверный формат --sizes, ожидается например 100x5,500x10')
+
+        query_counts = set()
+        for employees_count, programs_count in sizes:
+            queries, elapsed = self.measure(employees_count, programs_count)
+            query_counts.add(queries)
+            self.stdout.write(
+                f'{employees_count:>6} сотрудников x {programs_count:>3} программ: '
+                f'{queries} запросов, {elapsed:.3f} с')
+
+        if len(query_counts) != 1:
+            raise CommandError(f'Число запросов зависит от размера отчета: {sorted(query_counts)}')
+        self.stdout.write(self.style.SUCCESS('Число запросов не зависит от размера отчета.'))
+
+    def measure(self, employees_count, programs_count):
+        # Данные создаются внутри транзакции и откатываются после замера
+        result = {}
+        try:
+            with transaction.atomic():
+                self.populate(employees_count, programs_count)
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    ReportService.generate_training_report()
+                    result['elapsed'] = time.perf_counter() - started
+                result['queries'] = len(context.captured_queries)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result['queries'], result['elapsed']
+
+    def populate(self, employees_count, programs_count):
+        programs = TrainingProgram.objects.bulk_create(
+            TrainingProgram(name=f'benchmark-program-{index}', recurrence_period=index % 4 or None)
+            for index in range(programs_count)
+        )
+        employees = Employee.objects.bulk_create(
+            Employee(last_name=f'benchmark-{index}', first_name='Иван', middle_name='Иванович')
+            for index in range(employees_count)
+        )
+        today = date.today()
+        records = []
+        for employee_index, employee in enumerate(employees):
+            for program_index, program in enumerate(programs):
+                if not (employee_index + program_index) % 3:
+                    continue
+                for days_back in (0, 400):
+                    completion_date = today - timedelta(
+                        days=(employee_index * 37 + program_index * 11) % 1500 + days_back)
+                    records.append(TrainingRecord(
+                        employee=employee,
+                        training_program=program,
+                        completion_date=completion_date,
+                        next_due_date=calculate_due_date(completion_date, program.recurrence_period),
+                    ))
+        TrainingRecord.objects.bulk_create(records)
+        EmployeeProgramStatus.rebuild()
@@ -0,0 +1,60 @@
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.services import ReportService, STATUS_CLASSES, classify_statuses
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает векторную классификацию статусов обучения с поячеечным циклом'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cells',
+            type=int,
+            default=100_000,
+            help='Число ячеек матрицы отчета'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел'
+        )
+
+    def handle(self, *args, **kwargs):
+        cells = kwargs['cells']
+        rng = np.random.default_rng(kwargs['seed'])
+        today = date.today()
+        # Даты прохождения за последние 6 лет, пятая часть ячеек — обучение не пройдено
+        completion_ordinals = today.toordinal() - rng.integers(0, 6 * 365, size=cells)
+        completion_ordinals[rng.random(cells) < 0.2] = 0
+        recurrence_periods = rng.choice(np.array([np.nan, 1, 3, 5]), size=cells)
+
+        started = time.perf_counter()
+        vectorized = classify_statuses(completion_ordinals, recurrence_periods, today)
+        vectorized_elapsed = time.perf_counter() - started
+
+        completion_list = completion_ordinals.tolist()
+        recurrence_list = [None if np.isnan(period) else int(period) for period in recurrence_periods]
+        started = time.perf_counter()
+        looped = []
+        for ordinal, recurrence_period in zip(completion_list, recurrence_list):
+            if not ordinal:
+                looped.append('not-completed')
+                continue
+            due_date = None
+            if recurrence_period is not None:
+                due_date = date.fromordinal(ordinal) + timedelta(days=recurrence_period * 365)
+            looped.append(ReportService.get_status_class(due_date, today))
+        loop_elapsed = time.perf_counter() - started
+
+        if [STATUS_CLASSES[code] for code in vectorized.tolist()] != looped:
+            raise CommandError('Результаты векторной классификации расходятся с поячеечным циклом')
+        self.stdout.write(f'Ячеек: {cells}')
+        self.stdout.write(f'Поячеечный цикл: {loop_elapsed * 1000:.1f} мс')
+        self.stdout.write(f'NumPy: {vectorized_elapsed * 1000:.1f} мс')
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение: {loop_elapsed / max(vectorized_elapsed, 1e-9):.0f}x, результаты совпадают.'))
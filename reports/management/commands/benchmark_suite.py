@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from employees.management.commands.generate_synthetic_data import generate_dataset, write_import_workbook
+from employees.models import Employee
+from employees.search import search_employees
+from reports.cache import ReportCache
+from reports.services import ReportService
+
+logger = logging.getLogger('reports')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Замеряет построение отчета, страницы отчетов, экспорта, списка и поиска сотрудников и импорт '
+            'из Excel на синтетических данных разного размера; результаты сохраняются в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='200,1000,5000',
+            help='Числа сотрудников через запятую'
+        )
+        parser.add_argument('--programs', type=int, default=10, help='Число программ обучения')
+        parser.add_argument('--records', type=int, default=5, help='Записей об обучении на сотрудника')
+        parser.add_argument('--repeat', type=int, default=3, help='Повторов каждого замера')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора данных')
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Файл для результатов в формате JSON'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='Файл с результатами предыдущего запуска для сравнения'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Допустимое замедление относительно базового запуска (0.25 — на 25%%)'
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            sizes = [int(size) for size in kwargs['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('Неверный формат --sizes, ожидается например 200,1000,5000')
+
+        results = {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'parameters': {key: kwargs[key] for key in ('programs', 'records', 'repeat', 'seed')},
+            'results': {},
+        }
+        for size in sizes:
+            self.stdout.write(f'Сотрудников: {size}')
+            timings = self.measure(size, kwargs)
+            results['results'][str(size)] = timings
+            for name, values in timings.items():
+                self.stdout.write(f"  {name:<16} медиана {values['median'] * 1000:9.1f} мс, "
+                                  f"минимум {values['min'] * 1000:9.1f} мс")
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты сохранены: {kwargs['output']}")
+        if kwargs['baseline']:
+            self.compare(results, kwargs['baseline'], kwargs['tolerance'])
+
+    def measure(self, size, options):
+        # Данные создаются внутри транзакции и откатываются после замеров
+        timings = {}
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+                generate_dataset(
+                    departments=max(size // 50, 1), positions=max(size // 25, 1), employees=size,
+                    programs=options['programs'], records_per_employee=options['records'], seed=options['seed'])
+                user = User.objects.create_superuser(f'benchmark-{time.time_ns()}', password=None)
+                client = Client()
+                client.force_login(user)
+
+                def get(url_name):
+                    # Каждый замер — без кэша отчетов, иначе измерялось бы чтение из кэша
+                    ReportCache.invalidate_all()
+                    response = client.get(reverse(url_name))
+                    if response.status_code != 200:
+                        raise CommandError(f'{url_name}: код ответа {response.status_code}')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+
+                search_key = Employee.objects.order_by('pk').values_list('search_key', flat=True).first()
+                typo = search_key[:-2] + search_key[-1]
+                benchmarks = {
+                    'service': ReportService.generate_training_report,
+                    'reports_view': lambda: get('reports:report_list'),
+                    'export_view': lambda: get('reports:export_report'),
+                    'employee_list': lambda: get('employees:employee_list'),
+                    # Нечеткий поиск с опечаткой: в PostgreSQL — по триграммному индексу
+                    'employee_search': lambda: list(search_employees(Employee.objects.all(), typo)[:20]),
+                }
+                for name, benchmark in benchmarks.items():
+                    timings[name] = self.repeat(benchmark, options['repeat'])
+                timings['import_excel'] = self.measure_import(size, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return timings
+
+    def measure_import(self, size, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'import.xlsx')
+            write_import_workbook(path, size, options['seed'])
+
+            def run_import():
+                # Каждый импорт откатывается, чтобы повторы добавляли одни и те же данные
+                try:
+                    with transaction.atomic():
+                        call_command('import_excel', file=path, bulk=True)
+                        raise _Rollback
+                except _Rollback:
+                    pass
+
+            return self.repeat(run_import, options['repeat'])
+
+    @staticmethod
+    def repeat(benchmark, count):
+        values = []
+        for _ in range(count):
+            started = time.perf_counter()
+            benchmark()
+            values.append(time.perf_counter() - started)
+        return {'median': statistics.median(values), 'min': min(values), 'runs': values}
+
+    def compare(self, results, baseline_path, tolerance):
+        try:
+            with open(baseline_path, encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Не удалось прочитать базовый запуск {baseline_path}: {e}')
+
+        regressions = []
+        self.stdout.write(f'Сравнение с {baseline_path}:')
+        for size, timings in results['results'].items():
+            for name, values in timings.items():
+                base = baseline.get('results', {}).get(size, {}).get(name)
+                if not base:
+                    continue
+                ratio = values['median'] / base['median'] if base['median'] else float('inf')
+                self.stdout.write(f'  {size:>6} {name:<16} x{ratio:.2f}')
+                if ratio > 1 + tolerance:
+                    regressions.append(f'{name} ({size} сотрудников): x{ratio:.2f}')
+        if regressions:
+            raise CommandError('Замедление относительно базового запуска: ' + ', '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Замедлений относительно базового запуска нет.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from reports.cache import ReportCache
+
+
+class Command(BaseCommand):
+    help = 'Выводит счетчики попаданий и промахов кэша отчетов по обучению'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Сбросить счетчики после вывода'
+        )
+
+    def handle(self, *args, **kwargs):
+        stats = ReportCache.stats()
+        self.stdout.write(f"Попадания: {stats['hits']} "
+                          f"(локальный кэш: {stats['l1_hits']}, общий кэш: {stats['l2_hits']})")
+        self.stdout.write(f"Промахи: {stats['misses']}")
+        self.stdout.write(f"Доля попаданий: {stats['hit_ratio']:.1%}")
+        if kwargs['reset']:
+            ReportCache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Счетчики сброшены.'))
@@ -0,0 +1,122 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from employees.models import Employee
+from reports.export import export_training_report
+from reports.models import ExportJob
+
+logger = logging.getLogger('reports')
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь задач экспорта отчетов (очередь хранится в базе данных)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать задачи, находящиеся в очереди, и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Пауза между опросами очереди, в секундах'
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=500,
+            help='Как часто (в строках) сохранять прогресс задачи'
+        )
+
+    def handle(self, *args, **kwargs):
+        logger.info('Запущен обработчик задач экспорта')
+        while True:
+            self.fail_stale_jobs()
+            job = self.claim_next_job()
+            if job:
+                self.run_job(job, kwargs['progress_every'])
+                continue
+            if kwargs['once']:
+                return
+            time.sleep(kwargs['interval'])
+
+    @staticmethod
+    def fail_stale_jobs():
+        """
+        Помечает ошибочными выполняющиеся задачи, от обработчика которых давно нет
+        сигнала: иначе задача упавшего обработчика навсегда остается «Выполняется».
+        Задача не перезапускается — экспорт, который роняет обработчик, уронил бы
+        и следующий; пользователь увидит ошибку и поставит экспорт заново.
+        """
+        stale_before = timezone.now() - timedelta(minutes=settings.EXPORT_JOB_STALE_MINUTES)
+        stale = ExportJob.objects.filter(status=ExportJob.STATUS_RUNNING).filter(
+            Q(heartbeat_at__lt=stale_before) | Q(heartbeat_at__isnull=True, started_at__lt=stale_before))
+        for pk in stale.values_list('pk', flat=True):
+            failed = ExportJob.objects.filter(pk=pk, status=ExportJob.STATUS_RUNNING).update(
+                status=ExportJob.STATUS_FAILED, error='Обработчик задачи прервался', finished_at=timezone.now())
+            if failed:
+                logger.warning('Задача экспорта #%s прервана: нет сигнала от обработчика', pk)
+
+    @staticmethod
+    def claim_next_job():
+        # Задачу захватывает тот обработчик, чей условный UPDATE изменил строку
+        for job in ExportJob.objects.filter(status=ExportJob.STATUS_PENDING).order_by('created_at')[:10]:
+            now = timezone.now()
+            claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_PENDING).update(
+                status=ExportJob.STATUS_RUNNING, started_at=now, heartbeat_at=now)
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def run_job(self, job, progress_every):
+        params = job.params or {}
+        selected_employees = params.get('employees') or []
+        selected_program = params.get('program') or None
+        exclude_not_completed = bool(params.get('exclude_not_completed'))
+        employees = Employee.objects.all()
+        if selected_employees:
+            employees = employees.filter(pk__in=selected_employees)
+        job.rows_total = employees.count()
+        job.save(update_fields=['rows_total'])
+        logger.info('Начата задача экспорта #%s (%d сотрудников)', job.pk, job.rows_total)
+
+        written = {'rows': 0}
+
+        def progress(rows_done):
+            written['rows'] = rows_done
+            if rows_done % progress_every == 0:
+                # Сохранение прогресса служит и сигналом, что обработчик жив
+                ExportJob.objects.filter(pk=job.pk).update(rows_done=rows_done, heartbeat_at=timezone.now())
+
+        try:
+            output = export_training_report(
+                selected_employees, selected_program, exclude_not_completed, progress)
+            with output:
+                job.file.save(job.filename, File(output), save=False)
+        except Exception as e:
+            logger.error('Ошибка при выполнении задачи экспорта #%s: %s', job.pk, e, exc_info=True)
+            ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_RUNNING).update(
+                status=ExportJob.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+            return
+
+        # С исключением сотрудников без обучения строк может оказаться меньше, чем сотрудников.
+        # Задачу, которую уже сочли прерванной, не возвращаем в «Готово»
+        finished = ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_RUNNING).update(
+            status=ExportJob.STATUS_DONE, file=job.file.name, rows_done=written['rows'],
+            rows_total=written['rows'], finished_at=timezone.now())
+        if not finished:
+            logger.warning('Задача экспорта #%s завершена после того, как была помечена прерванной', job.pk)
+            job.file.delete(save=False)
+            return
+        logger.info('Задача экспорта #%s завершена', job.pk)
+        self.stdout.write(f'Задача экспорта #{job.pk} завершена')
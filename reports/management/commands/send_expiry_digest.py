@@ -0,0 +1,129 @@
+import logging
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from employees.models import TrainingRecord
+from reports.models import ExpiryDigestEntry, ExpiryDigestWatermark
+
+logger = logging.getLogger('reports')
+
+NO_DEPARTMENT = 'Без подразделения'
+
+
+def collect_expiring(window_end, only_new=True):
+    """
+    Последние записи по программам с периодичностью, срок которых истек или истекает
+    до window_end, у работающих сотрудников — одним запросом по индексу next_due_date.
+    С only_new пропускаются записи, о которых с тем же сроком уже сообщили
+    (ExpiryDigestEntry): предупреждение приходит снова, только если срок изменился.
+    """
+    records = TrainingRecord.due_between(date.min, window_end).filter(employee__is_dismissed=False)
+    if only_new:
+        records = records.exclude(Exists(ExpiryDigestEntry.objects.filter(
+            record=OuterRef('pk'), due_date=OuterRef('next_due_date'))))
+    return records.order_by(
+        'employee__department__name', 'employee__last_name', 'employee__first_name', 'next_due_date',
+    ).values(
+        'pk', 'employee__department__name', 'employee__last_name', 'employee__first_name',
+        'employee__middle_name', 'training_program__name', 'completion_date', 'next_due_date')
+
+
+def group_by_department(rows, today):
+    for department, items in groupby(rows, key=lambda row: row['employee__department__name']):
+        yield department or NO_DEPARTMENT, [
+            {
+                'employee': ' '.join(filter(None, (
+                    row['employee__last_name'], row['employee__first_name'], row['employee__middle_name']))),
+                'program': row['training_program__name'],
+                'completion_date': row['completion_date'],
+                'due_date': row['next_due_date'],
+                'overdue': row['next_due_date'] < today,
+            }
+            for row in items
+        ]
+
+
+class Command(BaseCommand):
+    help = ('Отправляет по каждому подразделению сводку о сотрудниках, у которых срок обучения '
+            'истек или истекает в ближайшие дни; повторный запуск сообщает только о новых случаях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.EXPIRY_DIGEST_WINDOW_DAYS,
+            help='Окно предупреждения, дней'
+        )
+        parser.add_argument(
+            '--to',
+            nargs='+',
+            help='Адреса получателей (по умолчанию EXPIRY_DIGEST_RECIPIENTS)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Включить все истекающие сроки, а не только новые с прошлой сводки'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Вывести сводки без отправки и без сохранения отметки'
+        )
+
+    def handle(self, *args, **kwargs):
+        recipients = kwargs['to'] or settings.EXPIRY_DIGEST_RECIPIENTS
+        if not recipients and not kwargs['dry_run']:
+            raise CommandError('Не заданы получатели: укажите --to или EXPIRY_DIGEST_RECIPIENTS')
+        if kwargs['days'] < 0:
+            raise CommandError('Окно предупреждения не может быть отрицательным')
+
+        today = timezone.localdate()
+        now = timezone.now()
+        window_end = today + timedelta(days=kwargs['days'])
+        with transaction.atomic():
+            # Блокировка отметки не дает двум одновременным запускам отправить одно и то же.
+            # Строка создается заранее: блокировать отсутствующую строку при первом запуске нечем
+            ExpiryDigestWatermark.objects.get_or_create(pk=1)
+            watermark = ExpiryDigestWatermark.objects.select_for_update().get(pk=1)
+            rows = collect_expiring(window_end, only_new=not kwargs['full'])
+            entries = []
+
+            def remember(rows):
+                for row in rows:
+                    entries.append(ExpiryDigestEntry(record_id=row['pk'], due_date=row['next_due_date'], sent_at=now))
+                    yield row
+
+            messages = []
+            for department, items in group_by_department(remember(rows.iterator()), today):
+                body = render_to_string('reports/email/expiry_digest.txt', {
+                    'department': department,
+                    'items': items,
+                    'window_end': window_end,
+                })
+                subject = f'Истекающее обучение: {department} ({len(items)})'
+                messages.append(EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, recipients))
+
+            if kwargs['dry_run']:
+                for message in messages:
+                    self.stdout.write(f'{message.subject}\n{message.body}')
+                self.stdout.write(f'Сводок: {len(messages)} (не отправлены)')
+                return
+
+            # Все сводки уходят через одно соединение с почтовым сервером
+            sent = get_connection().send_messages(messages) if messages else 0
+            # Отметки о сроках, которые у записей уже изменились, больше ничего не скрывают
+            ExpiryDigestEntry.objects.exclude(due_date=F('record__next_due_date')).delete()
+            ExpiryDigestEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=1000)
+            watermark.sent_at = now
+            watermark.save(update_fields=['sent_at'])
+
+        logger.info('Отправлено сводок по истекающему обучению: %d, сроки до %s', sent, window_end)
+        self.stdout.write(self.style.SUCCESS(f'Отправлено сводок: {sent}'))
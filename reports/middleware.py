@@ -0,0 +1,15 @@
+from reports.cache import report_cache
+
+
+class ReportCacheGenerationMiddleware:
+    """
+    Сверяет поколение данных один раз за запрос и при смене очищает локальный кэш
+    процесса. Поколение сохраняется в request.data_version для ETag и Last-Modified.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.data_version = report_cache.sync()
+        return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_cachegeneration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachegeneration',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата изменения данных'),
+        ),
+    ]
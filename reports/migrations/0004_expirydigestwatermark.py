@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_cachegeneration_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiryDigestWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_through', models.DateField(verbose_name='Сроки учтены по дату')),
+                ('last_record_id', models.BigIntegerField(default=0, verbose_name='Последняя учтенная запись об обучении')),
+                ('sent_at', models.DateTimeField(verbose_name='Дата отправки')),
+            ],
+            options={
+                'verbose_name': 'Отметка сводки по истекающему обучению',
+                'verbose_name_plural': 'Отметки сводки по истекающему обучению',
+            },
+        ),
+    ]
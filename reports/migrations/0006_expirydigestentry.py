@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-18 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_sent_entries(apps, schema_editor):
+    # Предупреждения, отправленные по старой отметке, не должны прийти повторно
+    ExpiryDigestWatermark = apps.get_model('reports', 'ExpiryDigestWatermark')
+    ExpiryDigestEntry = apps.get_model('reports', 'ExpiryDigestEntry')
+    TrainingRecord = apps.get_model('employees', 'TrainingRecord')
+    watermark = ExpiryDigestWatermark.objects.filter(pk=1).first()
+    if watermark is None:
+        return
+    records = TrainingRecord.objects.filter(
+        next_due_date__lte=watermark.due_through, pk__lte=watermark.last_record_id,
+        employee__is_dismissed=False).values_list('pk', 'next_due_date')
+    ExpiryDigestEntry.objects.bulk_create(
+        (ExpiryDigestEntry(record_id=pk, due_date=due_date, sent_at=watermark.sent_at)
+         for pk, due_date in records.iterator()),
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0011_document_storage'),
+        ('reports', '0005_exportjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiryDigestEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField(verbose_name='Срок')),
+                ('sent_at', models.DateTimeField(verbose_name='Дата отправки')),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='employees.trainingrecord', verbose_name='Запись об обучении')),
+            ],
+            options={
+                'verbose_name': 'Отправленное предупреждение об истечении обучения',
+                'verbose_name_plural': 'Отправленные предупреждения об истечении обучения',
+                'unique_together': {('record', 'due_date')},
+            },
+        ),
+        migrations.RunPython(seed_sent_entries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='expirydigestwatermark',
+            name='last_record_id',
+        ),
+    ]
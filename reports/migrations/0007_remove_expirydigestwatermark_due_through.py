@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_expirydigestentry'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='expirydigestwatermark',
+            name='due_through',
+        ),
+        migrations.AlterField(
+            model_name='expirydigestwatermark',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки'),
+        ),
+    ]
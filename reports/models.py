@@ -1,3 +1,162 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
-# Create your models here.
+
+class ExportJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Готово'),
+        (STATUS_FAILED, 'Ошибка'),
+    )
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs',
+        verbose_name='Автор')
+    params = models.JSONField(
+        default=dict,
+        verbose_name='Параметры отчета')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+        verbose_name='Статус')
+    rows_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Всего строк')
+    rows_done = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано строк')
+    file = models.FileField(
+        upload_to='exports/',
+        blank=True,
+        null=True,
+        verbose_name='Файл отчета')
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания')
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата начала')
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последний сигнал обработчика')
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата завершения')
+
+    def __str__(self):
+        return f'Экспорт #{self.pk} от {self.created_by} ({self.get_status_display()})'
+
+    @property
+    def filename(self):
+        params = self.params or {}
+        is_filtered = params.get('employees') or params.get('program') or params.get('exclude_not_completed')
+        return "training_report_filtered.xlsx" if is_filtered else "training_report_all.xlsx"
+
+    class Meta:
+        verbose_name = 'Задача экспорта'
+        verbose_name_plural = 'Задачи экспорта'
+
+
+class CacheGeneration(models.Model):
+    """
+    Счетчик поколений данных отчетов (одна строка). Увеличивается сигналами при
+    изменении данных; каждый процесс сверяет его в начале запроса и очищает свой
+    локальный кэш, если поколение сменилось.
+    """
+    value = models.BigIntegerField(
+        default=0,
+        verbose_name='Поколение')
+    updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата изменения данных')
+
+    @classmethod
+    def current(cls):
+        return cls.state()[0]
+
+    @classmethod
+    def state(cls):
+        """Поколение и время последнего изменения данных; (0, None), пока данные не менялись."""
+        return cls.objects.filter(pk=1).values_list('value', 'updated_at').first() or (0, None)
+
+    @classmethod
+    def bump(cls):
+        now = timezone.now()
+        if not cls.objects.filter(pk=1).update(value=F('value') + 1, updated_at=now):
+            _, created = cls.objects.get_or_create(pk=1, defaults={'value': 1, 'updated_at': now})
+            if not created:
+                cls.objects.filter(pk=1).update(value=F('value') + 1, updated_at=now)
+
+    def __str__(self):
+        return f'Поколение данных {self.value}'
+
+    class Meta:
+        verbose_name = 'Поколение данных'
+        verbose_name_plural = 'Поколения данных'
+
+
+class ExpiryDigestWatermark(models.Model):
+    """
+    Отметка последней отправки сводки по истекающему обучению (одна строка).
+    Строка создается до формирования сводки и блокируется на все время работы,
+    чтобы два одновременных запуска (в том числе первых) не отправили одно и то же.
+    Какие предупреждения уже отправлены, хранит ExpiryDigestEntry.
+    """
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки')
+
+    def __str__(self):
+        if self.sent_at is None:
+            return 'Сводка еще не отправлялась'
+        return f'Сводка отправлена {self.sent_at:%d.%m.%Y %H:%M}'
+
+    class Meta:
+        verbose_name = 'Отметка сводки по истекающему обучению'
+        verbose_name_plural = 'Отметки сводки по истекающему обучению'
+
+
+class ExpiryDigestEntry(models.Model):
+    """
+    Предупреждение, уже отправленное в сводке: запись об обучении и срок, о котором
+    сообщили. Сводка пропускает пары, которые уже есть. Если срок записи изменился
+    (например, сократили периодичность программы) или сотрудник снова работает,
+    пары еще нет и предупреждение будет отправлено.
+    """
+    record = models.ForeignKey(
+        'employees.TrainingRecord',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Запись об обучении')
+    due_date = models.DateField(
+        verbose_name='Срок')
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки')
+
+    def __str__(self):
+        return f'{self.record} — срок {self.due_date:%d.%m.%Y}'
+
+    class Meta:
+        verbose_name = 'Отправленное предупреждение об истечении обучения'
+        verbose_name_plural = 'Отправленные предупреждения об истечении обучения'
+        unique_together = ('record', 'due_date')
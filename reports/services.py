@@ -1,57 +1,340 @@
 import logging
 from datetime import date, timedelta
 
-from employees.models import Employee, TrainingRecord
+import numpy as np
+from django.db.models import Count, DateField, Exists, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from reports.cache import ReportCache
+from employees.models import Employee, EmployeeProgramStatus
+from employees.pagination import KeysetPaginator
 from trainings.models import TrainingProgram
 
 logger = logging.getLogger('reports')
 
+NOT_COMPLETED = "Обучение не пройдено"
+
+# Коды статусов для векторной классификации и соответствующие CSS-классы
+STATUS_NOT_COMPLETED = 0
+STATUS_COMPLETED = 1
+STATUS_WARNING = 2
+STATUS_OVERDUE = 3
+STATUS_CLASSES = ('not-completed', 'completed', 'warning', 'overdue')
+
+
+def classify_statuses(completion_ordinals, recurrence_periods, today=None):
+    """
+    Классифицирует всю матрицу отчета за один проход.
+    completion_ordinals — порядковые номера дат прохождения (date.toordinal()), 0 — обучение не пройдено;
+    recurrence_periods — периодичность в годах, NaN — программа без периодичности.
+    Массивы приводятся друг к другу по правилам broadcasting, например (E, P) и (P,).
+    Возвращает массив кодов STATUS_* типа int8.
+    """
+    today_ordinal = (today or date.today()).toordinal()
+    completion = np.asarray(completion_ordinals, dtype=np.int64)
+    recurrence = np.asarray(recurrence_periods, dtype=np.float64)
+    # Сравнения с NaN ложны, поэтому программы без периодичности остаются пройденными
+    due = completion + recurrence * 365
+    codes = np.where(
+        today_ordinal > due,
+        STATUS_OVERDUE,
+        np.where(today_ordinal >= due - 30, STATUS_WARNING, STATUS_COMPLETED)
+    ).astype(np.int8)
+    codes[np.broadcast_to(completion <= 0, codes.shape)] = STATUS_NOT_COMPLETED
+    return codes
+
+
 class ReportService:
     @staticmethod
-    def generate_training_report(selected_employees=None, selected_program=None):
-        employees = Employee.objects.all()
+    def get_status_class(due_date, today):
+        """
+        Определяет статус обучения по дате следующего прохождения.
+        Без даты (программа без периодичности) обучение считается пройденным бессрочно.
+        """
+        if due_date is None:
+            return 'completed'
+        warning_date = due_date - timedelta(days=30)
+        if today > due_date:
+            return 'overdue'
+        if today >= warning_date:
+            return 'warning'
+        return 'completed'
+
+    @staticmethod
+    def latest_statuses(employees=None, program_ids=None):
+        """
+        Возвращает текущий статус для каждой пары (сотрудник, программа) из
+        денормализованной таблицы EmployeeProgramStatus одним запросом.
+        """
+        statuses = EmployeeProgramStatus.objects.all()
+        if employees is not None:
+            statuses = statuses.filter(employee__in=employees)
+        if program_ids is not None:
+            statuses = statuses.filter(training_program_id__in=program_ids)
+        return statuses.values(
+            'employee_id', 'training_program_id', 'completion_date', 'is_verified', 'due_date')
+
+    @staticmethod
+    def is_completed(data, selected_program=None):
+        """Проверяет, есть ли у строки отчета пройденное обучение (по выбранной программе или любой)."""
+        if selected_program and selected_program.isdigit():
+            return data['trainings'].get(int(selected_program), {}).get('date') != NOT_COMPLETED
+        return any(training.get('date') != NOT_COMPLETED for training in data['trainings'].values())
+
+    @staticmethod
+    def _report_scope(selected_employees=None, selected_program=None):
+        # Все построители отчета проходят здесь: нечисловые фильтры дают BadRequest (400), а не ошибку базы
+        filters = ReportCache.normalize_filters(selected_employees, selected_program)
+        employees = Employee.objects.select_related('position', 'department')
         training_programs = TrainingProgram.objects.all()
-        report_data = []
 
-        if selected_employees:
-            employees = employees.filter(pk__in=selected_employees)
+        if filters['employees']:
+            employees = employees.filter(pk__in=filters['employees'])
+
+        programs = list(training_programs)
+        if filters['program'] is not None:
+            programs = [program for program in programs if program.id == filters['program']]
+        return employees, training_programs, programs
+
+    @staticmethod
+    def _filtered_scope(selected_employees=None, selected_program=None, exclude_not_completed=False):
+        """
+        Сотрудники и программы отчета с фильтром «без обучения», выполненным в базе
+        (EXISTS по EmployeeProgramStatus), без загрузки строк отчета.
+        """
+        employees, _, programs = ReportService._report_scope(selected_employees, selected_program)
+        if selected_program and not programs:
+            employees = employees.none()
+        if exclude_not_completed:
+            statuses = EmployeeProgramStatus.objects.filter(employee=OuterRef('pk'))
+            if selected_program:
+                statuses = statuses.filter(training_program_id__in=[program.id for program in programs])
+            employees = employees.filter(Exists(statuses))
+        return employees, programs
+
+    @staticmethod
+    def _status_matrix(employee_ids, programs, statuses):
+        """
+        Сводит статусы в матрицы (сотрудники x программы): порядковые номера дат
+        прохождения (0 — не пройдено), признаки подтверждения и коды STATUS_*.
+        Возвращает (latest, completion_ordinals, verified, status_codes), latest —
+        записи статусов по ключу (сотрудник, программа).
+        """
+        latest = {
+            (record['employee_id'], record['training_program_id']): record
+            for record in statuses
+        }
+
+        completion_ordinals = np.zeros((len(employee_ids), len(programs)), dtype=np.int64)
+        verified = np.zeros((len(employee_ids), len(programs)), dtype=np.int8)
+        employee_index = {employee_id: row for row, employee_id in enumerate(employee_ids)}
+        program_index = {program.id: column for column, program in enumerate(programs)}
+        for (employee_id, program_id), record in latest.items():
+            row = employee_index.get(employee_id)
+            column = program_index.get(program_id)
+            if row is not None and column is not None:
+                completion_ordinals[row, column] = record['completion_date'].toordinal()
+                verified[row, column] = record['is_verified']
+        recurrence_periods = np.array(
+            [np.nan if program.recurrence_period is None else program.recurrence_period for program in programs],
+            dtype=np.float64)
+        status_codes = classify_statuses(completion_ordinals, recurrence_periods)
+        return latest, completion_ordinals, verified, status_codes
+
+    @staticmethod
+    def _build_report_rows(employees, programs, statuses):
+        """Сводит статусы в матрицу (сотрудники x программы) и формирует строки отчета."""
+        report_data = []
+        latest, _, _, status_codes = ReportService._status_matrix(
+            [employee.pk for employee in employees], programs, statuses)
+        status_codes = status_codes.tolist()
 
-        for employee in employees:
+        for employee, employee_codes in zip(employees, status_codes):
             employee_data = {'employee': employee, 'trainings': {}}
-            for program in training_programs:
-                if selected_program and str(program.id) != selected_program:
-                    continue
-                records = TrainingRecord.objects.filter(
-                    employee=employee, training_program=program
-                ).order_by('-completion_date')
-                if records.exists():
-                    latest_record = records.first()
-                    status_class = 'completed'
-                    # Проверяем, есть ли training_program и recurrence_period
-                    if hasattr(latest_record, 'training_program') and latest_record.training_program.recurrence_period is not None:
-                        next_training_date = latest_record.completion_date + timedelta(
-                            days=latest_record.training_program.recurrence_period * 365
-                        )
-                        today = date.today()
-                        warning_date = next_training_date - timedelta(days=30)
-                        if today > next_training_date:
-                            status_class = 'overdue'
-                        elif today >= warning_date:
-                            status_class = 'warning'
-                    else:
-                        # Если recurrence_period не задан, оставляем статус completed
-                        logger.debug(f"No recurrence_period for TrainingProgram {latest_record.training_program} (Employee: {employee})")
+            for program, status_code in zip(programs, employee_codes):
+                if status_code == STATUS_NOT_COMPLETED:
                     employee_data['trainings'][program.id] = {
-                        'date': latest_record.completion_date,
-                        'class': status_class,
-                        'is_verified': latest_record.is_verified
+                        'date': NOT_COMPLETED,
+                        'class': 'not-completed',
+                        'is_verified': False
                     }
                 else:
+                    latest_record = latest[(employee.pk, program.id)]
                     employee_data['trainings'][program.id] = {
-                        'date': "Обучение не пройдено",
-                        'class': 'not-completed',
-                        'is_verified': False
+                        'date': latest_record['completion_date'],
+                        'class': STATUS_CLASSES[status_code],
+                        'is_verified': latest_record['is_verified']
                     }
             report_data.append(employee_data)
+        return report_data
+
+    @staticmethod
+    def generate_training_report(selected_employees=None, selected_program=None):
+        employees, training_programs, programs = ReportService._report_scope(
+            selected_employees, selected_program)
+        statuses = ReportService.latest_statuses(
+            employees if selected_employees else None,
+            [program.id for program in programs] if selected_program else None)
+        report_data = ReportService._build_report_rows(list(employees), programs, statuses)
+        return report_data, training_programs
+
+    @staticmethod
+    def get_report(selected_employees=None, selected_program=None, exclude_not_completed=False):
+        """
+        Отчет с примененными фильтрами, кэшируется по нормализованным фильтрам.
+        Возвращает (report_data, training_programs), программы — списком.
+        """
+        filters = ReportCache.normalize_filters(selected_employees, selected_program, exclude_not_completed)
+        employees = [str(pk) for pk in filters['employees']]
+        program = str(filters['program']) if filters['program'] is not None else None
+
+        def build():
+            report_data, training_programs = ReportService.generate_training_report(employees, program)
+            if filters['exclude_not_completed']:
+                report_data = [data for data in report_data if ReportService.is_completed(data, program)]
+            return report_data, list(training_programs)
+
+        return ReportCache.get_or_build(filters, build)
+
+    @staticmethod
+    def iter_training_report(selected_employees=None, selected_program=None, chunk_size=1000, on_chunk=None):
+        """
+        Формирует строки отчета пакетами по chunk_size сотрудников, не держа в памяти весь отчет.
+        Сотрудники перебираются по возрастанию pk; on_chunk() вызывается перед выборкой
+        каждого пакета (два запроса: сотрудники и их статусы).
+        """
+        employees, _, programs = ReportService._report_scope(selected_employees, selected_program)
+        program_ids = [program.id for program in programs] if selected_program else None
+        last_pk = 0
+        while True:
+            if on_chunk:
+                on_chunk()
+            chunk = list(employees.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+            if not chunk:
+                return
+            statuses = ReportService.latest_statuses([employee.pk for employee in chunk], program_ids)
+            yield from ReportService._build_report_rows(chunk, programs, statuses)
+            last_pk = chunk[-1].pk
+
+    @staticmethod
+    def report_page(selected_employees=None, selected_program=None, exclude_not_completed=False,
+                    sort_by='last_name', sort_order='asc', cursor=None, per_page=100, count_mode=None):
+        """
+        Одна порция отчета для постраничной загрузки. Фильтр «без обучения» и сортировка
+        выполняются в базе, сотрудники выбираются по ключу сортировки (KeysetPaginator),
+        а статусы вычисляются только для сотрудников порции.
+        Возвращает (page, report_data, programs); курсор следующей порции — page.next_cursor,
+        общее число строк (при count_mode) — page.paginator.count.
+        """
+        employees, programs = ReportService._filtered_scope(
+            selected_employees, selected_program, exclude_not_completed)
+        program_ids = [program.id for program in programs]
+
+        prefix = '-' if sort_order == 'desc' else ''
+        ordering = [f'{prefix}last_name', f'{prefix}first_name', f'{prefix}middle_name']
+        if sort_by and sort_by.isdigit() and int(sort_by) in program_ids:
+            # Не пройденное обучение сортируется как самая ранняя дата
+            completion = EmployeeProgramStatus.objects.filter(
+                employee=OuterRef('pk'), training_program_id=int(sort_by)).values('completion_date')[:1]
+            employees = employees.annotate(sort_date=Coalesce(
+                Subquery(completion), Value(date.min), output_field=DateField()))
+            ordering = [f'{prefix}sort_date', 'last_name', 'first_name', 'middle_name']
+
+        paginator = KeysetPaginator(employees.order_by(*ordering), per_page, count_mode)
+        page = paginator.page(cursor)
+        statuses = ReportService.latest_statuses(
+            [employee.pk for employee in page.object_list], program_ids if selected_program else None)
+        report_data = ReportService._build_report_rows(page.object_list, programs, statuses)
+        return page, report_data, programs
+
+    @staticmethod
+    def report_matrix(selected_employees=None, selected_program=None, exclude_not_completed=False):
+        """
+        Матрица отчета в колоночном виде для API: идентификаторы и ФИО сотрудников и
+        программы перечисляются один раз, а ячейки передаются плоскими массивами
+        по строкам (индекс ячейки — строка * число программ + столбец):
+        status — коды STATUS_*, completion — порядковые номера дат прохождения
+        (date.toordinal(), 0 — не пройдено), verified — 0/1.
+        """
+        employees, programs = ReportService._filtered_scope(
+            selected_employees, selected_program, exclude_not_completed)
+        program_ids = [program.id for program in programs]
+        employee_rows = list(
+            employees.order_by('last_name', 'first_name', 'middle_name', 'pk')
+            .values_list('pk', 'last_name', 'first_name', 'middle_name'))
+        employee_ids = [row[0] for row in employee_rows]
+        statuses = ReportService.latest_statuses(
+            employees.values('pk') if selected_employees or exclude_not_completed else None,
+            program_ids if selected_program else None)
+        _, completion_ordinals, verified, status_codes = ReportService._status_matrix(
+            employee_ids, programs, statuses)
+        return {
+            'employees': {
+                'id': employee_ids,
+                'name': [' '.join(filter(None, row[1:])) for row in employee_rows],
+            },
+            'programs': {
+                'id': program_ids,
+                'name': [program.name for program in programs],
+            },
+            'shape': [len(employee_ids), len(programs)],
+            'status_classes': STATUS_CLASSES,
+            'status': status_codes.ravel().tolist(),
+            'completion': completion_ordinals.ravel().tolist(),
+            'verified': verified.ravel().tolist(),
+        }
+
+    @staticmethod
+    def summary(selected_employees=None, selected_program=None, exclude_not_completed=False, today=None):
+        """
+        Число сотрудников по статусам (пройдено, скоро истекает, просрочено, не пройдено)
+        для каждой программы в разрезе подразделений — одним агрегирующим запросом
+        с условными COUNT (FILTER в PostgreSQL) без построения матрицы отчета.
+        Правила статусов совпадают с classify_statuses.
+        """
+        today = today or date.today()
+        warning_from = today + timedelta(days=30)
+        employees, programs = ReportService._filtered_scope(
+            selected_employees, selected_program, exclude_not_completed)
+        status_filters = {
+            'completed': Q(training_statuses__due_date__isnull=True) | Q(training_statuses__due_date__gt=warning_from),
+            'warning': Q(training_statuses__due_date__gte=today, training_statuses__due_date__lte=warning_from),
+            'overdue': Q(training_statuses__due_date__lt=today),
+        }
+        aggregates = {'total': Count('pk', distinct=True)}
+        for program in programs:
+            for status, condition in status_filters.items():
+                aggregates[f'{status}_{program.id}'] = Count(
+                    'training_statuses', filter=Q(training_statuses__training_program_id=program.id) & condition)
+        rows = (
+            employees.order_by()
+            .values('department_id', 'department__name')
+            .annotate(**aggregates)
+            .order_by('department__name')
+        )
+
+        def counts(row, program):
+            result = {status: row[f'{status}_{program.id}'] for status in status_filters}
+            result['not_completed'] = row['total'] - sum(result.values())
+            return result
 
-        return report_data, training_programs
\ No newline at end of file
+        departments = [
+            {
+                'id': row['department_id'],
+                'name': row['department__name'],
+                'total': row['total'],
+                'programs': [counts(row, program) for program in programs],
+            }
+            for row in rows
+        ]
+        totals = [
+            {status: sum(department['programs'][column][status] for department in departments)
+             for status in ('completed', 'warning', 'overdue', 'not_completed')}
+            for column in range(len(programs))
+        ]
+        return {
+            'programs': programs,
+            'total': sum(department['total'] for department in departments),
+            'totals': totals,
+            'departments': departments,
+        }
@@ -1,3 +1,519 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+import tracemalloc
+from collections import Counter
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.exceptions import BadRequest
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from departments.models import Department
+from employees.models import Employee, EmployeeProgramStatus, TrainingRecord
+from reports.cache import MAX_EMPLOYEE_TAGS, TAG_ALL, TAG_NAMESPACE, ReportCache, report_cache
+from reports.export import export_training_report
+from reports.management.commands.run_export_worker import Command as ExportWorker
+from reports.models import CacheGeneration, ExpiryDigestWatermark, ExportJob
+from reports.services import ReportService
+from trainings.models import TrainingProgram
+
+
+# Бюджет запросов потокового экспорта растет с числом пакетов сотрудников
+@override_settings(QUERY_BUDGET_MODE='raise')
+class StreamingExportTest(TestCase):
+    EMPLOYEES = 20_000
+    # Потолок пиковой памяти Python-объектов при потоковом экспорте
+    MEMORY_CEILING = 32 * 1024 * 1024
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exporter', password='password')
+        programs = TrainingProgram.objects.bulk_create(
+            TrainingProgram(name=f'Программа {index}', recurrence_period=index or None) for index in range(4))
+        employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index}', first_name='Иван', middle_name='Петрович')
+            for index in range(cls.EMPLOYEES))
+        today = date.today()
+        TrainingRecord.objects.bulk_create(
+            TrainingRecord(
+                employee=employee,
+                training_program=program,
+                completion_date=today - timedelta(days=(index * 7 + program.pk) % 1500))
+            for index, employee in enumerate(employees)
+            for program in programs
+            if (index + program.pk) % 3)
+        EmployeeProgramStatus.rebuild()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('reports:export_report'), {'mode': 'stream', **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_streaming_export_memory_ceiling(self):
+        tracemalloc.start()
+        try:
+            content = self.export()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, self.MEMORY_CEILING)
+        ws = load_workbook(BytesIO(content), read_only=True).active
+        self.assertEqual(sum(1 for _ in ws.iter_rows(values_only=True)), self.EMPLOYEES + 1)
+
+    def test_streaming_export_matches_in_memory_export(self):
+        employees = [str(pk) for pk in Employee.objects.order_by('pk').values_list('pk', flat=True)[:50]]
+        streamed = load_workbook(BytesIO(self.export(employees=employees)))
+        response = self.client.get(reverse('reports:export_report'), {'employees': employees})
+        in_memory = load_workbook(BytesIO(response.content))
+        streamed_rows = self.rows_with_fills(streamed.active)
+        in_memory_rows = self.rows_with_fills(in_memory.active)
+        self.assertEqual(streamed_rows[0], in_memory_rows[0])
+        self.assertCountEqual(streamed_rows[1:], in_memory_rows[1:])
+
+    @staticmethod
+    def rows_with_fills(ws):
+        return [
+            tuple((cell.value, cell.fill.start_color.rgb if cell.fill.fill_type else None) for cell in row)
+            for row in ws.iter_rows()
+        ]
+
+
+
+class ExportJobTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exporter', password='password')
+        program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+        employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index}', first_name='Иван') for index in range(5))
+        TrainingRecord.objects.bulk_create(
+            TrainingRecord(employee=employee, training_program=program, completion_date=date.today())
+            for employee in employees)
+        EmployeeProgramStatus.rebuild()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def run_worker(self):
+        call_command('run_export_worker', '--once', '--progress-every', '2', stdout=StringIO())
+
+    def test_job_claimed_once_and_downloaded(self):
+        response = self.client.post(reverse('reports:export_job_create'))
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], ExportJob.STATUS_PENDING)
+
+        job = ExportWorker.claim_next_job()
+        self.assertEqual(job.status, ExportJob.STATUS_RUNNING)
+        self.assertIsNotNone(job.heartbeat_at)
+        # Второй обработчик эту задачу уже не захватит
+        self.assertIsNone(ExportWorker.claim_next_job())
+
+        ExportWorker(stdout=StringIO()).run_job(job, progress_every=2)
+        status = self.client.get(status_url).json()
+        self.assertEqual(status['status'], ExportJob.STATUS_DONE)
+        self.assertEqual((status['rows_done'], status['rows_total']), (5, 5))
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        ws = load_workbook(BytesIO(b''.join(download.streaming_content)), read_only=True).active
+        self.assertEqual(sum(1 for _ in ws.iter_rows(values_only=True)), 6)
+
+    def test_progress_updates_heartbeat(self):
+        job = ExportJob.objects.create(created_by=self.user)
+        saved = []
+
+        def export(employees, program, exclude_not_completed, progress):
+            def tracked(rows_done):
+                progress(rows_done)
+                saved.append(ExportJob.objects.values_list('rows_done', 'heartbeat_at').get(pk=job.pk))
+            return export_training_report(employees, program, exclude_not_completed, tracked)
+
+        with mock.patch('reports.management.commands.run_export_worker.export_training_report', export):
+            self.run_worker()
+        self.assertEqual([rows_done for rows_done, _ in saved], [0, 2, 2, 4, 4])
+        # Каждое сохранение прогресса продлевает сигнал обработчика
+        self.assertLess(saved[0][1], saved[-1][1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_DONE)
+
+    def test_stale_running_job_failed(self):
+        started_at = timezone.now() - timedelta(hours=1)
+        stale = ExportJob.objects.create(
+            created_by=self.user, status=ExportJob.STATUS_RUNNING, started_at=started_at, heartbeat_at=started_at)
+        alive = ExportJob.objects.create(
+            created_by=self.user, status=ExportJob.STATUS_RUNNING, started_at=started_at, heartbeat_at=timezone.now())
+        self.run_worker()
+
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, ExportJob.STATUS_FAILED)
+        self.assertTrue(stale.error)
+        self.assertEqual(alive.status, ExportJob.STATUS_RUNNING)
+        status = self.client.get(reverse('reports:export_job_status', kwargs={'pk': stale.pk})).json()
+        self.assertEqual(status['status'], ExportJob.STATUS_FAILED)
+
+        # Обработчик прерванной задачи все же закончил: задача остается ошибочной
+        ExportWorker(stdout=StringIO()).run_job(stale, progress_every=2)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ExportJob.STATUS_FAILED)
+        self.assertFalse(stale.file)
+
+class ReportRowsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='password')
+        cls.program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+        employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index:03}', first_name='Иван') for index in range(250))
+        TrainingRecord.objects.bulk_create(
+            TrainingRecord(employee=employee, training_program=cls.program,
+                           completion_date=date.today() - timedelta(days=index))
+            for index, employee in enumerate(employees) if index % 2)
+        EmployeeProgramStatus.rebuild()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch_all(self, **params):
+        url = reverse('reports:report_rows')
+        chunk = self.client.get(url, {'per_page': 100, **params}).json()
+        count, rows = chunk['count'], chunk['rows']
+        while chunk['next']:
+            chunk = self.client.get(url, {'per_page': 100, 'cursor': chunk['next'], **params}).json()
+            self.assertLessEqual(len(chunk['rows']), 100)
+            rows += chunk['rows']
+        return count, rows
+
+    def test_chunks_cover_report_once(self):
+        count, rows = self.fetch_all(program=self.program.pk)
+        self.assertEqual(count, 250)
+        self.assertEqual([row['name'] for row in rows], [f'Сотрудник{index:03} И.' for index in range(250)])
+        self.assertEqual(rows[0]['cells'], [['not-completed', None, False]])
+        self.assertEqual(rows[1]['cells'][0][0], 'completed')
+
+    def test_exclude_not_completed_and_sort_by_program(self):
+        count, rows = self.fetch_all(
+            program=self.program.pk, exclude_not_completed='on', sort_by=self.program.pk, sort_order='desc')
+        self.assertEqual(count, 125)
+        self.assertEqual([row['name'] for row in rows], [f'Сотрудник{index:03} И.' for index in range(1, 250, 2)])
+
+    def test_rows_reject_invalid_filters(self):
+        for params in ({'employees': 'abc'}, {'employees': ['1', '2;'], 'program': self.program.pk},
+                       {'program': 'abc'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('reports:report_rows'), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_matrix_matches_rows(self):
+        _, rows = self.fetch_all(program=self.program.pk)
+        response = self.client.get(
+            reverse('reports:report_matrix'), {'program': self.program.pk}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        matrix = json.loads(gzip.decompress(response.content))
+        self.assertEqual(matrix['shape'], [250, 1])
+        response = self.client.get(reverse('reports:report_matrix'), {'employees': ['1', 'abc']})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(matrix['employees']['id'], [row['id'] for row in rows])
+        self.assertEqual([matrix['status_classes'][code] for code in matrix['status']],
+                         [row['cells'][0][0] for row in rows])
+        self.assertEqual(
+            [date.fromordinal(ordinal).strftime('%d.%m.%y') if ordinal else None for ordinal in matrix['completion']],
+            [row['cells'][0][1] for row in rows])
+
+    def test_summary_matches_report(self):
+        summary = ReportService.summary(selected_program=str(self.program.pk))
+        report_data, _ = ReportService.generate_training_report(selected_program=str(self.program.pk))
+        classes = Counter(data['trainings'][self.program.pk]['class'] for data in report_data)
+        self.assertEqual(summary['total'], 250)
+        self.assertEqual(summary['totals'], [{
+            'completed': classes['completed'], 'warning': classes['warning'],
+            'overdue': classes['overdue'], 'not_completed': classes['not-completed'],
+        }])
+
+
+
+class ReportCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='password')
+        cls.programs = TrainingProgram.objects.bulk_create(
+            TrainingProgram(name=name, recurrence_period=3) for name in ('Охрана труда', 'Первая помощь'))
+        cls.employees = Employee.objects.bulk_create(
+            Employee(last_name=f'Сотрудник{index}', first_name='Иван') for index in range(2))
+
+    def setUp(self):
+        report_cache.clear()
+        first, second = self.employees
+        program, other_program = self.programs
+        self.filters = {
+            'first_employee': ReportCache.normalize_filters([first.pk]),
+            'second_employee': ReportCache.normalize_filters([str(second.pk)], exclude_not_completed=True),
+            'program': ReportCache.normalize_filters(selected_program=str(program.pk)),
+            'other_program': ReportCache.normalize_filters(selected_program=other_program.pk),
+            'all': ReportCache.normalize_filters(),
+        }
+        for filters in self.filters.values():
+            ReportCache.get_or_build(filters, lambda: 'cached')
+
+    def surviving(self):
+        """Наборы фильтров, данные которых остались в кэше (и L1, и L2 уже очищены или сверены)."""
+        return sorted(name for name, filters in self.filters.items()
+                      if ReportCache.get_or_build(filters, lambda: 'rebuilt') == 'cached')
+
+    def test_training_record_change(self):
+        ReportCache.invalidate(employee_ids=[self.employees[0].pk], program_ids=[self.programs[0].pk])
+        self.assertEqual(self.surviving(), ['other_program', 'second_employee'])
+
+    def test_employee_change(self):
+        ReportCache.invalidate(employee_ids=[self.employees[1].pk], roster=True)
+        self.assertEqual(self.surviving(), ['first_employee'])
+
+    def test_program_change(self):
+        ReportCache.invalidate(program_ids=[self.programs[1].pk], programs=True)
+        self.assertEqual(self.surviving(), ['program'])
+
+    def test_invalidate_all(self):
+        ReportCache.invalidate_all()
+        self.assertEqual(self.surviving(), [])
+
+    def test_signal_invalidates_only_affected_employee(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainingRecord.objects.create(
+                employee=self.employees[0], training_program=self.programs[1], completion_date=date.today())
+        self.assertEqual(self.surviving(), ['program', 'second_employee'])
+
+    def test_large_selection_depends_on_all(self):
+        filters = ReportCache.normalize_filters(range(1, MAX_EMPLOYEE_TAGS + 2))
+        self.assertEqual(ReportCache.dependencies(filters), [TAG_NAMESPACE, TAG_ALL])
+        ReportCache.get_or_build(filters, lambda: 'cached')
+        ReportCache.invalidate(program_ids=[self.programs[1].pk], programs=True)
+        self.assertEqual(ReportCache.get_or_build(filters, lambda: 'rebuilt'), 'rebuilt')
+
+    def test_normalize_filters(self):
+        first, second = self.employees
+        self.assertEqual(ReportCache.normalize_filters([str(second.pk), first.pk, str(first.pk)], '', 'on'), {
+            'employees': sorted([first.pk, second.pk]), 'program': None, 'exclude_not_completed': True})
+        with self.assertRaises(BadRequest):
+            ReportCache.normalize_filters(selected_program='abc')
+        with self.assertRaises(BadRequest):
+            ReportCache.normalize_filters(['1', 'x'])
+
+    def test_export_rejects_invalid_program(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('reports:export_report'), {'program': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_report_views_reject_invalid_employees(self):
+        self.client.force_login(self.user)
+        for url, params in (
+            (reverse('reports:report_list'), {'employees': 'abc'}),
+            (reverse('reports:export_report'), {'employees': 'abc'}),
+            (reverse('reports:export_report'), {'employees': 'abc', 'mode': 'stream'}),
+        ):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+        response = self.client.post(reverse('reports:export_job_create'), {'employees': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ExportJob.objects.exists())
+
+
+class TwoTierReportCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='password')
+
+    def setUp(self):
+        report_cache.clear()
+        ReportCache.reset_stats()
+        self.filters = ReportCache.normalize_filters()
+
+    def test_local_hit_needs_no_queries(self):
+        self.assertEqual(ReportCache.get_or_build(self.filters, lambda: 'data'), 'data')
+        builder = mock.Mock()
+        with self.assertNumQueries(0):
+            self.assertEqual(ReportCache.get_or_build(self.filters, builder), 'data')
+        builder.assert_not_called()
+
+    def test_shared_cache_fills_empty_local_cache(self):
+        ReportCache.get_or_build(self.filters, lambda: 'data')
+        # Локальный кэш другого процесса пуст, данные берутся из общего
+        report_cache.cache.clear()
+        builder = mock.Mock()
+        self.assertEqual(ReportCache.get_or_build(self.filters, builder), 'data')
+        builder.assert_not_called()
+        with self.assertNumQueries(0):
+            ReportCache.get_or_build(self.filters, builder)
+        self.assertEqual(ReportCache.stats()['misses'], 1)
+
+    def test_middleware_clears_local_cache_when_generation_changes(self):
+        self.client.force_login(self.user)
+        url = reverse('trainings:training_list')
+        self.client.get(url)
+        report_cache.cache.set('marker', 'data')
+        response = self.client.get(url)
+        self.assertEqual(report_cache.cache.get('marker'), 'data')
+        self.assertEqual(response.wsgi_request.data_version, CacheGeneration.state())
+
+        # Данные изменил другой процесс: локальный кэш этого процесса устарел
+        CacheGeneration.bump()
+        response = self.client.get(url)
+        self.assertIsNone(report_cache.cache.get('marker'))
+        self.assertEqual(response.wsgi_request.data_version, CacheGeneration.state())
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='password')
+        cls.program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=3)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_not_modified_until_data_changes(self):
+        url = reverse('reports:report_matrix')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Last-Modified', response)
+
+    def test_report_revalidated_next_day(self):
+        tomorrow = date.today() + timedelta(days=1)
+        for url_name in ('reports:report_list', 'reports:report_rows', 'reports:report_matrix',
+                         'reports:export_report'):
+            with self.subTest(url_name=url_name):
+                url = reverse(url_name)
+                # Первый ответ страницы с формами выставляет CSRF-cookie, которая входит в ETag
+                self.client.get(url)
+                response = self.client.get(url)
+                etag, last_modified = response['ETag'], response['Last-Modified']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+                # Данные не менялись, но после полуночи статусы сроков могли измениться
+                with mock.patch('reports.conditional.date', wraps=date) as today:
+                    today.today.return_value = tomorrow
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertNotEqual(response['ETag'], etag)
+                    response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        url = reverse('trainings:training_list')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(User.objects.create_user('other', password='password'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExpiryDigestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = TrainingProgram.objects.create(name='Охрана труда', recurrence_period=1)
+        cls.departments = Department.objects.bulk_create(
+            Department(name=name) for name in ('Бухгалтерия', 'Учебная часть'))
+        today = date.today()
+        for index, department in enumerate(cls.departments):
+            employee = Employee.objects.create(last_name=f'Сотрудник{index}', first_name='Иван', department=department)
+            TrainingRecord.objects.create(
+                employee=employee, training_program=cls.program, completion_date=today - timedelta(days=350 + index))
+        # Срок далеко за окном предупреждения
+        employee = Employee.objects.create(last_name='Сотрудник2', first_name='Иван', department=cls.departments[0])
+        TrainingRecord.objects.create(employee=employee, training_program=cls.program, completion_date=today)
+
+    def send(self, *args):
+        call_command('send_expiry_digest', '--to', 'hr@example.com', *args, stdout=StringIO())
+
+    def test_one_digest_per_department_and_only_new_warnings(self):
+        self.send()
+        self.assertEqual(sorted(message.subject for message in mail.outbox),
+                         ['Истекающее обучение: Бухгалтерия (1)', 'Истекающее обучение: Учебная часть (1)'])
+        self.assertIn('Сотрудник0 Иван', mail.outbox[0].body)
+
+        mail.outbox.clear()
+        self.send()
+        self.assertEqual(mail.outbox, [])
+
+        employee = Employee.objects.create(last_name='Сотрудник3', first_name='Иван', department=self.departments[1])
+        TrainingRecord.objects.create(
+            employee=employee, training_program=self.program, completion_date=date.today() - timedelta(days=400))
+        self.send()
+        self.assertEqual([message.subject for message in mail.outbox], ['Истекающее обучение: Учебная часть (1)'])
+        self.assertIn('просрочено', mail.outbox[0].body)
+
+    def test_watermark_row_created_before_lock(self):
+        self.assertFalse(ExpiryDigestWatermark.objects.exists())
+        self.send('--dry-run')
+        # Первый запуск создает строку отметки, которую блокируют следующие запуски
+        watermark = ExpiryDigestWatermark.objects.get()
+        self.assertIsNone(watermark.sent_at)
+        self.assertEqual(mail.outbox, [])
+
+        self.send()
+        watermark.refresh_from_db()
+        self.assertIsNotNone(watermark.sent_at)
+        self.assertEqual(ExpiryDigestWatermark.objects.count(), 1)
+
+    def test_warning_sent_when_due_date_enters_window_without_new_record(self):
+        self.send()
+        mail.outbox.clear()
+
+        # Срок записи, далекой от окна, приблизился после сокращения периодичности
+        other_program = TrainingProgram.objects.create(name='Первая помощь', recurrence_period=3)
+        employee = Employee.objects.get(last_name='Сотрудник0')
+        TrainingRecord.objects.create(
+            employee=employee, training_program=other_program, completion_date=date.today() - timedelta(days=360))
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        other_program.recurrence_period = 1
+        other_program.save()
+        self.send()
+        self.assertEqual([message.subject for message in mail.outbox], ['Истекающее обучение: Бухгалтерия (1)'])
+        self.assertIn('Первая помощь', mail.outbox[0].body)
+
+        # Сотрудник уволен до сводки и снова принят: предупреждение приходит после возвращения
+        mail.outbox.clear()
+        employee = Employee.objects.create(
+            last_name='Сотрудник4', first_name='Иван', department=self.departments[1], is_dismissed=True)
+        TrainingRecord.objects.create(
+            employee=employee, training_program=self.program, completion_date=date.today() - timedelta(days=400))
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        employee.is_dismissed = False
+        employee.save()
+        self.send()
+        self.assertEqual([message.subject for message in mail.outbox], ['Истекающее обучение: Учебная часть (1)'])
+
+        mail.outbox.clear()
+        self.send()
+        self.assertEqual(mail.outbox, [])
@@ -1,9 +1,17 @@
 from django.urls import path
-from .views import ReportsView, ExportReportView
+from .views import (
+    ReportsView, ReportRowsView, ReportMatrixView, ExportReportView, ExportJobCreateView, ExportJobStatusView,
+    ExportJobDownloadView,
+)
 
 app_name = 'reports'
 
 urlpatterns = [
     path('', ReportsView.as_view(), name='report_list'),
+    path('api/rows/', ReportRowsView.as_view(), name='report_rows'),
+    path('api/matrix/', ReportMatrixView.as_view(), name='report_matrix'),
     path('export/', ExportReportView.as_view(), name='export_report'),
+    path('export/jobs/', ExportJobCreateView.as_view(), name='export_job_create'),
+    path('export/jobs/<int:pk>/', ExportJobStatusView.as_view(), name='export_job_status'),
+    path('export/jobs/<int:pk>/download/', ExportJobDownloadView.as_view(), name='export_job_download'),
 ]
\ No newline at end of file
@@ -1,24 +1,33 @@
 import logging
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.gzip import gzip_page
 from django.views.generic import TemplateView
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment
 
 from departments.models import Department
 from employees.models import Employee
-from reports.services import ReportService
+from monitoring.budget import extend_budget
+from reports.cache import ReportCache
+from reports.conditional import ConditionalGetMixin
+from reports.export import TrainingReportExport, XLSX_CONTENT_TYPE, export_training_report
+from reports.models import ExportJob
+from reports.services import NOT_COMPLETED, ReportService
 from employees.views import log_view_action
 from trainings.models import TrainingProgram
 
 logger = logging.getLogger('reports')
 
 
-class ReportsView(LoginRequiredMixin, TemplateView):
+class ReportsView(LoginRequiredMixin, ConditionalGetMixin, TemplateView):
     template_name = 'reports/report_list.html'
     permission_required = 'employees.view_report'
+    daily_data = True
+    query_budget = 17
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -27,46 +36,17 @@ class ReportsView(LoginRequiredMixin, TemplateView):
         exclude_not_completed = self.request.GET.get('exclude_not_completed') == 'on'
         selected_employees = [emp for emp in selected_employees if emp]
         logger.debug("Selected employees after filtering: %s", selected_employees)
-        report_data, training_programs = ReportService.generate_training_report(
-            selected_employees, selected_program)
-
-        if selected_employees:
-            report_data = [
-                data for data in report_data if str(data['employee'].pk) in selected_employees]
-
-        if exclude_not_completed:
-            if selected_program and selected_program.isdigit():
-                report_data = [
-                    data for data in report_data
-                    if data['trainings'].get(int(selected_program), {}).get('date') != "Обучение не пройдено"
-                ]
-            else:
-                report_data = [
-                    data for data in report_data
-                    if any(
-                        training.get('date') != "Обучение не пройдено"
-                        for training in data['trainings'].values()
-                    )
-                ]
-        logger.debug("Report data length after filtering: %s", len(report_data))
-
-        # Сортировка по ФИО сотрудника
+
+        # Строки отчета страница не формирует: таблица подгружает их порциями из ReportRowsView
         sort_by = self.request.GET.get('sort_by', 'last_name')  # По умолчанию сортировка по ФИО
         sort_order = self.request.GET.get('sort_order', 'asc')  # По умолчанию по возрастанию
-        if sort_by == 'last_name':
-            report_data.sort(
-                key=lambda x: x['employee'].last_name.lower(),
-                reverse=(sort_order == 'desc')
-            )
-        elif sort_by and sort_by.isdigit() and int(sort_by) in [program.id for program in training_programs]:
-            report_data.sort(
-                key=lambda x: x['trainings'].get(int(sort_by), {}).get('date', 'Обучение не пройдено'),
-                reverse=(sort_order == 'desc')
-            )
-
-        context['report_data'] = report_data
-        context['training_programs'] = training_programs
-        context['employees'] = Employee.objects.all().order_by('last_name')  # Сортировка сотрудников в фильтре
+
+        context['training_programs'] = TrainingProgram.objects.all()
+        # Сводка по статусам считается в базе одним агрегирующим запросом, без матрицы отчета
+        context['summary'] = ReportService.summary(selected_employees, selected_program, exclude_not_completed)
+        # В фильтр выводятся только выбранные сотрудники, остальные подбираются поиском (employees:employee_search)
+        context['selected_employee_list'] = Employee.objects.filter(
+            pk__in=[emp for emp in selected_employees if emp.isdigit()]).order_by('last_name', 'first_name')
         context['departments'] = Department.objects.all()
         context['selected_employees'] = selected_employees
         context['selected_program'] = selected_program
@@ -77,16 +57,6 @@ class ReportsView(LoginRequiredMixin, TemplateView):
         if selected_program and selected_program.isdigit():
             program = TrainingProgram.objects.filter(id=int(selected_program)).first()
             context['selected_program_name'] = program.name if program else "Неизвестная программа"
-
-        total_employees = len(report_data)
-        context['total_employees'] = total_employees
-        trained_counts = {}
-        for program in training_programs:
-            trained_count = sum(
-                1 for data in report_data if data['trainings'].get(
-                    program.id, {}).get('date') != "Обучение не пройдено")
-            trained_counts[program.name] = trained_count
-        context['trained_counts'] = trained_counts
         return context
 
     @log_view_action('Открыта страница', 'отчетов')
@@ -94,118 +64,178 @@ class ReportsView(LoginRequiredMixin, TemplateView):
         return super().get(request, *args, **kwargs)
 
 
-class ExportReportView(LoginRequiredMixin, View):
+class ReportRowsView(LoginRequiredMixin, ConditionalGetMixin, View):
+    """
+    Порция строк отчета в JSON для таблицы, подгружаемой при прокрутке
+    (static/js/report_grid.js). Фильтры и сортировка — те же параметры, что у
+    страницы отчетов; следующая порция запрашивается по курсору next.
+    """
+    per_page = 100
+    max_per_page = 500
+    daily_data = True
+    query_budget = 16
+
+    @log_view_action('Загружена порция', 'отчета по обучению')
+    def get(self, request, *args, **kwargs):
+        cursor = request.GET.get('cursor')
+        try:
+            per_page = min(max(int(request.GET.get('per_page', self.per_page)), 1), self.max_per_page)
+        except ValueError:
+            per_page = self.per_page
+        page, report_data, programs = ReportService.report_page(
+            selected_employees=[emp for emp in request.GET.getlist('employees') if emp],
+            selected_program=request.GET.get('program') or None,
+            exclude_not_completed=request.GET.get('exclude_not_completed') == 'on',
+            sort_by=request.GET.get('sort_by', 'last_name'),
+            sort_order=request.GET.get('sort_order', 'asc'),
+            cursor=cursor,
+            per_page=per_page,
+            # Общее число строк считается только для первой порции
+            count_mode=None if cursor else 'exact')
+        return JsonResponse({
+            'programs': [program.id for program in programs],
+            'rows': [self.serialize_row(data, programs) for data in report_data],
+            'next': page.next_cursor or None,
+            'count': page.paginator.count,
+        })
+
+    @staticmethod
+    def serialize_row(data, programs):
+        employee = data['employee']
+        position = employee.position
+        name = f'{employee.last_name} {employee.first_name[:1]}.'
+        if employee.middle_name:
+            name += f' {employee.middle_name[:1]}.'
+        return {
+            'id': employee.pk,
+            'name': name,
+            'position': str(position) if position else None,
+            'department': str(employee.department) if employee.department else None,
+            'is_manager': bool(position and position.is_manager),
+            'is_teacher': bool(position and position.is_teacher),
+            # Ячейка: [CSS-класс статуса, дата прохождения (дд.мм.гг) или null, подтверждено]
+            'cells': [
+                [training['class'],
+                 training['date'].strftime('%d.%m.%y') if training['date'] != NOT_COMPLETED else None,
+                 training['is_verified']]
+                for training in (data['trainings'][program.id] for program in programs)
+            ],
+        }
+
+
+@method_decorator(gzip_page, name='dispatch')
+class ReportMatrixView(LoginRequiredMixin, ConditionalGetMixin, View):
+    """
+    Матрица отчета в колоночном JSON для панелей и скриптов (см.
+    ReportService.report_matrix). Принимает те же фильтры, что и страница отчетов;
+    ответ сжимается gzip, если клиент его поддерживает.
+    """
+    daily_data = True
+    query_budget = 15
+
+    @log_view_action('Выгружена матрица', 'отчета по обучению')
+    def get(self, request, *args, **kwargs):
+        matrix = ReportService.report_matrix(
+            selected_employees=[emp for emp in request.GET.getlist('employees') if emp],
+            selected_program=request.GET.get('program') or None,
+            exclude_not_completed=request.GET.get('exclude_not_completed') == 'on')
+        return JsonResponse(matrix, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+
+
+class ExportReportView(LoginRequiredMixin, ConditionalGetMixin, View):
+    daily_data = True
+    # Бюджет экспорта в памяти; потоковый экспорт добавляет запросы на каждый пакет сотрудников
+    query_budget = 52
+    queries_per_chunk = 2
+
     @log_view_action('Экспортирован', 'отчет по обучению')
     def get(self, request, *args, **kwargs):
+        selected_employees = [emp for emp in request.GET.getlist('employees') if emp]
+        selected_program = request.GET.get('program')
+        exclude_not_completed = request.GET.get('exclude_not_completed') == 'on'
+        # Фильтры проверяются до выбора режима: неверный идентификатор — ответ 400, а не ошибка экспорта
+        ReportCache.normalize_filters(selected_employees, selected_program, exclude_not_completed)
         try:
-            selected_employees = request.GET.getlist('employees')
-            selected_program = request.GET.get('program')
-            exclude_not_completed = request.GET.get('exclude_not_completed') == 'on'
-            report_data, training_programs = ReportService.generate_training_report(
-                selected_employees, selected_program)
-            if selected_employees:
-                report_data = [
-                    data for data in report_data if str(data['employee'].pk) in selected_employees]
-            if exclude_not_completed:
-                if selected_program and selected_program.isdigit():
-                    report_data = [
-                        data for data in report_data
-                        if data['trainings'].get(int(selected_program), {}).get('date') != "Обучение не пройдено"
-                    ]
-                else:
-                    report_data = [
-                        data for data in report_data
-                        if any(
-                            training.get('date') != "Обучение не пройдено"
-                            for training in data['trainings'].values()
-                        )
-                    ]
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Отчет по обучению"
-            base_headers = ["Сотрудник", "Должность", "Руководитель", "Педагогический работник",
-                            "Член комиссии по ОТ", "Подразделение"]
-            if selected_program and selected_program.isdigit():
-                program = TrainingProgram.objects.filter(id=int(selected_program)).first()
-                program_headers = [program.name, "Статус подтверждения"] if program else []
+            is_filtered = bool(selected_employees or selected_program or exclude_not_completed)
+            filename = "training_report_filtered.xlsx" if is_filtered else "training_report_all.xlsx"
+            if request.GET.get('mode') == 'stream':
+                response = self.stream_export(
+                    selected_employees, selected_program, exclude_not_completed, filename,
+                    on_chunk=lambda: extend_budget(request, self.queries_per_chunk))
             else:
-                program_headers = []
-                for program in training_programs:
-                    program_headers.extend([program.name, "Статус подтверждения"])
-            headers = base_headers + program_headers
-            ws.append(headers)
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal="center")
-            for data in report_data:
-                first_initial = data['employee'].first_name[0] if data['employee'].first_name else ""
-                middle_initial = data['employee'].middle_name[0] if data['employee'].middle_name else ""
-                employee_name = f"{data['employee'].last_name} {first_initial}. {middle_initial}.".strip()
-                row = [
-                    employee_name,
-                    str(data['employee'].position or "—"),
-                    "Да" if data['employee'].position and data['employee'].position.is_manager else "Нет",
-                    "Да" if data['employee'].position and data['employee'].position.is_teacher else "Нет",
-                    "Да" if data['employee'].is_safety_commission_member else "Нет",
-                    str(data['employee'].department or "—")
-                ]
-                if selected_program and selected_program.isdigit():
-                    training = data['trainings'].get(int(selected_program), {})
-                    date = training.get('date', "Обучение не пройдено")
-                    row.append(date if date == "Обучение не пройдено" else date.strftime("%d.%m.%y"))
-                    row.append("Подтверждено" if training.get('is_verified', False) else "Не подтверждено")
-                else:
-                    for program in training_programs:
-                        training = data['trainings'].get(program.id, {})
-                        date = training.get('date', "Обучение не пройдено")
-                        row.append(date if date == "Обучение не пройдено" else date.strftime("%d.%m.%y"))
-                        row.append("Подтверждено" if training.get('is_verified', False) else "Не подтверждено")
-                ws.append(row)
-            start_col_idx = len(base_headers) + 1
-            for row_idx, data in enumerate(report_data, start=2):
-                if selected_program and selected_program.isdigit():
-                    cell = ws.cell(row=row_idx, column=start_col_idx)
-                    training = data['trainings'].get(int(selected_program), {})
-                    status_class = training.get('class', 'not-completed')
-                    fill_colors = {
-                        'not-completed': 'FF9999',
-                        'overdue': 'FF3333',
-                        'warning': 'FFFF66',
-                        'completed': '99FF99'
-                    }
-                    cell.fill = PatternFill(
-                        start_color=fill_colors.get(status_class, 'FFFFFF'),
-                        end_color=fill_colors.get(status_class, 'FFFFFF'),
-                        fill_type="solid"
-                    )
-                else:
-                    for col_idx, program in enumerate(training_programs, start=start_col_idx):
-                        cell = ws.cell(row=row_idx, column=col_idx)
-                        training = data['trainings'].get(program.id, {})
-                        status_class = training.get('class', 'not-completed')
-                        fill_colors = {
-                            'not-completed': 'FF9999',
-                            'overdue': 'FF3333',
-                            'warning': 'FFFF66',
-                            'completed': '99FF99'
-                        }
-                        cell.fill = PatternFill(
-                            start_color=fill_colors.get(status_class, 'FFFFFF'),
-                            end_color=fill_colors.get(status_class, 'FFFFFF'),
-                            fill_type="solid"
-                        )
-            for col in ws.columns:
-                max_length = max(len(str(cell.value)) for cell in col if cell.value)
-                ws.column_dimensions[col[0].column_letter].width = max_length + 2
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            filename = "training_report_filtered.xlsx" if selected_employees or selected_program or exclude_not_completed else "training_report_all.xlsx"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            wb.save(response)
+                report_data, training_programs = ReportService.get_report(
+                    selected_employees, selected_program, exclude_not_completed)
+                wb = TrainingReportExport(training_programs, selected_program).build_workbook(report_data)
+                response = HttpResponse(content_type=XLSX_CONTENT_TYPE)
+                response['Content-Disposition'] = f'attachment; filename="{filename}"'
+                wb.save(response)
             logger.info('Экспортирован %s отчет по обучению пользователем: %s',
-                        'отфильтрованный' if selected_employees or selected_program or exclude_not_completed else 'полный',
+                        'отфильтрованный' if is_filtered else 'полный',
                         request.user.username)
             return response
         except Exception as e:
             logger.error(f"Ошибка при экспорте отчета: {e}")
-            return HttpResponse("Ошибка при создании отчета. Пожалуйста, попробуйте позже.", status=500)
\ No newline at end of file
+            return HttpResponse("Ошибка при создании отчета. Пожалуйста, попробуйте позже.", status=500)
+
+    @staticmethod
+    def stream_export(selected_employees, selected_program, exclude_not_completed, filename, on_chunk=None):
+        output = export_training_report(
+            selected_employees, selected_program, exclude_not_completed, on_chunk=on_chunk)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+class ExportJobCreateView(LoginRequiredMixin, View):
+    """Ставит экспорт в очередь и сразу возвращает идентификатор задачи."""
+    query_budget = 14
+
+    @log_view_action('Поставлен в очередь экспорт', 'отчета по обучению')
+    def post(self, request, *args, **kwargs):
+        params = {
+            'employees': [emp for emp in request.POST.getlist('employees') if emp],
+            'program': request.POST.get('program') or None,
+            'exclude_not_completed': request.POST.get('exclude_not_completed') == 'on',
+        }
+        # Неверные фильтры отклоняются сразу, а не ошибкой задачи в обработчике
+        ReportCache.normalize_filters(params['employees'], params['program'], params['exclude_not_completed'])
+        job = ExportJob.objects.create(created_by=request.user, params=params)
+        logger.info('Создана задача экспорта #%s пользователем: %s', job.pk, request.user.username)
+        return JsonResponse(
+            {'id': job.pk, 'status_url': reverse('reports:export_job_status', kwargs={'pk': job.pk})},
+            status=202)
+
+
+class ExportJobMixin(LoginRequiredMixin):
+    def get_job(self):
+        jobs = ExportJob.objects.all()
+        if not self.request.user.is_staff:
+            jobs = jobs.filter(created_by=self.request.user)
+        return get_object_or_404(jobs, pk=self.kwargs['pk'])
+
+
+class ExportJobStatusView(ExportJobMixin, View):
+    query_budget = 12
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'rows_done': job.rows_done,
+            'rows_total': job.rows_total,
+            'error': job.error,
+            'download_url': reverse('reports:export_job_download', kwargs={'pk': job.pk})
+            if job.status == ExportJob.STATUS_DONE else None,
+        })
+
+
+class ExportJobDownloadView(ExportJobMixin, View):
+    query_budget = 12
+
+    @log_view_action('Скачан', 'фоновый экспорт отчета')
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        if job.status != ExportJob.STATUS_DONE or not job.file:
+            raise Http404('Файл отчета еще не готов.')
+        return FileResponse(
+            job.file.open('rb'), as_attachment=True, filename=job.filename, content_type=XLSX_CONTENT_TYPE)
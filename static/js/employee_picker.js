@@ -0,0 +1,129 @@
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('.employee-picker').forEach(function (picker) {
+        const input = picker.querySelector('input[type="text"]');
+        const list = picker.querySelector('.employee-picker-results');
+        const selected = picker.querySelector('.employee-picker-selected');
+        let timer = null;
+        let active = -1;
+        let lastQuery = '';
+
+        function selectedIds() {
+            return new Set(Array.from(selected.querySelectorAll('input[name="employees"]'), item => item.value));
+        }
+
+        function addChip(employee) {
+            if (selectedIds().has(String(employee.id))) {
+                return;
+            }
+            const chip = document.createElement('span');
+            chip.className = 'employee-chip';
+            chip.textContent = employee.name + ' ';
+            const remove = document.createElement('button');
+            remove.type = 'button';
+            remove.className = 'employee-chip-remove';
+            remove.title = 'Убрать';
+            remove.textContent = '×';
+            const hidden = document.createElement('input');
+            hidden.type = 'hidden';
+            hidden.name = 'employees';
+            hidden.value = employee.id;
+            chip.append(remove, hidden);
+            selected.appendChild(chip);
+        }
+
+        function close() {
+            list.hidden = true;
+            list.innerHTML = '';
+            active = -1;
+        }
+
+        function highlight(index) {
+            const items = list.querySelectorAll('li[data-id]');
+            items.forEach((item, position) => item.classList.toggle('active', position === index));
+            active = index;
+        }
+
+        function render(results) {
+            list.innerHTML = '';
+            active = -1;
+            if (!results.length) {
+                const empty = document.createElement('li');
+                empty.className = 'employee-picker-empty';
+                empty.textContent = 'Сотрудники не найдены';
+                list.appendChild(empty);
+            }
+            results.forEach(function (employee) {
+                const item = document.createElement('li');
+                item.dataset.id = employee.id;
+                item.textContent = employee.name;
+                if (employee.department) {
+                    const department = document.createElement('small');
+                    department.textContent = ' — ' + employee.department;
+                    item.appendChild(department);
+                }
+                item.addEventListener('mousedown', function (e) {
+                    // mousedown срабатывает раньше blur поля ввода
+                    e.preventDefault();
+                    addChip(employee);
+                    input.value = '';
+                    close();
+                });
+                list.appendChild(item);
+            });
+            list.hidden = false;
+        }
+
+        function search() {
+            const query = input.value.trim();
+            if (!query) {
+                close();
+                return;
+            }
+            lastQuery = query;
+            const url = new URL(picker.dataset.url, window.location.href);
+            url.searchParams.set('q', query);
+            fetch(url, {headers: {'Accept': 'application/json'}})
+                .then(response => response.json())
+                .then(data => {
+                    // Ответ на устаревший запрос не должен затирать подсказки для нового текста
+                    if (query === lastQuery && input.value.trim() === query) {
+                        render(data.results);
+                    }
+                })
+                .catch(close);
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(search, 200);
+        });
+
+        input.addEventListener('keydown', function (e) {
+            const items = list.querySelectorAll('li[data-id]');
+            if (e.key === 'ArrowDown' && items.length) {
+                e.preventDefault();
+                highlight((active + 1) % items.length);
+            } else if (e.key === 'ArrowUp' && items.length) {
+                e.preventDefault();
+                highlight((active - 1 + items.length) % items.length);
+            } else if (e.key === 'Enter' && !list.hidden) {
+                // Enter выбирает подсказку, а не отправляет форму
+                e.preventDefault();
+                const item = items[active >= 0 ? active : 0];
+                if (item) {
+                    item.dispatchEvent(new MouseEvent('mousedown'));
+                }
+            } else if (e.key === 'Escape') {
+                close();
+            }
+        });
+
+        input.addEventListener('blur', close);
+
+        selected.addEventListener('click', function (e) {
+            if (e.target.classList.contains('employee-chip-remove')) {
+                e.target.closest('.employee-chip').remove();
+            }
+        });
+    });
+});
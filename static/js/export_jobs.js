@@ -0,0 +1,45 @@
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.getElementById('export-job-form');
+    if (!form) {
+        return;
+    }
+    const status = form.querySelector('.export-job-status');
+    const button = form.querySelector('button[type="submit"]');
+
+    function showStatus(html) {
+        status.hidden = false;
+        status.innerHTML = html;
+    }
+
+    function poll(statusUrl) {
+        fetch(statusUrl, {headers: {'Accept': 'application/json'}})
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'done') {
+                    showStatus(`<a href="${job.download_url}" class="button button--success">Скачать отчет</a>`);
+                    button.disabled = false;
+                } else if (job.status === 'failed') {
+                    showStatus('Ошибка при создании отчета. Пожалуйста, попробуйте позже.');
+                    button.disabled = false;
+                } else {
+                    const progress = job.rows_total ? ` (${job.rows_done} из ${job.rows_total})` : '';
+                    showStatus(`${job.status_display}${progress}`);
+                    setTimeout(() => poll(statusUrl), 2000);
+                }
+            })
+            .catch(() => setTimeout(() => poll(statusUrl), 5000));
+    }
+
+    form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        button.disabled = true;
+        showStatus('Задача поставлена в очередь');
+        fetch(form.action, {method: 'POST', body: new FormData(form)})
+            .then(response => response.json())
+            .then(job => poll(job.status_url))
+            .catch(() => {
+                showStatus('Не удалось поставить задачу в очередь.');
+                button.disabled = false;
+            });
+    });
+});
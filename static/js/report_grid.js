@@ -0,0 +1,117 @@
+document.addEventListener('DOMContentLoaded', function () {
+    const tbody = document.getElementById('report-rows');
+    if (!tbody) {
+        return;
+    }
+    const status = document.getElementById('report-grid-status');
+    const columns = Number(tbody.dataset.columns);
+    let url = tbody.dataset.url;
+    let total = null;
+    let loaded = 0;
+    let loading = false;
+
+    function cell(text, className) {
+        const td = document.createElement('td');
+        if (className) {
+            td.className = className;
+        }
+        td.textContent = text;
+        return td;
+    }
+
+    function icon(className, title, text) {
+        const span = document.createElement('span');
+        span.className = className;
+        span.title = title;
+        span.textContent = text;
+        return span;
+    }
+
+    function renderRow(row) {
+        const tr = document.createElement('tr');
+        const name = cell(row.name + ' ');
+        if (row.is_manager) {
+            name.appendChild(icon('manager-icon', 'Руководитель', '👑'));
+        }
+        if (row.is_teacher) {
+            name.appendChild(icon('teacher-icon', 'Педагогический работник', '📚'));
+        }
+        tr.appendChild(name);
+        tr.appendChild(cell(row.position || '—'));
+        tr.appendChild(cell(row.department || '—'));
+        // Ячейка: [CSS-класс статуса, дата или null, подтверждено]
+        row.cells.forEach(function ([className, date, isVerified]) {
+            const td = cell(date ? date + ' ' : '✖', className);
+            if (date) {
+                td.appendChild(isVerified
+                    ? icon('verified-icon', 'Подтверждено', '✅')
+                    : icon('not-verified-icon', 'Не подтверждено', '❌'));
+            }
+            tr.appendChild(td);
+        });
+        return tr;
+    }
+
+    function showStatus() {
+        if (url) {
+            status.textContent = total !== null ? `Загружено ${loaded} из ${total}` : `Загружено ${loaded}`;
+        } else {
+            status.textContent = total !== null ? `Всего: ${total}` : '';
+        }
+    }
+
+    function loadChunk() {
+        if (loading || !url) {
+            return;
+        }
+        loading = true;
+        fetch(url, {headers: {'Accept': 'application/json'}})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.json();
+            })
+            .then(chunk => {
+                if (chunk.count !== null) {
+                    total = chunk.count;
+                }
+                const fragment = document.createDocumentFragment();
+                chunk.rows.forEach(row => fragment.appendChild(renderRow(row)));
+                tbody.appendChild(fragment);
+                loaded += chunk.rows.length;
+                if (!loaded) {
+                    const tr = document.createElement('tr');
+                    const td = cell('Данные не найдены.');
+                    td.colSpan = columns;
+                    tr.appendChild(td);
+                    tbody.appendChild(tr);
+                }
+                if (chunk.next) {
+                    const next = new URL(tbody.dataset.url, window.location.href);
+                    next.searchParams.set('cursor', chunk.next);
+                    url = next.toString();
+                } else {
+                    url = null;
+                }
+                loading = false;
+                showStatus();
+                // Если порция не заполнила экран, следующая загружается сразу
+                if (url && status.getBoundingClientRect().top < window.innerHeight) {
+                    loadChunk();
+                }
+            })
+            .catch(() => {
+                loading = false;
+                status.textContent = 'Не удалось загрузить данные отчета.';
+            });
+    }
+
+    // Следующая порция запрашивается, когда строка состояния под таблицей приближается к экрану
+    new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadChunk();
+        }
+    }, {rootMargin: '600px 0px'}).observe(status);
+    loadChunk();
+});
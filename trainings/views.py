@@ -1,23 +1,25 @@
 import logging
 
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView
 
+from employees.pagination import KeysetPaginationMixin
 from employees.views import log_view_action, EditorModeratedDeleteView
+from reports.conditional import ConditionalGetMixin
 from .forms import TrainingProgramForm
 from .models import TrainingProgram
 
 logger = logging.getLogger('trainings')
 
 
-class TrainingProgramListView(LoginRequiredMixin, ListView):
+class TrainingProgramListView(LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = TrainingProgram
     template_name = 'trainings/training_list.html'
     context_object_name = 'trainings'
     paginate_by = 20
+    query_budget = 13
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -49,6 +51,7 @@ class TrainingProgramCreateView(
     template_name = 'trainings/training_form.html'
     success_url = reverse_lazy('trainings:training_list')
     permission_required = 'employees.add_trainingprogram'
+    query_budget = 12
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -83,6 +86,7 @@ class TrainingProgramUpdateView(
     template_name = 'trainings/training_form.html'
     success_url = reverse_lazy('trainings:training_list')
     permission_required = 'employees.change_trainingprogram'
+    query_budget = 13
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -129,7 +133,7 @@ class TrainingProgramDeleteConfirmView(EditorModeratedDeleteView):
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
         user = request.user.username
-        if request.user.groups.filter(name=settings.MODERATOR_GROUP_NAME).exists():
+        if request.roles.is_moderator:
             logger.info(
                 'Подтверждено удаление программы обучения: %s пользователем из группы модераторов: %s',
                 obj,